@@ -0,0 +1,235 @@
+"""
+Latency benchmark for the disease predictor.
+
+Three numbers decide how the predictor feels, and they move independently:
+
+    cold start   the UI starts a fresh interpreter per prediction, so each click pays
+                 interpreter start + `import disease_predictor` + load_model() + the
+                 first predict(); measured in child processes, split into those parts
+    warm         predict() latency once the model is loaded (p50 / p95 / p99), as seen
+                 by predictor_service.py and the triage queue
+    batch        predict_batch() throughput (records per second) at several batch sizes
+
+Queries are symptom sets drawn from the training rows in dataset.csv (via
+dataset_cache), each trimmed to a random subset of its symptoms the way a patient
+reports only some of them. The sample is seeded, so two runs on the same machine time
+the same queries.
+
+    python benchmark_predictor.py [--cold-runs 5] [--queries 1000] [--batch-sizes 1,8,32,128,512]
+    python benchmark_predictor.py --compare Results/benchmarks/predictor-<old>.json
+
+The report goes to Results/benchmarks/predictor-<timestamp>.json; --compare prints
+how this run differs from an earlier report.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import numpy as np
+
+DEFAULT_BATCH_SIZES = (1, 8, 32, 128, 512)
+WARMUP_QUERIES = 50
+# each batch size is repeated until it has run this long (and at least MIN_BATCHES times)
+BATCH_SECONDS = 1.0
+MIN_BATCHES = 3
+
+# run by cold_start() in a fresh interpreter: the same work as one UI prediction
+CHILD = """
+import json, sys, time
+started = time.perf_counter()
+import disease_predictor
+imported = time.perf_counter()
+predictor = disease_predictor.DiseasePredictorSystem()
+loaded = time.perf_counter()
+predictor.predict(json.loads(sys.argv[1]))
+done = time.perf_counter()
+print(json.dumps({"import_ms": 1000 * (imported - started), "load_model_ms": 1000 * (loaded - imported),
+                  "first_predict_ms": 1000 * (done - loaded), "in_process_ms": 1000 * (done - started)}))
+"""
+
+
+def benchmarks_folder():
+    project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return os.path.join(project_root, "Results", "benchmarks")
+
+
+def sample_queries(count, seed=0, min_symptoms=1):
+    """count symptom lists, each a random non-empty subset of one dataset row's symptoms"""
+    import dataset_cache
+    data = dataset_cache.load()
+    rng = random.Random(seed)
+    queries = []
+    while len(queries) < count:
+        row = rng.randrange(len(data.labels))
+        present = [data.symptoms[c] for c in np.flatnonzero(data.features[row]).tolist()]
+        if len(present) < min_symptoms:
+            continue
+        queries.append(rng.sample(present, rng.randint(min_symptoms, len(present))))
+    return queries
+
+
+def summarize(samples_ms):
+    """p50 / p95 / p99 / mean / min / max of a list of milliseconds"""
+    values = np.asarray(samples_ms, dtype=float)
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50_ms": round(float(p50), 3), "p95_ms": round(float(p95), 3), "p99_ms": round(float(p99), 3),
+            "mean_ms": round(float(values.mean()), 3), "min_ms": round(float(values.min()), 3),
+            "max_ms": round(float(values.max()), 3)}
+
+
+def cold_start(runs, query):
+    """Wall time of `runs` fresh processes that import, load and predict once"""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    wall, parts = [], []
+    for _ in range(runs):
+        started = time.perf_counter()
+        proc = subprocess.run([sys.executable, "-c", CHILD, json.dumps(query)], cwd=script_dir,
+                              capture_output=True, text=True)
+        elapsed = 1000 * (time.perf_counter() - started)
+        if proc.returncode != 0:
+            raise RuntimeError(f"cold start child failed:\n{proc.stderr[-2000:]}")
+        wall.append(elapsed)
+        child = json.loads(proc.stdout.strip().splitlines()[-1])
+        # whatever the child did not time itself: interpreter start and shutdown
+        child["interpreter_ms"] = elapsed - child["in_process_ms"]
+        parts.append(child)
+    report = {"runs": runs, "wall": summarize(wall)}
+    for key in ("interpreter_ms", "import_ms", "load_model_ms", "first_predict_ms"):
+        report[key] = round(float(np.median([p[key] for p in parts])), 3)
+    return report
+
+
+def warm(predictor, queries):
+    """predict() latency per query after WARMUP_QUERIES untimed calls"""
+    for symptoms in queries[:WARMUP_QUERIES]:
+        predictor.predict(symptoms)
+    samples = []
+    for symptoms in queries:
+        started = time.perf_counter()
+        predictor.predict(symptoms)
+        samples.append(1000 * (time.perf_counter() - started))
+    return {"queries": len(queries), **summarize(samples)}
+
+
+def batch(predictor, queries, sizes):
+    """predict_batch() throughput for each batch size (batches cycle through queries)"""
+    results = []
+    for size in sizes:
+        batches = [[queries[(start + j) % len(queries)] for j in range(size)]
+                   for start in range(0, max(len(queries), size * MIN_BATCHES), size)]
+        predictor.predict_batch(batches[0])
+        samples, total = [], 0.0
+        k = 0
+        while total < BATCH_SECONDS or len(samples) < MIN_BATCHES:
+            started = time.perf_counter()
+            predictor.predict_batch(batches[k % len(batches)])
+            elapsed = time.perf_counter() - started
+            samples.append(1000 * elapsed)
+            total += elapsed
+            k += 1
+        results.append({"batch_size": size, "batches": len(samples),
+                        "records_per_s": round(size * len(samples) / total, 1),
+                        "batch_p50_ms": round(float(np.median(samples)), 3)})
+    return results
+
+
+def environment():
+    import sklearn
+    return {"python": platform.python_version(), "implementation": platform.python_implementation(),
+            "platform": platform.platform(), "machine": platform.machine(), "cpu_count": os.cpu_count(),
+            "numpy": np.__version__, "sklearn": sklearn.__version__}
+
+
+def model_summary(predictor):
+    model = predictor.bundle.model
+    return {"version": predictor.model_version, "type": type(model).__name__,
+            "classes": len(model.classes_), "symptoms": len(predictor.symptom_columns),
+            "trees": len(getattr(model, "estimators_", []))}
+
+
+def run(cold_runs=5, queries=1000, batch_sizes=DEFAULT_BATCH_SIZES, seed=0):
+    """Full benchmark report as a dict"""
+    from disease_predictor import DiseasePredictorSystem
+    sample = sample_queries(max(queries, WARMUP_QUERIES), seed)
+    report = {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "seed": seed, "environment": environment()}
+    if cold_runs > 0:
+        report["cold_start"] = cold_start(cold_runs, sample[0])
+    predictor = DiseasePredictorSystem()
+    report["model"] = model_summary(predictor)
+    report["warm"] = warm(predictor, sample[:queries])
+    report["batch"] = batch(predictor, sample, batch_sizes)
+    return report
+
+
+def compare(old, new):
+    """Lines describing how new differs from old (ratio new / old, lower is better for times)"""
+    lines = []
+
+    def line(label, before, after, unit):
+        if before and after is not None:
+            lines.append(f"  {label:<28} {before:10.2f} -> {after:10.2f} {unit:<5} ({after / before:.2f}x)")
+
+    if old.get("model", {}).get("version") != new.get("model", {}).get("version"):
+        lines.append(f"  model version differs: {old.get('model', {}).get('version')} -> {new['model'].get('version')}")
+    for key in ("interpreter_ms", "import_ms", "load_model_ms", "first_predict_ms"):
+        line(f"cold {key[:-3]}", old.get("cold_start", {}).get(key), new.get("cold_start", {}).get(key), "ms")
+    line("cold wall p50", old.get("cold_start", {}).get("wall", {}).get("p50_ms"),
+         new.get("cold_start", {}).get("wall", {}).get("p50_ms"), "ms")
+    for key in ("p50_ms", "p95_ms", "p99_ms"):
+        line(f"warm {key[:-3]}", old.get("warm", {}).get(key), new.get("warm", {}).get(key), "ms")
+    before = {b["batch_size"]: b["records_per_s"] for b in old.get("batch", [])}
+    for b in new.get("batch", []):
+        line(f"batch {b['batch_size']} throughput", before.get(b["batch_size"]), b["records_per_s"], "rec/s")
+    return lines
+
+
+def print_report(report):
+    cold = report.get("cold_start")
+    if cold:
+        print(f"Cold start ({cold['runs']} runs): p50 {cold['wall']['p50_ms']:.0f} ms = interpreter "
+              f"{cold['interpreter_ms']:.0f} + import {cold['import_ms']:.0f} + load_model {cold['load_model_ms']:.0f} "
+              f"+ first predict {cold['first_predict_ms']:.0f}")
+    w = report["warm"]
+    print(f"Warm predict() ({w['queries']} queries): p50 {w['p50_ms']:.2f} ms, p95 {w['p95_ms']:.2f} ms, "
+          f"p99 {w['p99_ms']:.2f} ms")
+    for b in report["batch"]:
+        print(f"Batch {b['batch_size']:>4}: {b['records_per_s']:>9.1f} records/s ({b['batch_p50_ms']:.2f} ms per batch)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold start, warm latency and batch throughput of the disease predictor")
+    parser.add_argument("--cold-runs", type=int, default=5, help="fresh processes to time (0 skips cold start)")
+    parser.add_argument("--queries", type=int, default=1000, help="timed warm predict() calls")
+    parser.add_argument("--batch-sizes", default=",".join(map(str, DEFAULT_BATCH_SIZES)))
+    parser.add_argument("--seed", type=int, default=0, help="seed of the query sample")
+    parser.add_argument("--output", help="report path (default Results/benchmarks/predictor-<timestamp>.json)")
+    parser.add_argument("--compare", help="earlier report to compare against")
+    args = parser.parse_args()
+
+    batch_sizes = [int(s) for s in args.batch_sizes.split(",") if s.strip()]
+    if args.queries < 1 or any(s < 1 for s in batch_sizes):
+        parser.error("--queries and --batch-sizes must be positive")
+
+    from result_writer import write_json
+    report = run(args.cold_runs, args.queries, batch_sizes, args.seed)
+    print_report(report)
+    output = args.output or os.path.join(benchmarks_folder(), f"predictor-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    write_json(output, report, indent=2)
+    print(f"Report written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            old = json.load(f)
+        print(f"Compared with {args.compare} ({old.get('timestamp')}):")
+        for text in compare(old, report):
+            print(text)
+
+
+if __name__ == "__main__":
+    main()
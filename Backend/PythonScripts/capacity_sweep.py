@@ -0,0 +1,265 @@
+"""
+What-if capacity sweep: how do match rate and referrals change with more or fewer
+doctors of a specialty, fewer beds or other GA settings?
+
+Takes a base input.json plus one range per parameter, runs every combination through
+the existing scheduler engines (greedy_schedule, the GA, optionally per component via
+decompose.py) in a process pool and writes one table:
+
+    Results/capacity_sweep.csv / capacity_sweep.json
+
+    python capacity_sweep.py --doctors Cardiology=0:3 --doctors Neurology=-1,0 --beds 4,8
+    python capacity_sweep.py --engine ga --ga-generations 60,120 --seed 1 --workers 4
+
+Doctor ranges are changes to the base roster: +n appends n doctors of the specialty at
+the end of the roster (least senior), -n removes the last n listed. Ranges are either
+a comma list (0,2,5) or an inclusive start:stop[:step] range.
+
+Work shared between scenarios is done once: the base input goes to each worker process
+once (scenarios only carry their changes), and scenarios that can only differ in
+bed-dependent columns share one solve. Beds do not influence who sees which doctor
+(they are numbered by patient position), so a bed range costs nothing extra; the GA
+settings only matter for the GA. GA scenarios all use the same seed, so differences
+between rows come from the capacity change rather than from the random stream.
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import math
+import os
+import sys
+import time
+import numpy as np
+
+from scheduling_problem import SchedulingProblem
+from result_writer import atomic_open, write_json
+from instrumentation import span, emit
+
+ENGINES = ("greedy", "ga")
+GA_SETTINGS = {"GAPopulation": int, "GAGenerations": int, "GAMutation": float}
+
+# base input of this worker process (set once by the pool initializer)
+_BASE = None
+
+
+def parse_range(text, kind=int):
+    """'0,2,5' -> [0, 2, 5]; '-1:2' -> [-1, 0, 1, 2]; '2:10:4' -> [2, 6, 10]"""
+    if ":" in text:
+        parts = [kind(p) for p in text.split(":")]
+        start, stop = parts[0], parts[1]
+        step = parts[2] if len(parts) > 2 else 1
+        if step <= 0:
+            raise ValueError(f"range step must be positive: {text!r}")
+        count = int(math.floor((stop - start) / step + 1e-9)) + 1
+        return [kind(start + k * step) for k in range(max(count, 0))]
+    return [kind(p) for p in text.split(",") if p.strip()]
+
+
+def base_input(data):
+    """Copy of an input.json dict with the defaults scheduler.py fills in"""
+    base = dict(data)
+    doctors, patients = int(base.get("Doctors", 3)), int(base.get("Patients", 6))
+    doctor_details = list(base.get("DoctorDetails", []))[:doctors]
+    patient_details = list(base.get("PatientDetails", []))[:patients]
+    while len(doctor_details) < doctors:
+        doctor_details.append({"Name": f"Dr. {len(doctor_details) + 1}", "Specialty": "General"})
+    while len(patient_details) < patients:
+        patient_details.append({"Name": f"Patient {len(patient_details) + 1}", "Disease": "Fever", "Age": 30})
+    urgency = [int(x) for x in base.get("Urgency", [5] * patients)]
+    base.update(DoctorDetails=doctor_details, PatientDetails=patient_details,
+                Urgency=(urgency + [5] * patients)[:patients])
+    return base
+
+
+def scenarios(doctor_ranges, beds=None, ga_ranges=None):
+    """Cartesian product of the ranges as a list of scenario dicts"""
+    specialties = list(doctor_ranges)
+    ga_names = list(ga_ranges or {})
+    axes = [doctor_ranges[s] for s in specialties] + [beds or [None]] + [ga_ranges[n] for n in ga_names]
+    result = []
+    for values in itertools.product(*axes):
+        deltas = dict(zip(specialties, values[:len(specialties)]))
+        ga = dict(zip(ga_names, values[len(specialties) + 1:]))
+        result.append({"doctors": deltas, "beds": values[len(specialties)], "ga": ga})
+    return result
+
+
+def apply(base, scenario):
+    """input.json dict for one scenario; the patient lists are shared with the base, not copied"""
+    roster = list(base["DoctorDetails"])
+    for specialty, delta in scenario["doctors"].items():
+        if delta < 0:
+            listed = [d for d, doc in enumerate(roster) if doc.get("Specialty", "General") == specialty]
+            drop = set(listed[len(listed) + delta:]) if -delta < len(listed) else set(listed)
+            roster = [doc for d, doc in enumerate(roster) if d not in drop]
+        for k in range(delta):
+            roster.append({"Name": f"Extra {specialty} {k + 1}", "Specialty": specialty})
+    data = dict(base, DoctorDetails=roster, Doctors=len(roster))
+    if scenario["beds"] is not None:
+        data["Beds"] = scenario["beds"]
+    data.update(scenario["ga"])
+    return data
+
+
+def solve_key(scenario, engine):
+    # scenarios with the same key get the same assignment (beds never change it)
+    ga = tuple(sorted(scenario["ga"].items())) if engine == "ga" else ()
+    return tuple(sorted((s, d) for s, d in scenario["doctors"].items() if d)), ga
+
+
+def solve(data, engine, decompose=False, seed=0):
+    """Assignment genome for one scenario input"""
+    if decompose:
+        import decompose as decomposition
+        data = dict(data, GASeed=seed)
+        genome, _, _ = decomposition.solve(data, engine, workers=1)
+        return genome
+    problem = SchedulingProblem(data)
+    if engine == "ga":
+        import scheduler_ga
+        result = scheduler_ga.search(problem, data, int(data.get("GAPopulation", 80)),
+                                     int(data.get("GAGenerations", 120)), float(data.get("GAMutation", 0.06)), seed,
+                                     memo_size=int(data.get("GAFitnessMemo", scheduler_ga.DEFAULT_MEMO_SIZE)))
+        return np.asarray(result["best_individual"], dtype=np.int64)
+    from scheduler import greedy_schedule
+    schedule, _, _ = greedy_schedule(problem.doctors, problem.patients, problem.beds, problem.urgency_list,
+                                     data["DoctorDetails"], data["PatientDetails"], problem.roster)
+    # read the rows, not the assignments list: that one skips diseases outside SPECIALTY_CONDITIONS
+    return np.array([row["Doctor"] - 1 if row["Doctor"] != "-" else -1 for row in schedule], dtype=np.int64)
+
+
+def assignment_metrics(problem, genome):
+    """Columns that depend only on who is assigned to whom"""
+    assigned = genome >= 0
+    safe = np.where(assigned, genome, 0)
+    perfect = assigned & problem.disease_compat[problem.disease_code, safe] if problem.patients else assigned
+    loads = np.bincount(genome[assigned], minlength=problem.doctors) if problem.doctors else np.zeros(0)
+    patients = max(problem.patients, 1)
+    return {
+        "Doctors": problem.doctors,
+        "Perfect Matches": int(perfect.sum()),
+        "Match Success Rate (%)": round(100.0 * int(perfect.sum()) / patients, 1),
+        "Referrals": int((~assigned).sum()),
+        "Referral Rate (%)": round(100.0 * int((~assigned).sum()) / patients, 1),
+        "Mismatched Assignments": int((assigned & ~perfect).sum()),
+        "Max Doctor Load": int(loads.max()) if len(loads) else 0,
+        "Doctor Utilization": round(int(assigned.sum()) / problem.doctors, 2) if problem.doctors else 0.0,
+        "Fitness": round(float(problem.fitness(genome)[0]), 3) if problem.patients else 0.0,
+    }
+
+
+def _init_worker(base):
+    global _BASE
+    _BASE = base
+
+
+def _run(task):
+    # process pool task: one distinct solve
+    key, scenario, engine, decompose, seed = task
+    started = time.perf_counter()
+    data = apply(_BASE, scenario)
+    with span("sweep.scenario", doctors=int(data["Doctors"]), engine=engine):
+        genome = solve(data, engine, decompose, seed)
+    metrics = assignment_metrics(SchedulingProblem(data), genome)
+    metrics["Solve Time (s)"] = round(time.perf_counter() - started, 3)
+    return key, metrics
+
+
+def run_sweep(data, scenario_list, engine="greedy", decompose=False, workers=1, seed=0):
+    """One result row per scenario (same order)"""
+    if engine not in ENGINES:
+        raise ValueError(f"unknown engine {engine!r}, expected one of {', '.join(ENGINES)}")
+    base = base_input(data)
+    unique = {}
+    for scenario in scenario_list:
+        unique.setdefault(solve_key(scenario, engine), scenario)
+    tasks = [(key, scenario, engine, decompose, seed) for key, scenario in unique.items()]
+
+    workers = max(1, min(int(workers), len(tasks)))
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(base,)) as pool:
+            solved = dict(pool.map(_run, tasks))
+    else:
+        _init_worker(base)
+        solved = dict(map(_run, tasks))
+    emit("sweep.summary", scenarios=len(scenario_list), solves=len(tasks), workers=workers, engine=engine)
+
+    patients = int(base.get("Patients", 6))
+    rows = []
+    for n, scenario in enumerate(scenario_list, 1):
+        row = {"Scenario": n}
+        row.update({f"{specialty} Change": delta for specialty, delta in scenario["doctors"].items()})
+        beds = scenario["beds"] if scenario["beds"] is not None else int(base.get("Beds", 4))
+        row["Beds"] = beds
+        row.update(scenario["ga"])
+        row.update(solved[solve_key(scenario, engine)])
+        row["Patients per Bed"] = math.ceil(patients / beds) if beds > 0 else patients
+        rows.append(row)
+    return rows
+
+
+def write_table(rows, results_folder, name="capacity_sweep"):
+    """Results/<name>.csv and .json; returns the two paths"""
+    os.makedirs(results_folder, exist_ok=True)
+    csv_path = os.path.join(results_folder, f"{name}.csv")
+    json_path = os.path.join(results_folder, f"{name}.json")
+    columns = list(dict.fromkeys(column for row in rows for column in row))
+    with atomic_open(csv_path, newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+    write_json(json_path, rows, indent=2)
+    return csv_path, json_path
+
+
+def main():
+    cur = os.path.dirname(os.path.abspath(__file__))
+    project_root = os.path.dirname(os.path.dirname(cur))
+    parser = argparse.ArgumentParser(description="What-if sweep over doctor counts, beds and GA settings")
+    parser.add_argument("--base", default=os.path.join(cur, "input.json"), help="base input.json")
+    parser.add_argument("--doctors", action="append", default=[], metavar="SPECIALTY=RANGE",
+                        help="doctors added (+) or removed (-) for a specialty, e.g. Cardiology=0:3")
+    parser.add_argument("--beds", help="bed counts, e.g. 4,6,8 or 2:10:2")
+    parser.add_argument("--ga-population", help="GA population sizes")
+    parser.add_argument("--ga-generations", help="GA generation counts")
+    parser.add_argument("--ga-mutation", help="GA mutation rates")
+    parser.add_argument("--engine", choices=ENGINES, default="greedy")
+    parser.add_argument("--decompose", action="store_true", help="solve each scenario per component (decompose.py)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=0, help="GA seed shared by every scenario")
+    parser.add_argument("--out", default=os.path.join(project_root, "Results"))
+    args = parser.parse_args()
+
+    try:
+        doctor_ranges = {}
+        for spec in args.doctors:
+            specialty, _, values = spec.partition("=")
+            doctor_ranges[specialty.strip()] = parse_range(values)
+        beds = parse_range(args.beds) if args.beds else None
+        ga_ranges = {name: parse_range(text, GA_SETTINGS[name])
+                     for name, text in (("GAPopulation", args.ga_population), ("GAGenerations", args.ga_generations),
+                                        ("GAMutation", args.ga_mutation)) if text}
+    except ValueError as e:
+        parser.error(str(e))
+
+    with open(args.base) as f:
+        data = json.load(f)
+
+    started = time.perf_counter()
+    scenario_list = scenarios(doctor_ranges, beds, ga_ranges)
+    rows = run_sweep(data, scenario_list, args.engine, args.decompose, args.workers, args.seed)
+    csv_path, json_path = write_table(rows, args.out)
+
+    for row in rows:
+        changes = ", ".join(f"{k}={v}" for k, v in row.items() if k.endswith(" Change") or k == "Beds"
+                            or k in GA_SETTINGS)
+        print(f"{row['Scenario']:>3}  {changes:<50} match {row['Match Success Rate (%)']:>5}%  "
+              f"referrals {row['Referrals']:>4}  max load {row['Max Doctor Load']}")
+    print(f"{len(rows)} scenarios in {time.perf_counter() - started:.2f} s -> {csv_path}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
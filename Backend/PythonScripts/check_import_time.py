@@ -0,0 +1,82 @@
+"""
+Import-time regression check for the entry points the UI starts.
+
+The UI launches a fresh interpreter per action, so whatever a script imports at module
+level is paid on every click. For each entry point this runs
+`python -X importtime -c "import <module>"` a few times and checks
+
+  * the best cumulative import time against a budget (milliseconds), and
+  * that heavy modules which are only needed later (matplotlib, joblib / sklearn,
+    numpy for the greedy path) are not imported at module level.
+
+    python check_import_time.py [--repeat 5] [--scale 2.0]
+
+--scale multiplies every budget for slow machines; the forbidden-module checks do not
+depend on the machine. Exits with status 1 if any check fails.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+# module -> (budget in ms, modules it must not pull in at import)
+BUDGETS = {
+    "triage_calculator": (100, ["numpy", "matplotlib"]),
+    "scheduler": (150, ["numpy", "matplotlib"]),
+    "disease_predictor": (35, ["numpy", "joblib", "sklearn", "matplotlib", "pandas"]),
+    "scheduler_ga": (450, ["matplotlib"]),
+    "scheduler_nsga": (500, ["matplotlib"]),
+    "triage_queue": (250, ["matplotlib", "sklearn"]),
+}
+
+
+def measure(module, script_dir):
+    """(cumulative import time of module in ms, set of top-level packages imported)"""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=script_dir, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+
+    total_us, imported = None, set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        if not cumulative.strip().isdigit():
+            continue  # header line
+        name = name.strip()
+        imported.add(name.split(".")[0])
+        if name == module:
+            total_us = int(cumulative)
+    if total_us is None:
+        raise RuntimeError(f"no importtime entry for {module}")
+    return total_us / 1000.0, imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check entry point import times against their budgets")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per module; the fastest one counts")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply all budgets (slow machines)")
+    parser.add_argument("modules", nargs="*", help="subset of modules to check")
+    args = parser.parse_args()
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    failures = 0
+    for module in args.modules or BUDGETS:
+        budget, forbidden = BUDGETS[module]
+        budget *= args.scale
+        runs = [measure(module, script_dir) for _ in range(max(1, args.repeat))]
+        best = min(ms for ms, _ in runs)
+        heavy = sorted(set(forbidden) & runs[0][1])
+
+        ok = best <= budget and not heavy
+        failures += not ok
+        note = f"  imports {', '.join(heavy)}" if heavy else ""
+        print(f"{'OK  ' if ok else 'FAIL'} {module:20s} {best:8.1f} ms  (budget {budget:.0f} ms){note}")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
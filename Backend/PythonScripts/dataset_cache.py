@@ -0,0 +1,190 @@
+"""
+Preprocessed, memory-mapped copy of the symptom dataset.
+
+train_disease_model.py used to re-parse dataset.csv and the three info CSVs with pandas
+and rebuild the binary symptom matrix row by row on every run. build() does that once
+and stores the result in dataset_cache/:
+
+    features.npy   uint8 (rows x symptoms) binary symptom matrix
+    labels.npy     int32 disease code per row (index into meta["diseases"], which is
+                   sorted, so codes equal LabelEncoder's)
+    meta.json      symptom vocabulary, disease names, severity / description /
+                   precaution tables and the sha256 of every source CSV
+
+load() memory-maps the arrays and rebuilds the cache first whenever a source checksum
+no longer matches (or the cache is missing or from an older CACHE_VERSION). meta.json is
+written last, so an interrupted build is simply rebuilt next time.
+
+    python dataset_cache.py [--rebuild]
+"""
+
+import hashlib
+import json
+import os
+import sys
+import numpy as np
+
+from result_writer import atomic_open, write_json
+
+CACHE_VERSION = 1
+SOURCES = {
+    "dataset": "dataset.csv",
+    "severity": "Symptom-severity.csv",
+    "descriptions": "symptom_Description.csv",
+    "precautions": "symptom_precaution.csv",
+}
+
+
+class Dataset:
+    """features / labels arrays (memory-mapped) plus the metadata tables"""
+
+    def __init__(self, features, labels, meta):
+        self.features = features
+        self.labels = labels
+        self.meta = meta
+        self.symptoms = meta["symptoms"]
+        self.diseases = meta["diseases"]
+        self.severity = meta["severity"]
+        self.descriptions = meta["descriptions"]
+        self.precautions = meta["precautions"]
+
+
+def script_folder():
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+def cache_folder(data_dir=None):
+    return os.path.join(data_dir or script_folder(), "dataset_cache")
+
+
+def source_checksums(data_dir=None):
+    data_dir = data_dir or script_folder()
+    sums = {}
+    for key, name in SOURCES.items():
+        h = hashlib.sha256()
+        try:
+            with open(os.path.join(data_dir, name), "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    h.update(block)
+            sums[key] = h.hexdigest()
+        except OSError:
+            sums[key] = None  # optional files may be missing
+    return sums
+
+
+def _read_optional_csv(path):
+    import pandas as pd
+    try:
+        return pd.read_csv(path)
+    except Exception:
+        return None
+
+
+def build(data_dir=None):
+    """Parse the CSVs once and write the cache; returns the metadata"""
+    import pandas as pd
+    data_dir = data_dir or script_folder()
+    checksums = source_checksums(data_dir)
+
+    df = pd.read_csv(os.path.join(data_dir, SOURCES["dataset"]))
+    symptom_cols = [col for col in df.columns if col.startswith('Symptom_')]
+
+    # vocabulary and binary matrix, same rules as the original row-by-row loop
+    cells = df[symptom_cols].to_numpy(dtype=object)
+    present = pd.notna(cells)
+    stripped = np.full(cells.shape, "", dtype=object)
+    stripped[present] = [str(s).strip() for s in cells[present]]
+    symptoms = sorted(set(stripped[present].tolist()) - {""})
+    column_of = {s: j for j, s in enumerate(symptoms)}
+
+    rows, cols = np.nonzero(present & (stripped != ""))
+    features = np.zeros((len(df), len(symptoms)), dtype=np.uint8)
+    features[rows, [column_of[s] for s in stripped[rows, cols]]] = 1
+
+    diseases, labels = np.unique(df['Disease'].to_numpy(dtype=object).astype(str), return_inverse=True)
+
+    severity, descriptions, precautions = {}, {}, {}
+    severity_df = _read_optional_csv(os.path.join(data_dir, SOURCES["severity"]))
+    if severity_df is not None:
+        severity = dict(zip(severity_df['Symptom'], severity_df['weight'].tolist()))
+    desc_df = _read_optional_csv(os.path.join(data_dir, SOURCES["descriptions"]))
+    if desc_df is not None:
+        descriptions = dict(zip(desc_df['Disease'], desc_df['Description']))
+    precaution_df = _read_optional_csv(os.path.join(data_dir, SOURCES["precautions"]))
+    if precaution_df is not None:
+        for _, row in precaution_df.iterrows():
+            precautions[row['Disease']] = [row[f'Precaution_{i}'] for i in range(1, 5)
+                                           if pd.notna(row.get(f'Precaution_{i}'))]
+
+    folder = cache_folder(data_dir)
+    os.makedirs(folder, exist_ok=True)
+    with atomic_open(os.path.join(folder, "features.npy"), "wb") as f:
+        np.save(f, features)
+    with atomic_open(os.path.join(folder, "labels.npy"), "wb") as f:
+        np.save(f, labels.astype(np.int32))
+
+    meta = {
+        "version": CACHE_VERSION,
+        "sources": checksums,
+        "rows": int(len(df)),
+        "symptoms": symptoms,
+        "diseases": diseases.tolist(),
+        "severity": severity,
+        "descriptions": descriptions,
+        "precautions": precautions,
+    }
+    write_json(os.path.join(folder, "meta.json"), meta)
+    return meta
+
+
+def _read_meta(folder):
+    try:
+        with open(os.path.join(folder, "meta.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def is_fresh(meta, data_dir=None):
+    return (meta is not None and meta.get("version") == CACHE_VERSION
+            and meta.get("sources") == source_checksums(data_dir))
+
+
+def load(data_dir=None, mmap=True, rebuild=False):
+    """The preprocessed dataset, rebuilt first if the sources changed"""
+    folder = cache_folder(data_dir)
+    meta = None if rebuild else _read_meta(folder)
+    if not is_fresh(meta, data_dir):
+        print("DEBUG: Building preprocessed dataset cache", file=sys.stderr)
+        meta = build(data_dir)
+
+    mode = "r" if mmap else None
+    try:
+        features = np.load(os.path.join(folder, "features.npy"), mmap_mode=mode)
+        labels = np.load(os.path.join(folder, "labels.npy"), mmap_mode=mode)
+    except (OSError, ValueError):
+        # arrays missing or torn although meta.json is current: rebuild once
+        meta = build(data_dir)
+        features = np.load(os.path.join(folder, "features.npy"), mmap_mode=mode)
+        labels = np.load(os.path.join(folder, "labels.npy"), mmap_mode=mode)
+    if features.shape != (meta["rows"], len(meta["symptoms"])) or labels.shape != (meta["rows"],):
+        return load(data_dir, mmap, rebuild=True)
+    return Dataset(features, labels, meta)
+
+
+def main():
+    import argparse
+    import time
+    parser = argparse.ArgumentParser(description="Build / inspect the preprocessed symptom dataset cache")
+    parser.add_argument("--rebuild", action="store_true", help="rebuild even if the sources are unchanged")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    data = load(rebuild=args.rebuild)
+    elapsed = time.perf_counter() - start
+    print(f"{data.features.shape[0]} rows, {len(data.symptoms)} symptoms, {len(data.diseases)} diseases "
+          f"({elapsed * 1000:.1f} ms) in {cache_folder()}")
+
+
+if __name__ == "__main__":
+    main()
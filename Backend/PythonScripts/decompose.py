@@ -0,0 +1,282 @@
+"""
+Problem decomposition for large scheduling inputs.
+
+Patients only compete with each other for the doctors that can treat them, so the
+patient -> doctor compatibility graph (SchedulingProblem's per-disease candidate lists)
+falls apart into connected components: with the default SPECIALTY_CONDITIONS, for
+example, Pediatrics / General patients never touch the Cardiology / Neurology /
+Orthopedics / Emergency doctors. Beds are numbered by patient position, which the merge
+keeps, so they do not couple the components either.
+
+components() finds the components, solve() schedules each one as its own smaller input
+with the chosen engine and merges the assignments back into one genome:
+
+    greedy   scheduler.greedy_schedule on the component
+    ga       scheduler_ga.search on the component (a much smaller search space per run)
+    exact    best assignment over every combination of compatible doctors, when there are
+             at most EXACT_LIMIT of them; larger components fall back to the GA
+
+Components are packed into one bundle per worker (largest first) and solved in a process
+pool, so inputs with several sizeable components scale with the cores. Patients no
+doctor is compatible with are referrals and are not sent to any engine.
+
+Within a component the doctors keep their roster order, so the seniority bonus (by
+position) goes to the first doctors listed in that component, and load balance is
+measured among the component's own doctors.
+
+Enabled from input.json with "Decompose": true ("DecomposeEngine", "DecomposeWorkers"),
+or run directly: python decompose.py [input.json] [--engine ga] [--workers 4]
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+import numpy as np
+
+from scheduling_problem import SchedulingProblem
+from instrumentation import span, emit
+
+ENGINES = ("greedy", "ga", "exact")
+# largest number of assignments the exact engine enumerates for one component
+EXACT_LIMIT = 50000
+EXACT_CHUNK = 4096
+# below this many patients a process pool costs more than it saves
+POOL_MIN_PATIENTS = 500
+
+
+def components(problem):
+    """Connected components of the compatibility graph.
+
+    Returns ([(patient indices, doctor indices), ...] ordered by first patient, the
+    indices of the patients without any compatible doctor).
+    """
+    n_codes = len(problem.disease_names)
+    parent = list(range(n_codes + problem.doctors))
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    # diseases and doctors are the nodes; patients hang off their disease
+    for c in range(n_codes):
+        for d in problem.cand_indices[problem.cand_indptr[c]:problem.cand_indptr[c + 1]].tolist():
+            a, b = find(c), find(n_codes + d)
+            if a != b:
+                parent[b] = a
+
+    code_root = np.array([find(c) for c in range(n_codes)], dtype=np.int64)
+    patient_root = code_root[problem.disease_code] if problem.patients else np.zeros(0, dtype=np.int64)
+    matched = problem.cand_count > 0
+    doctor_root = np.array([find(n_codes + d) for d in range(problem.doctors)], dtype=np.int64)
+
+    groups = []
+    for root in dict.fromkeys(patient_root[matched].tolist()):
+        groups.append((np.flatnonzero(matched & (patient_root == root)), np.flatnonzero(doctor_root == root)))
+    return groups, np.flatnonzero(~matched)
+
+
+def sub_input(input_data, problem, patient_idx, doctor_idx):
+    """input.json-shaped dict holding only one component's patients and doctors"""
+    roster = problem.roster
+    doctor_details = [{"Name": roster.doctor_names[d], "Specialty": roster.specialty(d)} for d in doctor_idx.tolist()]
+    patient_details = [{"Name": roster.patient_names[i], "Disease": roster.disease(i)} for i in patient_idx.tolist()]
+    sub = {key: value for key, value in input_data.items()
+           if key not in ("Doctors", "Patients", "Urgency", "DoctorDetails", "PatientDetails")}
+    sub.update({
+        "Doctors": len(doctor_idx),
+        "Patients": len(patient_idx),
+        "Beds": problem.beds,
+        "Urgency": [problem.urgency_list[i] for i in patient_idx.tolist()],
+        "DoctorDetails": doctor_details,
+        "PatientDetails": patient_details,
+    })
+    return sub
+
+
+def solve_exact(problem, limit=EXACT_LIMIT):
+    """(best genome, fitness) over all compatible assignments, or None if there are more than limit"""
+    counts = problem.cand_count
+    space = math.prod(counts.tolist())
+    if space > limit or np.any(counts == 0):
+        return None
+    best, best_fit = None, -np.inf
+    for start in range(0, space, EXACT_CHUNK):
+        # mixed-radix digits of the combination number pick each patient's candidate
+        rest = np.arange(start, min(start + EXACT_CHUNK, space), dtype=np.int64)
+        genomes = np.empty((len(rest), problem.patients), dtype=np.int64)
+        for i in range(problem.patients):
+            genomes[:, i] = problem.cand_indices[problem.cand_start[i] + rest % counts[i]]
+            rest //= counts[i]
+        fit = problem.fitness(genomes)
+        k = int(np.argmax(fit))
+        if fit[k] > best_fit:
+            best, best_fit = genomes[k].copy(), float(fit[k])
+    return best, best_fit
+
+
+def solve_component(sub, engine, options):
+    """Local genome (component doctor index or -1 per component patient) and stats"""
+    started = time.perf_counter()
+    problem = SchedulingProblem(sub)
+    used = engine
+    genome = None
+    if engine == "exact":
+        found = solve_exact(problem)
+        if found is not None:
+            genome = found[0]
+        else:
+            used = "ga"
+    if engine == "greedy":
+        from scheduler import greedy_schedule
+        _, assignments, _ = greedy_schedule(problem.doctors, problem.patients, problem.beds, problem.urgency_list,
+                                            sub["DoctorDetails"], sub["PatientDetails"], problem.roster)
+        genome = np.array(assignments, dtype=np.int64)
+    elif used == "ga":
+        import scheduler_ga
+        result = scheduler_ga.search(problem, sub, options["population"], options["generations"],
+                                     options["mutation"], options["seed"], options["local_search"],
+                                     options["local_search_time"], memo_size=options["memo_size"])
+        genome = np.asarray(result["best_individual"], dtype=np.int64)
+    return genome, {"patients": problem.patients, "doctors": problem.doctors, "engine": used,
+                    "fitness": float(problem.fitness(genome)[0]), "seconds": time.perf_counter() - started}
+
+
+def _solve_bundle(args):
+    # process pool task: several components solved one after another
+    engine, options, bundle = args
+    results = []
+    for k, sub in bundle:
+        seeded = dict(options)
+        # per-component stream, independent of how the components were bundled
+        if options["seed"] is not None:
+            seeded["seed"] = f"{options['seed']}/component-{k}"
+        with span("decompose.component", component=k, patients=sub["Patients"], doctors=sub["Doctors"]):
+            results.append((k,) + solve_component(sub, engine, seeded))
+    return results
+
+
+def pack(sizes, n_bundles):
+    """Component indices split into n_bundles lists of similar total size (largest first)"""
+    bundles = [[] for _ in range(max(1, n_bundles))]
+    totals = [0] * len(bundles)
+    for k in sorted(range(len(sizes)), key=lambda k: -sizes[k]):
+        lightest = totals.index(min(totals))
+        bundles[lightest].append(k)
+        totals[lightest] += sizes[k]
+    return [b for b in bundles if b]
+
+
+def ga_options(input_data):
+    # the GA settings scheduler.run_ga_engine reads, applied to every component
+    from scheduler_ga import DEFAULT_MEMO_SIZE
+    return {
+        "population": int(input_data.get("GAPopulation", 80)),
+        "generations": int(input_data.get("GAGenerations", 120)),
+        "mutation": float(input_data.get("GAMutation", 0.06)),
+        "seed": input_data.get("GASeed", None),
+        "local_search": input_data.get("GALocalSearch", None),
+        "local_search_time": float(input_data.get("GALocalSearchTime", 1.0)),
+        "memo_size": int(input_data.get("GAFitnessMemo", DEFAULT_MEMO_SIZE)),
+    }
+
+
+def solve(input_data, engine="greedy", workers=1, roster=None):
+    """Schedule every component and merge; returns (global genome, problem, stats dict)"""
+    if engine not in ENGINES:
+        raise ValueError(f"unknown engine {engine!r}, expected one of {', '.join(ENGINES)}")
+    problem = SchedulingProblem(input_data, roster=roster)
+    with span("decompose.components", patients=problem.patients, doctors=problem.doctors):
+        groups, unmatched = components(problem)
+    subs = [sub_input(input_data, problem, patients, doctors) for patients, doctors in groups]
+    options = ga_options(input_data)
+
+    sizes = [len(patients) for patients, _ in groups]
+    workers = max(1, min(int(workers), len(groups)))
+    # the greedy pass is cheaper than starting the pool and shipping the components to it
+    if engine == "greedy" or sum(sizes) < POOL_MIN_PATIENTS:
+        workers = 1
+    bundles = [[(k, subs[k]) for k in bundle] for bundle in pack(sizes, workers)]
+
+    started = time.perf_counter()
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            solved = [r for results in pool.map(_solve_bundle, [(engine, options, b) for b in bundles]) for r in results]
+    else:
+        solved = [r for b in bundles for r in _solve_bundle((engine, options, b))]
+    elapsed = time.perf_counter() - started
+
+    genome = np.full(problem.patients, -1, dtype=np.int64)
+    component_stats = [None] * len(groups)
+    for k, local, stats in solved:
+        patients, doctors = groups[k]
+        genome[patients] = np.where(local >= 0, doctors[np.maximum(local, 0)], -1)
+        component_stats[k] = stats
+
+    stats = {
+        "components": len(groups),
+        "largest_component": max(sizes, default=0),
+        "unmatched": len(unmatched),
+        "workers": workers,
+        "engine": engine,
+        "seconds": elapsed,
+        "fitness": float(problem.fitness(genome)[0]) if problem.patients else 0.0,
+        "per_component": component_stats,
+    }
+    emit("decompose.summary", **{k: v for k, v in stats.items() if k != "per_component"})
+    return genome, problem, stats
+
+
+def run_decomposed(input_data, results_folder, engine="greedy", workers=1, roster=None):
+    """Solve by components and write output.json, convergence.png and metrics.csv; returns the schedule"""
+    import scheduler_ga
+    from result_writer import write_json
+    from scheduler import save_convergence_graph
+
+    genome, problem, stats = solve(input_data, engine, workers, roster)
+    schedule = scheduler_ga.build_schedule(genome.tolist(), problem.patient_details, problem.doctor_details,
+                                           problem.urgency_list, problem.beds, problem.roster)
+    write_json(os.path.join(results_folder, "output.json"), schedule)
+    save_convergence_graph(schedule, results_folder)
+
+    engines = sorted({s["engine"] for s in stats["per_component"]})
+    scheduler_ga.write_metrics(
+        os.path.join(results_folder, "metrics.csv"), schedule, f"Decomposed ({' + '.join(engines) or engine})",
+        problem.doctors, problem.patients, problem.beds, problem.urgency_list, [
+            ('Best Fitness', round(stats["fitness"], 3)),
+            ('Components', stats["components"]),
+            ('Largest Component (patients)', stats["largest_component"]),
+            ('Decomposition Workers', stats["workers"]),
+            ('Solve Time (s)', round(stats["seconds"], 3)),
+        ])
+    print(f"DEBUG: Decomposed into {stats['components']} components "
+          f"(largest {stats['largest_component']} patients, {stats['unmatched']} without a compatible doctor), "
+          f"solved with {stats['workers']} workers in {stats['seconds']:.2f} s", file=sys.stderr)
+    return schedule
+
+
+def main():
+    cur = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Schedule each connected component of the patient-doctor graph separately")
+    parser.add_argument("input", nargs="?", default=os.path.join(cur, "input.json"))
+    parser.add_argument("--engine", choices=ENGINES, default="greedy")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    with open(args.input) as f:
+        data = json.load(f)
+    genome, problem, stats = solve(data, args.engine, args.workers)
+    for k, s in enumerate(stats["per_component"]):
+        print(f"component {k}: {s['patients']} patients, {s['doctors']} doctors, {s['engine']}, "
+              f"fitness {s['fitness']:.1f}, {s['seconds']:.2f} s")
+    print(f"{stats['components']} components, {stats['unmatched']} referrals, merged fitness {stats['fitness']:.1f}, "
+          f"{stats['seconds']:.2f} s with {stats['workers']} workers")
+
+
+if __name__ == "__main__":
+    main()
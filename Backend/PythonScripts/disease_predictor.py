@@ -1,43 +1,157 @@
+import io
 import json
 import sys
 import os
-import numpy as np
-import joblib
-from collections import Counter
+import threading
+
+from instrumentation import span
+
+class ModelBundle:
+    """One consistent set of model artifacts; never modified after loading
+    (except symptom_index, built once on first use when the bundle has none)"""
+    
+    def __init__(self, version, model, label_encoder, symptom_columns, disease_info, column_index,
+                 symptom_index=None):
+        self.version = version
+        self.model = model
+        self.label_encoder = label_encoder
+        self.symptom_columns = symptom_columns
+        self.disease_info = disease_info
+        self.column_index = column_index
+        self.symptom_index = symptom_index
 
 class DiseasePredictorSystem:
     def __init__(self):
-        self.model = None
-        self.label_encoder = None
-        self.symptom_columns = None
-        self.disease_info = None
+        self.bundle = None
+        self.reload_error = None
+        self._reload_lock = threading.Lock()
+        self._reload_thread = None
         self.load_model()
     
+    # The loaded artifacts live in one ModelBundle. predict() takes self.bundle once and
+    # uses only that object, so reload() can swap in a new bundle (a single reference
+    # assignment) while predictions are running: they finish on the bundle they started with.
+    @property
+    def model(self):
+        return self.bundle.model
+    
+    @property
+    def label_encoder(self):
+        return self.bundle.label_encoder
+    
+    @property
+    def symptom_columns(self):
+        return self.bundle.symptom_columns
+    
+    @property
+    def disease_info(self):
+        return self.bundle.disease_info
+    
+    @property
+    def model_version(self):
+        return self.bundle.version
+    
     def load_model(self):
         """Load trained model and metadata"""
         try:
-            script_dir = os.path.dirname(os.path.abspath(__file__))
+            self.bundle = self.load_bundle()
+        except Exception as e:
+            raise Exception(f"Failed to load model: {e}")
+    
+    def load_bundle(self):
+        """Read and validate the live artifact bundle without touching self.bundle"""
+        # joblib (and sklearn and numpy, on unpickling) are imported only here: the UI
+        # starts a fresh interpreter per prediction, so module import time is response time
+        import joblib
+        import model_store
+        from symptom_index import INDEX_FILE, SymptomIndex
+        with span("predictor.load_model"):
+            # Live version from models/current.json, else the flat files written by
+            # train_disease_model.py (no manifest: only the consistency checks below)
+            version, folder = model_store.resolve()
+            manifest = model_store.read_manifest(folder) if version else None
             
-            # Load model
-            model_path = os.path.join(script_dir, 'disease_model.pkl')
-            self.model = joblib.load(model_path)
+            # Read each file once; the bytes checked against the manifest are the bytes loaded
+            data = {}
+            for name in model_store.ARTIFACTS:
+                with open(os.path.join(folder, name), 'rb') as f:
+                    data[name] = f.read()
+                if manifest is not None:
+                    model_store.check(manifest, name, data[name])
             
-            # Load label encoder
-            encoder_path = os.path.join(script_dir, 'label_encoder.pkl')
-            self.label_encoder = joblib.load(encoder_path)
+            model = joblib.load(io.BytesIO(data['disease_model.pkl']))
+            label_encoder = joblib.load(io.BytesIO(data['label_encoder.pkl']))
+            symptom_columns = json.loads(data['symptom_columns.json'])
+            disease_info = json.loads(data['disease_info.json'])
             
-            # Load symptom columns
-            symptoms_path = os.path.join(script_dir, 'symptom_columns.json')
-            with open(symptoms_path, 'r') as f:
-                self.symptom_columns = json.load(f)
+            # The four files must describe the same model
+            n_features = getattr(model, 'n_features_in_', len(symptom_columns))
+            if n_features != len(symptom_columns):
+                raise ValueError(f"model expects {n_features} symptoms, symptom_columns.json lists {len(symptom_columns)}")
+            if len(model.classes_) != len(label_encoder.classes_):
+                raise ValueError(f"model has {len(model.classes_)} classes, label encoder {len(label_encoder.classes_)}")
+            if disease_info.get('diseases', list(label_encoder.classes_)) != list(label_encoder.classes_):
+                raise ValueError("disease_info.json lists different diseases than the label encoder")
             
-            # Load disease info
-            info_path = os.path.join(script_dir, 'disease_info.json')
-            with open(info_path, 'r') as f:
-                self.disease_info = json.load(f)
+            # Optional "next symptom to ask" index (older bundles don't have one)
+            symptom_index = None
+            index_path = os.path.join(folder, INDEX_FILE)
+            if os.path.exists(index_path):
+                with open(index_path, 'rb') as f:
+                    index_data = f.read()
+                if manifest is not None and INDEX_FILE in manifest.get('files', {}):
+                    model_store.check(manifest, INDEX_FILE, index_data)
+                symptom_index = SymptomIndex.load(io.BytesIO(index_data))
+                if not self._index_matches(symptom_index, symptom_columns, label_encoder):
+                    print(f"DEBUG: Ignoring stale {INDEX_FILE}", file=sys.stderr)
+                    symptom_index = None
             
+            column_index = {}
+            for i, symptom in enumerate(symptom_columns):
+                column_index.setdefault(self.normalize_symptom(symptom), []).append(i)
+            return ModelBundle(version, model, label_encoder, symptom_columns, disease_info, column_index,
+                               symptom_index)
+    
+    @staticmethod
+    def _index_matches(symptom_index, symptom_columns, label_encoder):
+        return (symptom_index.symptoms == list(symptom_columns)
+                and symptom_index.diseases == list(label_encoder.classes_))
+    
+    def reload(self, wait=False):
+        """Load the live bundle in a background thread and swap it in once it is valid.
+        
+        Predictions keep running on the current bundle meanwhile; if the new one fails to
+        load or validate, the current one stays (the error is kept in reload_error).
+        Returns the loader thread.
+        """
+        with self._reload_lock:
+            thread = self._reload_thread
+            if thread is None or not thread.is_alive():
+                thread = threading.Thread(target=self._reload, name="model-reload", daemon=True)
+                self._reload_thread = thread
+                thread.start()
+        if wait:
+            thread.join()
+        return thread
+    
+    def _reload(self):
+        try:
+            bundle = self.load_bundle()
         except Exception as e:
-            raise Exception(f"Failed to load model: {e}")
+            self.reload_error = str(e)
+            print(f"DEBUG: Model reload failed, keeping {self.model_version or 'the current model'}: {e}",
+                  file=sys.stderr)
+            return
+        self.reload_error = None
+        self.bundle = bundle
+    
+    def reload_if_changed(self, wait=False):
+        """reload() when a newer model version has been published; True if one was started"""
+        import model_store
+        if model_store.current_version() == self.model_version:
+            return False
+        self.reload(wait)
+        return True
     
     def normalize_symptom(self, symptom):
         """Normalize symptom name for matching"""
@@ -45,26 +159,29 @@ class DiseasePredictorSystem:
         normalized = symptom.lower().replace(' ', '_').replace('-', '_')
         return normalized
     
-    def match_symptoms(self, user_symptoms):
+    def match_symptoms(self, user_symptoms, bundle=None):
         """Match user symptoms to dataset symptom names"""
+        bundle = bundle or self.bundle
         matched_symptoms = []
         
         # Normalize user symptoms
         normalized_user = [self.normalize_symptom(s) for s in user_symptoms]
         
         # Try to match with dataset symptoms
-        for symptom in self.symptom_columns:
+        for symptom in bundle.symptom_columns:
             normalized_col = self.normalize_symptom(symptom)
             if normalized_col in normalized_user:
                 matched_symptoms.append(symptom)
         
         return matched_symptoms
     
-    def create_feature_vector(self, symptoms):
+    def create_feature_vector(self, symptoms, bundle=None):
         """Create feature vector from symptoms"""
-        feature_vector = np.zeros(len(self.symptom_columns))
+        import numpy as np  # already loaded with the model
+        bundle = bundle or self.bundle
+        feature_vector = np.zeros(len(bundle.symptom_columns))
         
-        for i, symptom in enumerate(self.symptom_columns):
+        for i, symptom in enumerate(bundle.symptom_columns):
             if symptom in symptoms:
                 feature_vector[i] = 1
         
@@ -75,29 +192,119 @@ class DiseasePredictorSystem:
         if not symptoms:
             return self.get_error_result("No symptoms provided")
         
+        # One bundle for the whole prediction, even if reload() swaps it meanwhile
+        bundle = self.bundle
+        
         # Match symptoms to dataset
-        matched_symptoms = self.match_symptoms(symptoms)
+        matched_symptoms = self.match_symptoms(symptoms, bundle)
         
         if not matched_symptoms:
             return self.get_error_result("No matching symptoms found in database")
         
-        # Create feature vector
-        feature_vector = self.create_feature_vector(matched_symptoms)
+        with span("predictor.predict", symptoms=len(matched_symptoms)):
+            # Create feature vector
+            feature_vector = self.create_feature_vector(matched_symptoms, bundle)
+            
+            # Get predictions with probabilities
+            prediction = bundle.model.predict(feature_vector)[0]
+            probabilities = bundle.model.predict_proba(feature_vector)[0]
+            
+            return self.build_result(matched_symptoms, prediction, probabilities, bundle)
+    
+    def predict_batch(self, symptom_lists):
+        """Predict many patients with one model call.
+        
+        Same results as [self.predict(s) for s in symptom_lists], but the feature rows
+        are filled through a symptom -> column index and the forest is evaluated once
+        for the whole batch instead of once per patient.
+        """
+        results = [None] * len(symptom_lists)
+        bundle = self.bundle
+        column_index = bundle.column_index
+        
+        rows, matched_lists = [], []
+        for k, symptoms in enumerate(symptom_lists):
+            if not symptoms:
+                results[k] = self.get_error_result("No symptoms provided")
+                continue
+            cols = sorted({c for s in symptoms for c in column_index.get(self.normalize_symptom(s), ())})
+            if not cols:
+                results[k] = self.get_error_result("No matching symptoms found in database")
+                continue
+            rows.append(k)
+            matched_lists.append(cols)
         
-        # Get predictions with probabilities
-        prediction = self.model.predict(feature_vector)[0]
-        probabilities = self.model.predict_proba(feature_vector)[0]
+        if not rows:
+            return results
+        
+        import numpy as np
+        with span("predictor.predict_batch", records=len(symptom_lists), predicted=len(rows)):
+            features = np.zeros((len(rows), len(bundle.symptom_columns)))
+            for r, cols in enumerate(matched_lists):
+                features[r, cols] = 1
+            predictions = bundle.model.predict(features)
+            probabilities = bundle.model.predict_proba(features)
+            for r, k in enumerate(rows):
+                matched = [bundle.symptom_columns[c] for c in matched_lists[r]]
+                results[k] = self.build_result(matched, predictions[r], probabilities[r], bundle)
+        return results
+    
+    def suggest_symptoms(self, symptoms, k=3, top_diseases=5, denied=None):
+        """The k unasked symptoms that best separate the top candidate diseases.
+        
+        symptoms are the ones the patient reported, denied the ones they said no to.
+        Symptoms are ranked by expected information gain over the top_diseases most likely
+        diseases, computed from the precomputed disease x symptom index (no model calls).
+        """
+        bundle = self.bundle
+        index = bundle.symptom_index
+        if index is None:
+            # Bundle without an index (trained before it existed): build it from the dataset
+            from symptom_index import SymptomIndex
+            index = SymptomIndex.from_dataset()
+            if not self._index_matches(index, bundle.symptom_columns, bundle.label_encoder):
+                return self.get_error_result("Symptom index not available, retrain the model")
+            bundle.symptom_index = index
+        
+        with span("predictor.suggest_symptoms"):
+            def columns(names):
+                return sorted({c for s in names or () for c in bundle.column_index.get(self.normalize_symptom(s), ())})
+            present, absent = columns(symptoms), columns(denied)
+            questions, candidates = index.suggest(present, absent, k, top_diseases)
+            
+            return {
+                "success": True,
+                "matched_symptoms": [bundle.symptom_columns[c] for c in present],
+                "suggestions": [{
+                    "symptom": bundle.symptom_columns[c],
+                    "information_gain": round(gain, 4),
+                    "probability_yes": round(p_yes * 100, 1)
+                } for c, gain, p_yes in questions],
+                "candidates": [{
+                    "disease": index.diseases[d],
+                    "probability": round(p * 100, 1)
+                } for d, p in candidates]
+            }
+    
+    def get_column_index(self):
+        """Normalized symptom name -> feature columns (built with the bundle)"""
+        return self.bundle.column_index
+    
+    def build_result(self, matched_symptoms, prediction, probabilities, bundle=None):
+        """Result dict for one patient from the model's class index and probabilities"""
+        bundle = bundle or self.bundle
         
         # Get disease name
-        disease = self.label_encoder.inverse_transform([prediction])[0]
+        disease = bundle.label_encoder.inverse_transform([prediction])[0]
         confidence = probabilities[prediction] * 100
         
         # Get top 5 predictions
+        import numpy as np
         top_indices = np.argsort(probabilities)[::-1][:5]
         other_predictions = []
         
         for idx in top_indices[1:]:  # Skip first (already got it)
-            other_disease = self.label_encoder.inverse_transform([idx])[0]
+            other_disease = bundle.label_encoder.inverse_transform([idx])[0]
             other_prob = probabilities[idx] * 100
             if other_prob > 1:  # Only show if probability > 1%
                 other_predictions.append({
@@ -106,15 +313,15 @@ class DiseasePredictorSystem:
                 })
         
         # Get disease details
-        description = self.disease_info.get('descriptions', {}).get(disease, "No description available")
-        precautions = self.disease_info.get('precautions', {}).get(disease, [])
+        description = bundle.disease_info.get('descriptions', {}).get(disease, "No description available")
+        precautions = bundle.disease_info.get('precautions', {}).get(disease, [])
         
         # Map to specialist
         specialist = self.get_specialist(disease)
         department = self.get_department(disease)
         
         # Calculate severity score
-        severity_score = self.calculate_severity(matched_symptoms)
+        severity_score = self.calculate_severity(matched_symptoms, bundle)
         
         return {
             "success": True,
@@ -130,9 +337,9 @@ class DiseasePredictorSystem:
             "other_predictions": other_predictions
         }
     
-    def calculate_severity(self, symptoms):
+    def calculate_severity(self, symptoms, bundle=None):
         """Calculate severity score based on symptoms"""
-        severity_map = self.disease_info.get('severity', {})
+        severity_map = (bundle or self.bundle).disease_info.get('severity', {})
         total_severity = 0
         
         for symptom in symptoms:
@@ -296,4 +503,7 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # --profile / MEDIMATCH_PROFILE=cprofile|sample writes a profile to Results/profiles/
+    from profiling import profiled
+    with profiled("disease_predictor"):
+        main()
\ No newline at end of file
@@ -0,0 +1,187 @@
+"""
+Compact, quantized copy of the disease random forest.
+
+A fitted RandomForestClassifier keeps a float64 (n_nodes x n_classes) value array in
+every tree, for internal nodes as well as leaves; with 200 depth-20 trees over 41
+diseases that dominates the pickle and the memory of every predictor process.
+QuantizedForest keeps only what prediction needs:
+
+    feature / threshold / left / right   one flat array each for all trees' nodes
+                                         (int16 / float32 / int32 / int32)
+    leaf                                 node -> row of the leaf tables (-1 = internal);
+                                         a leaf's left / right point back to itself
+    leaf_values                          uint8 (n_leaves x n_classes) class distribution,
+    leaf_scale                           float32 per leaf: p = leaf_values * leaf_scale
+
+Each leaf distribution is scaled so its largest probability maps to 255, so every
+stored probability is within leaf_scale / 2 <= 1 / 510 of the original, and so is the
+forest average (which is therefore not renormalized). predict / predict_proba have the
+sklearn signatures the predictor uses and walk all trees at once, one vectorized step
+per tree level. That makes a single prediction several times faster than sklearn's
+per-tree calls; very large batches are slower than sklearn's compiled traversal, the
+price of the smaller model.
+
+    python train_disease_model.py --quantize     save the quantized model as disease_model.pkl
+    python forest_quant.py [forest.pkl]          compare a saved forest with its quantized copy
+"""
+
+import argparse
+import io
+import os
+import sys
+import numpy as np
+
+LEVELS = 255
+# worst case of the rounding error per probability (half a quantization step at scale 1/255)
+ERROR_BOUND = 0.5 / LEVELS
+
+
+class QuantizedForest:
+    def __init__(self, forest):
+        features, thresholds, lefts, rights, leaf_rows, values = [], [], [], [], [], []
+        roots, offset, n_leaves = [], 0, 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            is_leaf = tree.children_left < 0
+            roots.append(offset)
+            features.append(np.where(is_leaf, -1, tree.feature))
+            thresholds.append(tree.threshold)
+            # child indices become positions in the flat arrays; leaves point to themselves
+            own = np.arange(tree.node_count) + offset
+            lefts.append(np.where(is_leaf, own, tree.children_left + offset))
+            rights.append(np.where(is_leaf, own, tree.children_right + offset))
+            rows = np.full(tree.node_count, -1)
+            rows[is_leaf] = np.arange(is_leaf.sum()) + n_leaves
+            leaf_rows.append(rows)
+            values.append(tree.value[is_leaf, 0, :])
+            offset += tree.node_count
+            n_leaves += int(is_leaf.sum())
+
+        self.classes_ = np.asarray(forest.classes_)
+        self.n_features_in_ = forest.n_features_in_
+        self.roots = np.array(roots, dtype=np.int32)
+        self.feature = np.concatenate(features).astype(np.int16 if self.n_features_in_ < 2 ** 15 else np.int32)
+        self.threshold = np.concatenate(thresholds).astype(np.float32)
+        self.left = np.concatenate(lefts).astype(np.int32)
+        self.right = np.concatenate(rights).astype(np.int32)
+        self.leaf = np.concatenate(leaf_rows).astype(np.int32)
+
+        # leaf class distributions (value may hold weighted counts or fractions)
+        proba = np.concatenate(values)
+        proba = proba / proba.sum(axis=1, keepdims=True)
+        peak = proba.max(axis=1, keepdims=True)
+        self.leaf_scale = (peak / LEVELS).astype(np.float32).ravel()
+        self.leaf_values = np.rint(proba / peak * LEVELS).astype(np.uint8)
+        self._walk = None
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.roots, self.feature, self.threshold, self.left,
+                                      self.right, self.leaf, self.leaf_values, self.leaf_scale))
+
+    def _walk_arrays(self):
+        # index-typed working copies (int16 / int32 would be converted on every gather)
+        if self._walk is None:
+            children = np.stack([self.left, self.right], axis=1).ravel().astype(np.intp)
+            self._walk = (self.feature.astype(np.intp), children, self.roots.astype(np.intp))
+        return self._walk
+
+    def apply(self, X):
+        """(n_samples, n_trees) leaf rows reached by each sample in each tree"""
+        feature, children, roots = self._walk_arrays()
+        X = np.asarray(X, dtype=np.float32)
+        n_samples, n_features = X.shape
+        flat = X.ravel()
+
+        # one entry per (sample, tree); only the ones not yet at a leaf take the next step
+        nodes = np.tile(roots, n_samples)
+        row_start = np.repeat(np.arange(n_samples, dtype=np.intp) * n_features, len(roots))
+        active = np.flatnonzero(feature[nodes] >= 0)
+        while len(active):
+            current = nodes[active]
+            go_right = flat[row_start[active] + feature[current]] > self.threshold[current]
+            current = children[2 * current + go_right]
+            nodes[active] = current
+            active = active[feature[current] >= 0]
+        return self.leaf[nodes].reshape(n_samples, len(roots))
+
+    def predict_proba(self, X):
+        leaves = self.apply(X)
+        proba = np.zeros((leaves.shape[0], len(self.classes_)))
+        for t in range(leaves.shape[1]):
+            rows = leaves[:, t]
+            proba += self.leaf_values[rows] * self.leaf_scale[rows, None]
+        return proba / leaves.shape[1]
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_walk"] = None
+        return state
+
+
+def pickled_size(obj):
+    import joblib
+    buffer = io.BytesIO()
+    joblib.dump(obj, buffer)
+    return buffer.tell()
+
+
+def forest_nbytes(forest):
+    """Bytes of the arrays a fitted sklearn forest keeps per tree"""
+    total = 0
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        total += sum(a.nbytes for a in (tree.children_left, tree.children_right, tree.feature,
+                                        tree.threshold, tree.value, tree.impurity,
+                                        tree.n_node_samples, tree.weighted_n_node_samples))
+    return total
+
+
+def verify(forest, quantized, X):
+    """Compare the quantized forest with the original on X; returns a report dict"""
+    expected = forest.predict_proba(X)
+    actual = quantized.predict_proba(X)
+    error = float(np.abs(expected - actual).max())
+    return {
+        "samples": int(len(X)),
+        "max_probability_error": error,
+        "error_bound": ERROR_BOUND,
+        "within_bound": error <= ERROR_BOUND,
+        "same_prediction": float((np.argmax(expected, axis=1) == np.argmax(actual, axis=1)).mean()),
+        "forest_bytes": forest_nbytes(forest),
+        "quantized_bytes": quantized.nbytes,
+        "forest_pickle_bytes": pickled_size(forest),
+        "quantized_pickle_bytes": pickled_size(quantized),
+    }
+
+
+def print_report(report):
+    print(f" Quantized forest on {report['samples']} samples:")
+    print(f"   max probability error {report['max_probability_error']:.5f} "
+          f"(bound {report['error_bound']:.5f}), same top prediction {report['same_prediction'] * 100:.2f}%")
+    print(f"   arrays {report['forest_bytes'] / 1e6:.2f} MB -> {report['quantized_bytes'] / 1e6:.2f} MB, "
+          f"pickle {report['forest_pickle_bytes'] / 1e6:.2f} MB -> {report['quantized_pickle_bytes'] / 1e6:.2f} MB")
+
+
+def main():
+    import joblib
+    import dataset_cache
+    parser = argparse.ArgumentParser(description="Check the quantized copy of a trained random forest")
+    parser.add_argument("model", nargs="?", default=os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                                 "disease_model.pkl"))
+    args = parser.parse_args()
+
+    forest = joblib.load(args.model)
+    if isinstance(forest, QuantizedForest):
+        print("ERROR: the model is already quantized; pass the original random forest", file=sys.stderr)
+        sys.exit(1)
+    report = verify(forest, QuantizedForest(forest), dataset_cache.load().features)
+    print_report(report)
+    sys.exit(0 if report["within_bound"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Lightweight stage timing for the backend scripts.
+
+    with span("ga.generation", gen=g) as s:
+        ...
+        s.set(best=fitness)
+
+records one JSON line per span: stage name, start time, duration, the extra fields and
+the process's peak resident memory so far. Lines are appended to the file named by the
+MEDIMATCH_METRICS environment variable (any number of processes can share it).
+
+When MEDIMATCH_METRICS is not set, span() returns one shared do-nothing object, so an
+instrumented hot loop costs a function call and an attribute lookup per iteration.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+
+METRICS_ENV = "MEDIMATCH_METRICS"
+
+_path = os.environ.get(METRICS_ENV) or None
+_lock = threading.Lock()
+_file = None
+
+
+def enabled():
+    return _path is not None
+
+
+def configure(path):
+    """Send records to path (None disables); overrides MEDIMATCH_METRICS"""
+    global _path, _file
+    with _lock:
+        if _file is not None:
+            _file.close()
+            _file = None
+        _path = path or None
+
+
+def peak_rss_kb():
+    """Peak resident set size of this process in KiB, or None if unknown"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # bytes on macOS, KiB elsewhere
+        return peak // 1024 if sys.platform == "darwin" else peak
+    except ImportError:
+        pass
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                        ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        handle = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+            return counters.PeakWorkingSetSize // 1024
+    except Exception:
+        pass
+    return None
+
+
+def emit(stage, **fields):
+    """Write one record (no timing) if instrumentation is on"""
+    if _path is None:
+        return
+    record = {"stage": stage, "ts": round(time.time(), 6), "pid": os.getpid()}
+    record.update(fields)
+    record["peak_rss_kb"] = peak_rss_kb()
+    _write(record)
+
+
+def _write(record):
+    global _file
+    line = json.dumps(record, default=str) + "\n"
+    with _lock:
+        try:
+            if _file is None:
+                folder = os.path.dirname(os.path.abspath(_path))
+                os.makedirs(folder, exist_ok=True)
+                _file = open(_path, "a", buffering=1)
+            # one write per line, so records from several processes don't interleave
+            _file.write(line)
+        except OSError as e:
+            print(f"DEBUG: Could not write instrumentation record: {e}", file=sys.stderr)
+
+
+class _Span:
+    __slots__ = ("stage", "fields", "start", "start_ts")
+
+    def __init__(self, stage, fields):
+        self.stage = stage
+        self.fields = fields
+
+    def set(self, **fields):
+        self.fields.update(fields)
+
+    def __enter__(self):
+        self.start_ts = time.time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.start
+        record = {"stage": self.stage, "ts": round(self.start_ts, 6), "pid": os.getpid(),
+                  "duration_ms": round(duration * 1000.0, 3)}
+        record.update(self.fields)
+        if exc_type is not None:
+            record["error"] = exc_type.__name__
+        record["peak_rss_kb"] = peak_rss_kb()
+        _write(record)
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def set(self, **fields):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(stage, **fields):
+    """Context manager timing one stage; a shared no-op when instrumentation is off"""
+    if _path is None:
+        return _NO_SPAN
+    return _Span(stage, fields)
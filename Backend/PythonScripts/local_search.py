@@ -0,0 +1,320 @@
+"""
+Local-search refinement for schedules produced by the GA or the greedy scheduler.
+
+refine() improves an assignment vector under the same fitness as scheduler_ga
+using two neighbourhoods:
+  - single reassignment: move one patient to another doctor (or to referral)
+  - swap: exchange the doctors of two patients (doctor loads stay the same)
+
+Moves are scored by delta evaluation: the fitness is a sum of per-patient terms
+plus -2 * variance of the doctor loads, and the variance is tracked through the
+running sums of load and load^2, so a move costs O(1) (or O(D) / O(P) when all
+targets of one patient are scanned at once) instead of a full re-evaluation.
+
+method="hill" does steepest-descent passes until no move improves;
+method="anneal" runs simulated annealing with geometric cooling. Both stop at
+time_limit seconds.
+"""
+
+import json
+import math
+import os
+import sys
+import time
+import numpy as np
+
+from scheduling_problem import SchedulingProblem
+from result_writer import write_json
+
+
+class _State:
+    """Assignment vector plus the running sums needed for delta evaluation"""
+
+    def __init__(self, problem, individual):
+        self.problem = problem
+        self.D = problem.doctors
+        self.u = problem.urgency / 10.0
+        self.referral = np.where(problem.disease_exists, -20.0 * self.u, -5.0)
+        self.seniority = np.maximum(0, 3 - np.arange(self.D))
+
+        assign = np.asarray(individual, dtype=np.int64).copy()
+        assign[(assign < 0) | (assign >= self.D)] = -1
+        self.assign = assign
+
+        self.load = np.bincount(assign[assign >= 0], minlength=self.D).astype(np.int64)
+        self.s1 = int(self.load.sum())
+        self.s2 = int((self.load ** 2).sum())
+        self.terms = np.array([self.term(i, a) for i, a in enumerate(assign)])
+
+    def term(self, i, a):
+        # per-patient part of the fitness for patient i on doctor a (-1 = referral)
+        if a < 0:
+            return self.referral[i]
+        p = self.problem
+        if p.disease_compat[p.disease_code[i], a]:
+            base = 50.0
+        elif p.generalist[a]:
+            base = 5.0
+        else:
+            base = -15.0 * self.u[i]
+        return base + self.seniority[a] * self.u[i] * 5
+
+    def row_terms(self, i):
+        # per-patient term of patient i for every doctor, last entry = referral
+        p = self.problem
+        base = np.where(p.disease_compat[p.disease_code[i], :self.D], 50.0, np.where(p.generalist[:self.D], 5.0, -15.0 * self.u[i]))
+        return np.append(base + self.seniority * self.u[i] * 5, self.referral[i])
+
+    def column_terms(self, a):
+        # per-patient term of every patient when assigned to doctor a
+        if a < 0:
+            return self.referral
+        p = self.problem
+        base = np.where(p.disease_compat[p.disease_code, a], 50.0, 5.0 if p.generalist[a] else -15.0 * self.u)
+        return base + self.seniority[a] * self.u * 5
+
+    def balance(self, s1, s2):
+        if self.D == 0:
+            return 0.0
+        return -2.0 * (s2 / self.D - (s1 / self.D) ** 2)
+
+    def fitness(self):
+        return float(self.terms.sum() + self.balance(self.s1, self.s2))
+
+    def move_deltas(self, i):
+        # fitness change of moving patient i to each doctor (index D = referral)
+        a = self.assign[i]
+        s1, s2 = self.s1, self.s2
+        if a >= 0:
+            s1 -= 1
+            s2 -= 2 * self.load[a] - 1
+        load = self.load.copy()
+        if a >= 0:
+            load[a] -= 1
+        new_s1 = np.append(np.full(self.D, s1 + 1), s1)
+        new_s2 = np.append(s2 + 2 * load + 1, s2)
+        if self.D > 0:
+            new_balance = -2.0 * (new_s2 / self.D - (new_s1 / self.D) ** 2)
+        else:
+            new_balance = np.zeros(1)
+        deltas = self.row_terms(i) - self.terms[i] + new_balance - self.balance(self.s1, self.s2)
+        deltas[a if a >= 0 else self.D] = 0.0
+        return deltas
+
+    def move_delta(self, i, b):
+        a = self.assign[i]
+        if a == b:
+            return 0.0
+        s1, s2 = self.s1, self.s2
+        if a >= 0:
+            s1 -= 1
+            s2 -= 2 * self.load[a] - 1
+        if b >= 0:
+            s1 += 1
+            s2 += 2 * self.load[b] + 1
+        return self.term(i, b) - self.terms[i] + self.balance(s1, s2) - self.balance(self.s1, self.s2)
+
+    def apply_move(self, i, b):
+        a = self.assign[i]
+        if a >= 0:
+            self.s2 -= 2 * self.load[a] - 1
+            self.s1 -= 1
+            self.load[a] -= 1
+        if b >= 0:
+            self.s2 += 2 * self.load[b] + 1
+            self.s1 += 1
+            self.load[b] += 1
+        self.assign[i] = b
+        self.terms[i] = self.term(i, b)
+
+    def swap_deltas(self, i):
+        # fitness change of swapping the doctors of patient i and every other patient
+        a = self.assign[i]
+        row = self.row_terms(i)
+        idx = np.where(self.assign >= 0, self.assign, self.D)
+        deltas = row[idx] + self.column_terms(a) - self.terms[i] - self.terms
+        deltas[self.assign == a] = 0.0
+        return deltas
+
+    def swap_delta(self, i, j):
+        a, b = self.assign[i], self.assign[j]
+        if a == b:
+            return 0.0
+        return self.term(i, b) + self.term(j, a) - self.terms[i] - self.terms[j]
+
+    def apply_swap(self, i, j):
+        a, b = self.assign[i], self.assign[j]
+        self.assign[i], self.assign[j] = b, a
+        self.terms[i] = self.term(i, b)
+        self.terms[j] = self.term(j, a)
+
+
+def _hill_climb(state, deadline, rng, max_passes):
+    passes = 0
+    moves = 0
+    while passes < max_passes and time.perf_counter() < deadline:
+        passes += 1
+        improved = False
+        for i in rng.permutation(state.problem.patients):
+            if time.perf_counter() >= deadline:
+                break
+            deltas = state.move_deltas(i)
+            b = int(np.argmax(deltas))
+            if deltas[b] > 1e-9:
+                state.apply_move(i, b if b < state.D else -1)
+                moves += 1
+                improved = True
+                continue
+            deltas = state.swap_deltas(i)
+            j = int(np.argmax(deltas))
+            if deltas[j] > 1e-9:
+                state.apply_swap(i, j)
+                moves += 1
+                improved = True
+        if not improved:
+            break
+    return passes, moves
+
+
+def _anneal(state, deadline, rng, t_start, t_end, swap_prob):
+    P, D = state.problem.patients, state.D
+    best_assign, best_fit = state.assign.copy(), state.fitness()
+    current_fit = best_fit
+    start = time.perf_counter()
+    span = max(deadline - start, 1e-9)
+    moves = 0
+    iterations = 0
+    temp = t_start
+    while True:
+        # draw proposals in blocks to keep RNG overhead off the inner loop
+        block = 512
+        pick_i = rng.integers(0, P, size=block)
+        pick_j = rng.integers(0, P, size=block)
+        targets = rng.integers(-1, max(D, 1), size=block)
+        use_swap = rng.random(block) < swap_prob
+        accept_u = rng.random(block)
+
+        now = time.perf_counter()
+        if now >= deadline:
+            break
+        # geometric cooling from t_start to t_end over the time budget
+        temp = t_start * (t_end / t_start) ** ((now - start) / span)
+
+        for k in range(block):
+            iterations += 1
+            i = pick_i[k]
+            if use_swap[k]:
+                j = pick_j[k]
+                delta = state.swap_delta(i, j)
+            else:
+                b = targets[k] if D > 0 else -1
+                delta = state.move_delta(i, b)
+            if delta == 0.0:
+                continue
+            if delta > 0 or accept_u[k] < math.exp(delta / temp):
+                if use_swap[k]:
+                    state.apply_swap(i, j)
+                else:
+                    state.apply_move(i, b)
+                moves += 1
+                current_fit += delta
+                if current_fit > best_fit + 1e-9:
+                    best_fit = current_fit
+                    best_assign = state.assign.copy()
+    return best_assign, iterations, moves
+
+
+def refine(individual, problem, time_limit=1.0, method="hill", seed=None, max_passes=100,
+           t_start=10.0, t_end=0.05, swap_prob=0.3):
+    """Improve an assignment vector with local search.
+
+    Returns (refined individual as a list, fitness, stats dict).
+    """
+    rng = np.random.default_rng(seed)
+    started = time.perf_counter()
+    deadline = started + max(float(time_limit), 0.0)
+
+    state = _State(problem, individual)
+    initial_fit = state.fitness()
+
+    if problem.patients == 0:
+        return state.assign.tolist(), initial_fit, {"method": method, "initial_fitness": initial_fit,
+                                                    "final_fitness": initial_fit, "moves": 0, "seconds": 0.0}
+
+    if method == "anneal":
+        # anneal for most of the budget, then polish the best solution found by hill climbing
+        anneal_deadline = started + 0.8 * (deadline - started)
+        best_assign, iterations, moves = _anneal(state, anneal_deadline, rng, t_start, t_end, swap_prob)
+        state = _State(problem, best_assign)
+        _, polish_moves = _hill_climb(state, deadline, rng, max_passes)
+        moves += polish_moves
+        passes = None
+    else:
+        passes, moves = _hill_climb(state, deadline, rng, max_passes)
+        iterations = None
+
+    final_fit = state.fitness()
+    stats = {
+        "method": method,
+        "initial_fitness": round(initial_fit, 3),
+        "final_fitness": round(final_fit, 3),
+        "moves": moves,
+        "passes": passes,
+        "iterations": iterations,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+    return state.assign.tolist(), final_fit, stats
+
+
+def assignments_from_schedule(schedule, patients):
+    # output.json rows -> 0-based assignment vector (-1 for referral / no doctor)
+    ind = [-1] * patients
+    for item in schedule:
+        i = int(item.get("Patient", 0)) - 1
+        doc = item.get("Doctor", "-")
+        if 0 <= i < patients and doc not in ("-", None, ""):
+            ind[i] = int(doc) - 1
+    return ind
+
+
+def main():
+    """Refine the schedule already in Results/output.json (e.g. from the greedy scheduler)"""
+    import argparse
+    from scheduler_ga import build_schedule, write_metrics
+
+    cur = os.path.dirname(os.path.abspath(__file__))
+    results_folder = os.path.join(os.path.dirname(os.path.dirname(cur)), 'Results')
+
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--input', default=os.path.join(cur, 'input.json'))
+    parser.add_argument('--schedule', default=os.path.join(results_folder, 'output.json'))
+    parser.add_argument('--method', choices=['hill', 'anneal'], default='hill')
+    parser.add_argument('--time', type=float, default=1.0, help='time cap in seconds')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    with open(args.input) as f:
+        data = json.load(f)
+    with open(args.schedule) as f:
+        schedule = json.load(f)
+
+    problem = SchedulingProblem(data)
+    start = assignments_from_schedule(schedule, problem.patients)
+    best, fit, stats = refine(start, problem, time_limit=args.time, method=args.method, seed=args.seed)
+    print(f"DEBUG: Local search {stats}", file=sys.stderr)
+
+    schedule = build_schedule(best, problem.patient_details, problem.doctor_details, problem.urgency_list, problem.beds,
+                              problem.roster)
+    write_json(os.path.join(results_folder, 'output.json'), schedule)
+    write_metrics(os.path.join(results_folder, 'metrics.csv'), schedule,
+                  f'Local Search ({args.method})', problem.doctors, problem.patients, problem.beds,
+                  problem.urgency_list, [
+                      ('Initial Fitness', stats['initial_fitness']),
+                      ('Best Fitness', stats['final_fitness']),
+                      ('Local Search Moves', stats['moves']),
+                  ])
+    print("SUCCESS — ALL FILES SAVED!")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+"""
+Versioned storage for the disease model artifacts.
+
+Each published model is a complete bundle models/vNNNN/ holding the files the predictor
+loads (ARTIFACTS) and a manifest.json with the size and sha256 of each of them.
+models/current.json names the live version:
+
+    {"version": "v0003", "published": 1760000000.0}
+
+publish() builds the new folder under a temporary name, renames it into place and only
+then rewrites current.json, so a reader following the pointer always finds a complete
+set of files; verify() lets the reader check that it loaded exactly that set. Without
+models/current.json the predictor keeps using the flat files next to the scripts.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+
+from result_writer import write_json
+
+ARTIFACTS = ["disease_model.pkl", "label_encoder.pkl", "symptom_columns.json", "disease_info.json"]
+# published (and listed in the manifest) when present; older bundles may lack them
+OPTIONAL_ARTIFACTS = ["symptom_index.npz"]
+MANIFEST = "manifest.json"
+POINTER = "current.json"
+KEEP_VERSIONS = 5
+
+
+def script_folder():
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+def models_folder(base=None):
+    return os.path.join(base or script_folder(), "models")
+
+
+def current_version(base=None):
+    """Name of the live version (e.g. "v0003"), or None when nothing was published"""
+    try:
+        with open(os.path.join(models_folder(base), POINTER)) as f:
+            version = json.load(f).get("version")
+    except (OSError, ValueError, AttributeError):
+        return None
+    if version and os.path.isdir(os.path.join(models_folder(base), version)):
+        return version
+    return None
+
+
+def resolve(base=None):
+    """(version, folder) the predictor should load: the live bundle, or (None, legacy flat files)"""
+    version = current_version(base)
+    return version, os.path.join(models_folder(base), version) if version else (base or script_folder())
+
+
+def artifact_folder(base=None):
+    return resolve(base)[1]
+
+
+def sha256_file(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def write_manifest(folder, version):
+    files = {}
+    for name in ARTIFACTS + OPTIONAL_ARTIFACTS:
+        path = os.path.join(folder, name)
+        if name in OPTIONAL_ARTIFACTS and not os.path.exists(path):
+            continue
+        files[name] = {"bytes": os.path.getsize(path), "sha256": sha256_file(path)}
+    manifest = {"version": version, "created": time.time(), "files": files}
+    write_json(os.path.join(folder, MANIFEST), manifest, indent=2)
+    return manifest
+
+
+def read_manifest(folder):
+    """The bundle's manifest, or None for a folder without one (the legacy flat files)"""
+    try:
+        with open(os.path.join(folder, MANIFEST)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def check(manifest, name, data):
+    """Raise ValueError unless data (the bytes of artifact name) matches the manifest"""
+    expected = manifest.get("files", {}).get(name)
+    if expected is None:
+        raise ValueError(f"{name} is not listed in the manifest of {manifest.get('version')}")
+    if len(data) != expected["bytes"] or hashlib.sha256(data).hexdigest() != expected["sha256"]:
+        raise ValueError(f"{name} does not match the manifest of {manifest.get('version')}")
+
+
+def verify(folder):
+    """Check every artifact of a bundle against its manifest; raises ValueError on a mismatch"""
+    manifest = read_manifest(folder)
+    if manifest is None:
+        raise ValueError(f"{folder} has no {MANIFEST}")
+    for name in ARTIFACTS + [n for n in OPTIONAL_ARTIFACTS if n in manifest.get("files", {})]:
+        with open(os.path.join(folder, name), "rb") as f:
+            check(manifest, name, f.read())
+    return manifest
+
+
+def versions(base=None):
+    folder = models_folder(base)
+    if not os.path.isdir(folder):
+        return []
+    return sorted(name for name in os.listdir(folder)
+                  if name[:1] == "v" and name[1:].isdigit() and os.path.isdir(os.path.join(folder, name)))
+
+
+def next_version(base=None):
+    existing = versions(base)
+    return f"v{int(existing[-1][1:]) + 1 if existing else 1:04d}"
+
+
+def publish(write_artifacts, base=None, keep=KEEP_VERSIONS):
+    """Publish a new version; write_artifacts(folder) must write every file in ARTIFACTS.
+
+    Returns the new version name.
+    """
+    root = models_folder(base)
+    os.makedirs(root, exist_ok=True)
+    version = next_version(base)
+    tmp = os.path.join(root, f".tmp-{version}-{os.getpid()}")
+    try:
+        os.makedirs(tmp)
+        write_artifacts(tmp)
+        missing = [name for name in ARTIFACTS if not os.path.exists(os.path.join(tmp, name))]
+        if missing:
+            raise RuntimeError(f"model version {version} is missing {', '.join(missing)}")
+        write_manifest(tmp, version)
+        os.rename(tmp, os.path.join(root, version))
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+    write_json(os.path.join(root, POINTER), {"version": version, "published": time.time()})
+    prune(base, keep)
+    return version
+
+
+def prune(base=None, keep=KEEP_VERSIONS):
+    """Delete all but the newest `keep` versions (never the live one)"""
+    live = current_version(base)
+    old = versions(base)[:-keep] if keep > 0 else []
+    for name in old:
+        if name != live:
+            shutil.rmtree(os.path.join(models_folder(base), name), ignore_errors=True)
+
+
+def rollback(version, base=None):
+    """Point current.json back at an existing version"""
+    if version not in versions(base):
+        print(f"ERROR: Unknown model version {version}", file=sys.stderr)
+        return False
+    try:
+        verify(os.path.join(models_folder(base), version))
+    except (OSError, ValueError) as e:
+        print(f"ERROR: Model version {version} is damaged: {e}", file=sys.stderr)
+        return False
+    write_json(os.path.join(models_folder(base), POINTER), {"version": version, "published": time.time()})
+    return True
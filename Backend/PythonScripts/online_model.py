@@ -0,0 +1,291 @@
+"""
+Incremental disease model: a streaming Bernoulli Naive Bayes over the binary symptoms.
+
+train_disease_model.py refits a 200-tree random forest (plus five more for cross
+validation) every time, which takes minutes. The model here only keeps per-disease
+counts, so confirmed diagnoses from the clinic are folded in by adding to the counts:
+
+    python online_model.py init                  fit on the dataset cache, publish v0001
+    python online_model.py update cases.jsonl    add confirmed cases, publish the next version
+    python online_model.py status                live version, class / case counts
+    python online_model.py rollback v0002        point the predictor back at an older version
+
+cases.jsonl has one confirmed case per line:
+
+    {"symptoms": ["itching", "skin rash"], "disease": "Fungal infection"}
+
+Symptom names are matched the way the predictor matches them; unknown symptoms are
+ignored (and counted). A disease that is not in the model yet becomes a new class.
+Each run publishes a complete new version under models/ (see model_store.py), which
+disease_predictor.py picks up on its next load. Every accepted case is also appended to
+models/confirmed_cases.jsonl so a full retrain can include them later.
+
+A random forest cannot be updated this way: warm_start only adds trees, and the new
+trees cannot introduce diseases the existing ones never saw.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import numpy as np
+
+import model_store
+from symptom_index import INDEX_FILE, SymptomIndex
+from result_writer import atomic_open, write_json
+
+CASES_LOG = "confirmed_cases.jsonl"
+
+
+class StreamingBernoulliNB:
+    """Bernoulli Naive Bayes kept as counts, so partial_fit is a few array additions.
+
+    Classes are the integer codes 0..K-1 of a sorted label list kept beside the model
+    (the LabelEncoder); insert_classes() shifts the rows when a new name sorts between
+    existing ones. predict / predict_proba follow the sklearn classifier interface the
+    predictor uses.
+    """
+
+    def __init__(self, n_features, alpha=1.0):
+        self.alpha = float(alpha)
+        self.class_count_ = np.zeros(0, dtype=np.float64)
+        self.feature_count_ = np.zeros((0, n_features), dtype=np.float64)
+        self._log_params = None
+
+    @property
+    def n_features_in_(self):
+        return self.feature_count_.shape[1]
+
+    @property
+    def classes_(self):
+        return np.arange(len(self.class_count_))
+
+    def insert_classes(self, positions):
+        """Add empty classes so that they end up at the given (new) row positions"""
+        total = len(self.class_count_) + len(positions)
+        keep = np.setdiff1d(np.arange(total), positions)
+        class_count = np.zeros(total)
+        feature_count = np.zeros((total, self.n_features_in_))
+        class_count[keep] = self.class_count_
+        feature_count[keep] = self.feature_count_
+        self.class_count_, self.feature_count_ = class_count, feature_count
+        self._log_params = None
+
+    def partial_fit(self, X, y):
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y, dtype=np.intp)
+        n_classes = len(self.class_count_)
+        if len(y) and y.max() >= n_classes:
+            raise ValueError(f"class code {y.max()} out of range ({n_classes} classes)")
+        self.class_count_ += np.bincount(y, minlength=n_classes)
+        np.add.at(self.feature_count_, y, X)
+        self._log_params = None
+        return self
+
+    def _params(self):
+        if self._log_params is None:
+            alpha = self.alpha
+            theta = (self.feature_count_ + alpha) / (self.class_count_[:, None] + 2.0 * alpha)
+            log_present, log_absent = np.log(theta), np.log1p(-theta)
+            # classes nobody has seen yet get no prior mass
+            with np.errstate(divide="ignore"):
+                log_prior = np.log(self.class_count_ / max(self.class_count_.sum(), 1.0))
+            self._log_params = ((log_present - log_absent).T, log_absent.sum(axis=1) + log_prior)
+        return self._log_params
+
+    def _joint_log_likelihood(self, X):
+        weights, bias = self._params()
+        return np.asarray(X, dtype=np.float64) @ weights + bias
+
+    def predict_proba(self, X):
+        jll = self._joint_log_likelihood(X)
+        jll -= jll.max(axis=1, keepdims=True)
+        proba = np.exp(jll)
+        return proba / proba.sum(axis=1, keepdims=True)
+
+    def predict(self, X):
+        return np.argmax(self._joint_log_likelihood(X), axis=1)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_log_params"] = None
+        return state
+
+
+def _normalize(symptom):
+    # same rule as DiseasePredictorSystem.normalize_symptom
+    return symptom.lower().replace(' ', '_').replace('-', '_')
+
+
+def _write_version(model, diseases, symptoms, info):
+    """write_artifacts callback for model_store.publish"""
+    from sklearn.preprocessing import LabelEncoder
+    import joblib
+
+    encoder = LabelEncoder()
+    encoder.classes_ = np.array(diseases, dtype=object)
+    info = dict(info, diseases=list(diseases), num_symptoms=len(symptoms))
+
+    def write(folder):
+        with atomic_open(os.path.join(folder, "disease_model.pkl"), "wb") as f:
+            joblib.dump(model, f)
+        with atomic_open(os.path.join(folder, "label_encoder.pkl"), "wb") as f:
+            joblib.dump(encoder, f)
+        write_json(os.path.join(folder, "symptom_columns.json"), symptoms)
+        write_json(os.path.join(folder, "disease_info.json"), info, indent=2)
+        # the suggestion index is the same counts the model keeps
+        with atomic_open(os.path.join(folder, INDEX_FILE), "wb") as f:
+            SymptomIndex(model.feature_count_, model.class_count_, diseases, symptoms).save(f)
+    return write
+
+
+def init(alpha=1.0):
+    """Fit the model on the full dataset cache and publish it as a new version"""
+    import dataset_cache
+    data = dataset_cache.load()
+    model = StreamingBernoulliNB(len(data.symptoms), alpha=alpha)
+    model.insert_classes(np.arange(len(data.diseases)))
+    model.partial_fit(data.features, data.labels)
+
+    info = {"descriptions": data.descriptions, "precautions": data.precautions, "severity": data.severity}
+    version = model_store.publish(_write_version(model, data.diseases, data.symptoms, info))
+    print(f"Published {version}: {len(data.diseases)} diseases, {int(model.class_count_.sum())} cases")
+    return version
+
+
+def load_current():
+    """(model, diseases, symptoms, info) of the live version; it must be a streaming model"""
+    import joblib
+    if model_store.current_version() is None:
+        raise RuntimeError("no model version published yet, run `python online_model.py init` first")
+    folder = model_store.artifact_folder()
+    model = joblib.load(os.path.join(folder, "disease_model.pkl"))
+    if not isinstance(model, StreamingBernoulliNB):
+        raise RuntimeError("the live model cannot be updated incrementally, run `python online_model.py init`")
+    diseases = list(joblib.load(os.path.join(folder, "label_encoder.pkl")).classes_)
+    with open(os.path.join(folder, "symptom_columns.json")) as f:
+        symptoms = json.load(f)
+    with open(os.path.join(folder, "disease_info.json")) as f:
+        info = json.load(f)
+    return model, diseases, symptoms, info
+
+
+def read_cases(path, symptoms):
+    """Binary rows, disease names and the accepted raw cases from a JSONL file"""
+    column_of = {_normalize(s): j for j, s in enumerate(symptoms)}
+    rows, names, accepted = [], [], []
+    unknown = skipped = 0
+    with open(path) as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                case = json.loads(line)
+                disease = str(case["disease"])
+                columns = {column_of.get(_normalize(str(s))) for s in case["symptoms"]}
+            except (ValueError, KeyError, TypeError) as e:
+                print(f"DEBUG: Skipping line {line_no}: {e}", file=sys.stderr)
+                skipped += 1
+                continue
+            unknown += None in columns
+            columns.discard(None)
+            if not columns or not disease.strip():
+                skipped += 1
+                continue
+            row = np.zeros(len(symptoms), dtype=np.uint8)
+            row[list(columns)] = 1
+            rows.append(row)
+            names.append(disease)
+            accepted.append(case)
+    if unknown:
+        print(f"DEBUG: {unknown} cases mentioned symptoms not in the model (ignored)", file=sys.stderr)
+    if skipped:
+        print(f"DEBUG: {skipped} cases skipped", file=sys.stderr)
+    X = np.array(rows, dtype=np.uint8).reshape(len(rows), len(symptoms))
+    return X, names, accepted
+
+
+def _match_disease(name, diseases):
+    # the Kaggle labels carry stray whitespace ("Diabetes "), so match on the stripped name
+    stripped = {d.strip().lower(): d for d in diseases}
+    return stripped.get(name.strip().lower(), name.strip())
+
+
+def update(cases_path):
+    """Fold the confirmed cases into the live model and publish the next version"""
+    start = time.perf_counter()
+    model, diseases, symptoms, info = load_current()
+    X, names, accepted = read_cases(cases_path, symptoms)
+    if not accepted:
+        print("No usable cases, nothing published")
+        return None
+
+    names = [_match_disease(n, diseases) for n in names]
+    new = sorted(set(names) - set(diseases))
+    if new:
+        merged = sorted(set(diseases) | set(new))
+        model.insert_classes(np.searchsorted(merged, new))
+        diseases = merged
+        print(f"New diseases: {', '.join(new)}")
+    y = np.searchsorted(diseases, names)
+    model.partial_fit(X, y)
+
+    version = model_store.publish(_write_version(model, diseases, symptoms, info))
+    with open(os.path.join(model_store.models_folder(), CASES_LOG), "a") as f:
+        for case in accepted:
+            f.write(json.dumps(case) + "\n")
+    print(f"Published {version}: {len(accepted)} cases added, {len(diseases)} diseases "
+          f"({time.perf_counter() - start:.2f} s)")
+    return version
+
+
+def status():
+    version = model_store.current_version()
+    if version is None:
+        print("No published model version; the predictor uses the flat files from train_disease_model.py")
+        return
+    print(f"Live version: {version} (available: {', '.join(model_store.versions())})")
+    try:
+        model_store.verify(model_store.artifact_folder())
+        print("Manifest checksums OK")
+    except (OSError, ValueError) as e:
+        print(f"Manifest check failed: {e}")
+    try:
+        model, diseases, symptoms, _ = load_current()
+        print(f"{len(diseases)} diseases, {len(symptoms)} symptoms, {int(model.class_count_.sum())} cases")
+    except RuntimeError as e:
+        print(e)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental (Naive Bayes) disease model")
+    commands = parser.add_subparsers(dest="command", required=True)
+    init_cmd = commands.add_parser("init", help="fit on the dataset and publish a new version")
+    init_cmd.add_argument("--alpha", type=float, default=1.0, help="Laplace smoothing")
+    update_cmd = commands.add_parser("update", help="add confirmed cases from a JSONL file")
+    update_cmd.add_argument("cases")
+    commands.add_parser("status", help="show the live version")
+    rollback_cmd = commands.add_parser("rollback", help="make an older version live again")
+    rollback_cmd.add_argument("version")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "init":
+            init(args.alpha)
+        elif args.command == "update":
+            update(args.cases)
+        elif args.command == "status":
+            status()
+        elif not model_store.rollback(args.version):
+            sys.exit(1)
+    except (RuntimeError, OSError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    # run through the importable module so pickles reference online_model.StreamingBernoulliNB
+    # (a __main__.StreamingBernoulliNB could not be unpickled by the predictor)
+    import online_model
+    online_model.main()
@@ -0,0 +1,213 @@
+"""
+End-to-end intake pipeline: triage -> disease prediction -> scheduling in one process.
+
+The three subsystems normally talk through files (triage_results.json,
+disease_input.json, input.json) and a fresh interpreter per step. run_pipeline()
+takes the raw intake records and runs the stages back to back:
+
+  1. triage      triage_engine.triage_batch scores every record at once; the urgency
+                 scores come out as one NumPy array
+  2. prediction  DiseasePredictorSystem.predict_batch evaluates the model once for the
+                 whole batch (skipped with a warning if the model is not trained)
+  3. scheduling  the urgency array (as whole levels) and the predicted diseases, mapped
+                 onto the scheduler's condition names, are handed to greedy_schedule or
+                 run_ga in memory
+
+Result files (output.json, metrics.csv, convergence.png) are written only when a
+results folder is given; without one the GA runs in a temporary folder.
+
+    python pipeline.py intake.jsonl [--doctors input.json] [--beds N] [--ga]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import numpy as np
+
+from triage_engine import triage_batch
+from result_writer import write_json
+from instrumentation import span
+
+# predicted (Kaggle dataset) disease -> condition name used by SPECIALTY_CONDITIONS
+SCHEDULER_DISEASE = {
+    "Heart attack": "Heart Attack",
+    "Hypertension": "Hypertension",
+    "Paralysis (brain hemorrhage)": "Stroke",
+    "Migraine": "Migraine",
+    "Arthritis": "Arthritis",
+    "Osteoarthristis": "Arthritis",
+    "Cervical spondylosis": "Arthritis",
+    "Bronchial Asthma": "Asthma",
+    "Common Cold": "Cold",
+    "Diabetes": "Diabetes",
+    "Malaria": "Fever",
+    "Dengue": "Fever",
+    "Typhoid": "Fever",
+    "Chicken pox": "Fever",
+    "Tuberculosis": "Infection",
+    "Pneumonia": "Infection",
+    "AIDS": "Infection",
+    "Urinary tract infection": "Infection",
+    "Gastroenteritis": "Infection",
+    "Fungal infection": "Infection",
+    "Impetigo": "Infection",
+    "hepatitis A": "Infection",
+    "Hepatitis B": "Infection",
+    "Hepatitis C": "Infection",
+    "Hepatitis D": "Infection",
+    "Hepatitis E": "Infection",
+}
+
+# used when there is no usable prediction: triage department -> condition
+TRIAGE_DISEASE = {
+    "Cardiology": "Heart Attack",
+    "Neurology": "Stroke",
+    "Orthopedics": "Fracture",
+    "General Medicine": "Fever",
+}
+DEFAULT_DISEASE = "Fever"
+
+
+def load_predictor():
+    """DiseasePredictorSystem, or None when the model files are missing"""
+    try:
+        from disease_predictor import DiseasePredictorSystem
+        return DiseasePredictorSystem()
+    except Exception as e:
+        print(f"DEBUG: Disease prediction disabled: {e}", file=sys.stderr)
+        return None
+
+
+def triage_stage(records):
+    """Triage results plus their urgency scores as a float array"""
+    results = triage_batch(records, errors="record")
+    urgency = np.fromiter((r["urgency"] for r in results), dtype=np.float64, count=len(results))
+    return results, urgency
+
+
+def prediction_stage(records, predictor):
+    if predictor is None:
+        return [None] * len(records)
+    return predictor.predict_batch([r.get("symptoms", []) if isinstance(r, dict) else [] for r in records])
+
+
+def scheduler_diseases(triage_results, predictions):
+    """Condition name per patient for the scheduler, preferring the model's prediction"""
+    diseases = []
+    for triage, prediction in zip(triage_results, predictions):
+        disease = None
+        if prediction and prediction.get("success"):
+            # dataset labels carry stray whitespace ("Diabetes ")
+            disease = SCHEDULER_DISEASE.get(prediction["top_disease"].strip())
+        if disease is None:
+            disease = TRIAGE_DISEASE.get(triage.get("department"), DEFAULT_DISEASE)
+        diseases.append(disease)
+    return diseases
+
+
+def scheduler_input(records, urgency, diseases, doctor_details, beds):
+    """In-memory equivalent of input.json for the scheduler stage"""
+    # the scheduler works on whole urgency levels 1..10; halves round up (np.rint would
+    # round 8.5 down to 8). Kept as an array: the scheduler's Roster reads it as it is
+    levels = np.clip(np.floor(urgency + 0.5), 1, 10).astype(np.int64)
+    patient_details = []
+    for i, (record, disease) in enumerate(zip(records, diseases)):
+        record = record if isinstance(record, dict) else {}
+        patient_details.append({"Name": record.get("name", f"Patient {i+1}"), "Disease": disease,
+                                "Age": record.get("age", 30)})
+    return {
+        "Doctors": len(doctor_details),
+        "Patients": len(records),
+        "Beds": beds,
+        "Urgency": levels,
+        "DoctorDetails": [dict(d) for d in doctor_details],
+        "PatientDetails": patient_details,
+    }
+
+
+def schedule_stage(input_data, use_ga=False, ga_options=None, results_folder=None):
+    if use_ga:
+        import scheduler_ga
+        options = dict(ga_options or {})
+        if results_folder is not None:
+            return scheduler_ga.run_ga(input_data, results_folder, **options)
+        # run_ga always writes its result files; keep them out of Results/ when not asked for
+        with tempfile.TemporaryDirectory() as tmp:
+            return scheduler_ga.run_ga(input_data, tmp, **options)
+
+    from scheduler import greedy_schedule, save_convergence_graph
+    schedule, _, _ = greedy_schedule(input_data["Doctors"], input_data["Patients"], input_data["Beds"],
+                                     input_data["Urgency"], input_data["DoctorDetails"], input_data["PatientDetails"])
+    if results_folder is not None:
+        from scheduler_ga import write_metrics
+        write_json(os.path.join(results_folder, "output.json"), schedule)
+        save_convergence_graph(schedule, results_folder)
+        write_metrics(os.path.join(results_folder, "metrics.csv"), schedule, "Triage + Disease Prediction + Rule-Based Matching",
+                      input_data["Doctors"], input_data["Patients"], input_data["Beds"], input_data["Urgency"])
+    return schedule
+
+
+def run_pipeline(records, doctor_details, beds=4, use_ga=False, ga_options=None, predictor=None,
+                 results_folder=None):
+    """Triage, predict and schedule a batch of intake records in-process.
+
+    records are triage_calculator input dicts (name, age, symptoms, pain_level). Pass a
+    loaded predictor to reuse it across calls; by default one is loaded per call.
+    Returns {"triage": [...], "predictions": [...], "schedule": [...]}.
+    """
+    with span("pipeline.triage", records=len(records)):
+        triage_results, urgency = triage_stage(records)
+
+    if predictor is None:
+        predictor = load_predictor()
+    with span("pipeline.prediction", records=len(records)):
+        predictions = prediction_stage(records, predictor)
+
+    diseases = scheduler_diseases(triage_results, predictions)
+    input_data = scheduler_input(records, urgency, diseases, doctor_details, beds)
+    with span("pipeline.schedule", records=len(records), ga=bool(use_ga)):
+        schedule = schedule_stage(input_data, use_ga, ga_options, results_folder)
+    return {"triage": triage_results, "predictions": predictions, "schedule": schedule}
+
+
+def read_records(path):
+    # a JSON list of records, or one record per line (JSONL)
+    with open(path) as f:
+        text = f.read()
+    if text.lstrip().startswith("["):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def main():
+    import argparse
+    current_folder = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Triage -> disease prediction -> scheduling in one process")
+    parser.add_argument("intake", help="JSON list or JSONL file of patient intake records")
+    parser.add_argument("--doctors", default=os.path.join(current_folder, "input.json"),
+                        help="input.json whose DoctorDetails (and Beds) are used")
+    parser.add_argument("--beds", type=int, default=None)
+    parser.add_argument("--ga", action="store_true", help="use the GA scheduler instead of the greedy one")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    with open(args.doctors) as f:
+        roster = json.load(f)
+    doctor_details = roster.get("DoctorDetails", [])
+    # same padding as scheduler.py for rosters that only give a doctor count
+    while len(doctor_details) < int(roster.get("Doctors", len(doctor_details))):
+        doctor_details.append({"Name": f"Dr. {len(doctor_details)+1}", "Specialty": "General"})
+    beds = args.beds if args.beds is not None else int(roster.get("Beds", 4))
+
+    results_folder = os.path.join(os.path.dirname(os.path.dirname(current_folder)), "Results")
+    os.makedirs(results_folder, exist_ok=True)
+
+    result = run_pipeline(read_records(args.intake), doctor_details, beds, use_ga=args.ga,
+                          ga_options={"seed": args.seed}, results_folder=results_folder)
+    print(f"DEBUG: {len(result['schedule'])} patients triaged, predicted and scheduled", file=sys.stderr)
+    print("SUCCESS — ALL FILES SAVED!")
+
+
+if __name__ == "__main__":
+    main()
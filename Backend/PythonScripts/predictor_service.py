@@ -0,0 +1,271 @@
+"""
+Long-running disease predictor with request micro-batching.
+
+Evaluating the forest costs nearly the same for one row as for dozens, so a request
+that arrives while others are waiting should ride along with them. MicroBatcher puts
+every request on a queue; one worker thread takes the first waiting request, keeps
+collecting for up to max_wait seconds or max_batch requests, runs the whole batch
+through DiseasePredictorSystem.predict_batch() as one matrix and hands each caller
+its own row (a Future per request). A lone request waits at most max_wait.
+
+Run `python predictor_service.py [--port 8766] [--max-batch 64] [--max-wait-ms 2]`
+for a local JSON API:
+    POST /predict        {"symptoms": [...]} -> the disease_predictor.py result dict
+                         (504 after --request-timeout seconds without a result)
+    POST /suggest        {"symptoms": [...], "denied": [...], "k": 3} -> next symptoms to ask
+    POST /reload         reload the model if a newer version was published
+    GET  /metrics        batch sizes, queueing delay and model time
+    GET  /health
+The model is also checked for new versions every --reload-interval seconds and
+hot-swapped without pausing requests.
+"""
+
+import collections
+import json
+import sys
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+from instrumentation import span
+
+DEFAULT_PORT = 8766
+DEFAULT_MAX_BATCH = 64
+DEFAULT_MAX_WAIT = 0.002
+# longest a /predict request waits for its batch before answering 504
+DEFAULT_REQUEST_TIMEOUT = 30.0
+RECENT = 1024  # recent samples kept for the delay / timing percentiles
+
+
+def _percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class MicroBatcher:
+    def __init__(self, predictor, max_batch=DEFAULT_MAX_BATCH, max_wait=DEFAULT_MAX_WAIT):
+        self.predictor = predictor
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait = max(0.0, float(max_wait))
+        self._pending = collections.deque()
+        self._cond = threading.Condition()
+        self._closed = False
+
+        # metrics (guarded by _cond)
+        self.requests = 0
+        self.batches = 0
+        self.size_histogram = collections.Counter()
+        self._recent_delay = collections.deque(maxlen=RECENT)
+        self._recent_model = collections.deque(maxlen=RECENT)
+
+        self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, symptoms):
+        """Queue one prediction; returns a Future with the result dict"""
+        future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("predictor service is shutting down")
+            self._pending.append((symptoms, future, time.perf_counter()))
+            self._cond.notify()
+        return future
+
+    def predict(self, symptoms, timeout=None):
+        return self.submit(symptoms).result(timeout)
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._pending and not self._closed:
+                self._cond.wait()
+            if not self._pending:
+                return None
+            # wait for company: up to max_wait after the oldest request arrived
+            deadline = self._pending[0][2] + self.max_wait
+            while len(self._pending) < self.max_batch and not self._closed:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            count = min(self.max_batch, len(self._pending))
+            return [self._pending.popleft() for _ in range(count)]
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            start = time.perf_counter()
+            delays = [start - queued for _, _, queued in batch]
+            try:
+                with span("service.batch", size=len(batch), queue_delay_ms=round(max(delays) * 1000.0, 3)):
+                    results = self.predictor.predict_batch([symptoms for symptoms, _, _ in batch])
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            model_time = time.perf_counter() - start
+            results = list(results)
+            if len(results) != len(batch):
+                # rows can no longer be matched to requests: fail them all rather than leave
+                # callers waiting on futures that are never resolved
+                error = RuntimeError(f"predict_batch returned {len(results)} results for {len(batch)} requests")
+                for _, future, _ in batch:
+                    future.set_exception(error)
+                continue
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
+
+            with self._cond:
+                self.requests += len(batch)
+                self.batches += 1
+                # power-of-two buckets: 1, 2, 4, ..., max_batch
+                self.size_histogram[1 << (len(batch) - 1).bit_length()] += 1
+                self._recent_delay.extend(delays)
+                self._recent_model.append(model_time)
+
+    def stats(self):
+        with self._cond:
+            delays = list(self._recent_delay)
+            model = list(self._recent_model)
+            return {
+                "requests": self.requests,
+                "batches": self.batches,
+                "mean_batch_size": round(self.requests / self.batches, 2) if self.batches else 0.0,
+                "batch_size_histogram": {str(k): v for k, v in sorted(self.size_histogram.items())},
+                "queue_delay_ms": {"p50": round(_percentile(delays, 0.5) * 1000.0, 3),
+                                   "p95": round(_percentile(delays, 0.95) * 1000.0, 3),
+                                   "max": round(max(delays, default=0.0) * 1000.0, 3)},
+                "batch_model_ms": {"p50": round(_percentile(model, 0.5) * 1000.0, 3),
+                                   "p95": round(_percentile(model, 0.95) * 1000.0, 3)},
+                "waiting": len(self._pending),
+                "max_batch": self.max_batch,
+                "max_wait_ms": self.max_wait * 1000.0,
+            }
+
+    def close(self):
+        """Finish the queued requests and stop the worker"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._worker.join()
+
+
+class PredictorHandler(BaseHTTPRequestHandler):
+    # set by serve(): the shared batcher and the /predict wait limit (seconds)
+    batcher = None
+    request_timeout = DEFAULT_REQUEST_TIMEOUT
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length", 0) or 0)
+        return json.loads(self.rfile.read(length) or b"{}") if length else {}
+
+    def _path(self):
+        return urlparse(self.path).path.rstrip("/")
+
+    def do_GET(self):
+        path = self._path()
+        predictor = self.batcher.predictor
+        if path == "/metrics":
+            return self._send(200, self.batcher.stats())
+        if path == "/health":
+            return self._send(200, {"status": "ok", "model_version": predictor.model_version})
+        self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        path = self._path()
+        try:
+            body = self._body()
+        except ValueError as e:
+            return self._send(400, {"error": f"invalid JSON: {e}"})
+        predictor = self.batcher.predictor
+        try:
+            if path == "/predict":
+                return self._send(200, self.batcher.predict(body.get("symptoms", []), self.request_timeout))
+            if path == "/suggest":
+                return self._send(200, predictor.suggest_symptoms(
+                    body.get("symptoms", []), k=int(body.get("k", 3)),
+                    top_diseases=int(body.get("top_diseases", 5)), denied=body.get("denied")))
+            if path == "/reload":
+                started = predictor.reload_if_changed(wait=True)
+                return self._send(200, {"reloaded": started and predictor.reload_error is None,
+                                        "model_version": predictor.model_version,
+                                        "error": predictor.reload_error})
+        except FutureTimeout:
+            return self._send(504, {"error": f"no prediction within {self.request_timeout} s"})
+        except Exception as e:
+            return self._send(500, {"error": str(e)})
+        self._send(404, {"error": "not found"})
+
+
+class PredictorServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # bursts of concurrent clients are the point; the default listen backlog of 5 resets them
+    request_queue_size = 128
+
+
+def serve(batcher, host="127.0.0.1", port=DEFAULT_PORT, reload_interval=10.0, request_timeout=DEFAULT_REQUEST_TIMEOUT):
+    handler = type("BoundPredictorHandler", (PredictorHandler,),
+                   {"batcher": batcher, "request_timeout": request_timeout})
+    server = PredictorServer((host, port), handler)
+
+    stop = threading.Event()
+
+    def watch_model():
+        while not stop.wait(reload_interval):
+            try:
+                batcher.predictor.reload_if_changed()
+            except OSError as e:
+                print(f"DEBUG: Could not check for a new model version: {e}", file=sys.stderr)
+
+    if reload_interval > 0:
+        threading.Thread(target=watch_model, daemon=True).start()
+
+    print(f"Predictor service listening on http://{host}:{server.server_address[1]} "
+          f"(batches of up to {batcher.max_batch}, {batcher.max_wait * 1000:.1f} ms window)", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+        batcher.close()
+
+
+def main():
+    import argparse
+    from disease_predictor import DiseasePredictorSystem
+    parser = argparse.ArgumentParser(description="Micro-batching disease predictor service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH, help="most requests per model call")
+    parser.add_argument("--max-wait-ms", type=float, default=DEFAULT_MAX_WAIT * 1000.0,
+                        help="how long the first request of a batch waits for others")
+    parser.add_argument("--reload-interval", type=float, default=10.0,
+                        help="seconds between checks for a new model version, 0 = off")
+    parser.add_argument("--request-timeout", type=float, default=DEFAULT_REQUEST_TIMEOUT,
+                        help="seconds a /predict request waits for its result before answering 504")
+    args = parser.parse_args()
+
+    batcher = MicroBatcher(DiseasePredictorSystem(), args.max_batch, args.max_wait_ms / 1000.0)
+    serve(batcher, args.host, args.port, args.reload_interval, args.request_timeout)
+
+
+if __name__ == "__main__":
+    main()
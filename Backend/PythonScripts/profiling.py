@@ -0,0 +1,153 @@
+"""
+Opt-in profiling for the backend entry points.
+
+Every script's `if __name__ == "__main__"` block runs inside profiled(name). Profiling
+is off unless asked for on the command line or through the environment:
+
+    python scheduler.py --profile            deterministic cProfile of the whole run
+    python scheduler.py --profile=sample     low-overhead stack sampling (long GA runs)
+    MEDIMATCH_PROFILE=cprofile|sample        same, without touching the command line
+                                             (the UI starts the scripts itself)
+
+The --profile flag is removed from sys.argv before the script parses its arguments.
+Output goes to Results/profiles/<script>-<timestamp>.*:
+    cProfile: .prof (open with snakeviz / pstats) and .txt with the top hotspots
+    sample:   .folded (collapsed stacks for flamegraph.pl / speedscope, the same format
+              as `py-spy record --format raw`) and .txt with the top self / total frames
+The sampler only sees the main thread; GA worker processes are not followed (py-spy
+with --subprocesses can be used for those, no changes to the scripts needed).
+"""
+
+import collections
+import io
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+PROFILE_ENV = "MEDIMATCH_PROFILE"
+TOP_N = 30
+SAMPLE_INTERVAL = 0.005
+
+
+def profiles_folder():
+    project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return os.path.join(project_root, "Results", "profiles")
+
+
+def requested_mode(argv=None):
+    """Profile mode from --profile[=mode] in argv (which is stripped) or the environment"""
+    argv = sys.argv if argv is None else argv
+    mode = None
+    for arg in list(argv[1:]):
+        if arg == "--profile" or arg.startswith("--profile="):
+            mode = arg.partition("=")[2] or "cprofile"
+            argv.remove(arg)
+    mode = mode or os.environ.get(PROFILE_ENV) or None
+    if mode not in (None, "cprofile", "sample"):
+        print(f"DEBUG: Unknown profile mode '{mode}', using cprofile", file=sys.stderr)
+        mode = "cprofile"
+    return mode
+
+
+def _output_base(name):
+    folder = profiles_folder()
+    os.makedirs(folder, exist_ok=True)
+    return os.path.join(folder, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}")
+
+
+def _write_cprofile(profiler, name):
+    import pstats
+    base = _output_base(name)
+    profiler.dump_stats(base + ".prof")
+    text = io.StringIO()
+    stats = pstats.Stats(profiler, stream=text).strip_dirs()
+    text.write(f"Top {TOP_N} by cumulative time\n")
+    stats.sort_stats("cumulative").print_stats(TOP_N)
+    text.write(f"\nTop {TOP_N} by own time\n")
+    stats.sort_stats("tottime").print_stats(TOP_N)
+    with open(base + ".txt", "w") as f:
+        f.write(text.getvalue())
+    return base
+
+
+class StackSampler:
+    """Samples the main thread's Python stack every interval seconds from a daemon thread"""
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self.samples = 0
+        self._target = threading.main_thread().ident
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+                self.samples += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, name):
+        base = _output_base(name)
+        with open(base + ".folded", "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+        own, total = collections.Counter(), collections.Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            own[frames[-1]] += count
+            for frame in set(frames):
+                total[frame] += count
+        with open(base + ".txt", "w") as f:
+            f.write(f"{self.samples} samples every {self.interval * 1000:.1f} ms\n")
+            for title, counter in (("own", own), ("total", total)):
+                f.write(f"\nTop {TOP_N} frames by {title} samples\n")
+                for frame, count in counter.most_common(TOP_N):
+                    f.write(f"{count:8d} {100.0 * count / max(self.samples, 1):6.1f}%  {frame}\n")
+        return base
+
+
+@contextmanager
+def profiled(name, argv=None):
+    """Run the block under the requested profiler (no-op when profiling is off)"""
+    mode = requested_mode(argv)
+    if mode is None:
+        yield
+        return
+
+    if mode == "sample":
+        sampler = StackSampler()
+        sampler.start()
+        try:
+            yield
+        finally:
+            sampler.stop()
+            base = sampler.write(name)
+            print(f"DEBUG: Sampling profile saved to {base}.folded", file=sys.stderr)
+        return
+
+    import cProfile
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        base = _write_cprofile(profiler, name)
+        print(f"DEBUG: Profile saved to {base}.prof", file=sys.stderr)
@@ -0,0 +1,144 @@
+"""
+Content-addressed cache for scheduler results.
+
+The UI often re-runs scheduler.py with an unchanged input.json. fingerprint() hashes a
+canonical form of the input (sorted keys, no whitespace) together with the scheduler
+source files, and the result files of a run are kept under Results/cache/<hash>/.
+When the same fingerprint comes back the files are copied into Results/ instead of
+recomputing anything.
+
+Only deterministic runs are cached: the greedy scheduler, or the GA when GASeed is set
+and no local search is requested (hill climbing and annealing both stop at
+GALocalSearchTime, so their result depends on the machine's speed). Entries are evicted
+least recently used first once the cache exceeds MAX_ENTRIES or MAX_BYTES.
+
+The greedy / decomposed convergence.png carries the time of the run in its title, so it
+is not cached; scheduler.py draws it again from the restored output.json.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+
+from result_writer import copy_file
+
+CACHE_VERSION = 2
+MAX_ENTRIES = 32
+MAX_BYTES = 64 * 1024 * 1024
+
+# the result of a run depends on these as much as on input.json
+SOURCE_FILES = ["scheduler.py", "scheduler_ga.py", "scheduler_nsga.py", "scheduling_problem.py", "local_search.py",
+                "decompose.py"]
+
+
+def is_cacheable(input_data):
+    """True when running the same input twice is guaranteed to give the same files"""
+    if not input_data.get("UseCache", True) or os.environ.get("MEDIMATCH_CACHE", "1") == "0":
+        return False
+    decomposed_ga = input_data.get("Decompose", False) and \
+        str(input_data.get("DecomposeEngine", "")).lower() in ("ga", "exact")
+    if not input_data.get("UseGA", False) and not decomposed_ga:
+        return True
+    if input_data.get("GASeed", None) is None:
+        return False
+    # local search is time-capped, so it may stop at a different move on the next run
+    return not input_data.get("GALocalSearch", None)
+
+
+def timestamped_plot(input_data):
+    # scheduler.save_convergence_graph (greedy and decomposed runs) stamps the current time
+    return bool(input_data.get("Decompose", False)) or not input_data.get("UseGA", False)
+
+
+def result_files(input_data):
+    # files a run with this input writes into Results/ and that can be restored as they are
+    files = ["output.json", "metrics.csv"]
+    if not timestamped_plot(input_data):
+        files.append("convergence.png")
+    if input_data.get("UseGA", False) and not input_data.get("Decompose", False) and \
+            str(input_data.get("GAMode", "single")).lower() == "pareto":
+        files += ["pareto_front.json", "pareto_front.csv"]
+    return files
+
+
+def fingerprint(input_data):
+    canonical = json.dumps(input_data, sort_keys=True, separators=(",", ":"), ensure_ascii=True)
+    h = hashlib.sha256()
+    h.update(f"v{CACHE_VERSION}\n".encode())
+    h.update(canonical.encode())
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    for name in SOURCE_FILES:
+        try:
+            with open(os.path.join(script_dir, name), "rb") as f:
+                h.update(f.read())
+        except OSError:
+            h.update(b"missing:" + name.encode())
+    return h.hexdigest()[:32]
+
+
+def cache_dir(results_folder):
+    return os.path.join(results_folder, "cache")
+
+
+def restore(key, results_folder):
+    """Copy a cached result into results_folder; returns False on a miss"""
+    entry = os.path.join(cache_dir(results_folder), key)
+    manifest_path = os.path.join(entry, "manifest.json")
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        for name in manifest["files"]:
+            copy_file(os.path.join(entry, name), os.path.join(results_folder, name))
+        # mark as recently used for LRU eviction
+        os.utime(manifest_path)
+        return True
+    except (OSError, ValueError, KeyError):
+        return False
+
+
+def store(key, results_folder, files):
+    """Save this run's result files under Results/cache/<key>/ and evict old entries"""
+    root = cache_dir(results_folder)
+    entry = os.path.join(root, key)
+    if os.path.exists(entry):
+        return
+    files = [name for name in files if os.path.exists(os.path.join(results_folder, name))]
+    if "output.json" not in files:
+        return
+
+    # build the entry in a temp dir, then rename so readers never see a partial entry
+    tmp = os.path.join(root, f".tmp-{key}-{os.getpid()}")
+    try:
+        os.makedirs(tmp, exist_ok=True)
+        for name in files:
+            shutil.copyfile(os.path.join(results_folder, name), os.path.join(tmp, name))
+        with open(os.path.join(tmp, "manifest.json"), "w") as f:
+            json.dump({"key": key, "files": files, "created": time.time()}, f)
+        os.replace(tmp, entry)
+    except OSError as e:
+        print(f"DEBUG: Could not store result cache entry: {e}", file=sys.stderr)
+        shutil.rmtree(tmp, ignore_errors=True)
+        return
+    evict(results_folder)
+
+
+def evict(results_folder, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+    root = cache_dir(results_folder)
+    entries = []
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        manifest_path = os.path.join(path, "manifest.json")
+        if name.startswith(".tmp-") or not os.path.exists(manifest_path):
+            continue
+        size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+        entries.append((os.path.getmtime(manifest_path), size, path))
+
+    entries.sort()  # least recently used first
+    total = sum(size for _, size, _ in entries)
+    while entries and (len(entries) > max_entries or total > max_bytes):
+        _, size, path = entries.pop(0)
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
@@ -0,0 +1,117 @@
+"""
+Atomic writers for everything the backend hands to the UI.
+
+Results/output.json, metrics.csv, convergence.png and the triage result used to be
+written straight into their final path, so a UI refresh racing a run could read a
+half-written file. Every writer here fills a temp file in the same folder and then
+os.replace()s it over the target: readers see either the old file or the new one,
+never a mix. (There is no fsync: the point is consistent reads, not crash durability,
+and a sync per result file would cost more than the write itself.) On Windows the
+rename can fail while the UI has the file open, so it is retried for a short while.
+
+JSON is written compact and ASCII-only (orjson when it is installed, the json module
+otherwise); pass indent=2 for files meant to be read by people. orjson and tempfile
+are imported on first use to keep the scripts' start-up cheap.
+"""
+
+import json
+import os
+import time
+from contextlib import contextmanager
+
+REPLACE_RETRIES = 10
+REPLACE_DELAY = 0.05
+
+_orjson = False  # not looked up yet
+
+
+def _get_orjson():
+    global _orjson
+    if _orjson is False:
+        try:
+            import orjson
+            _orjson = orjson
+        except ImportError:
+            _orjson = None
+    return _orjson
+
+
+def _replace(tmp, path):
+    for attempt in range(REPLACE_RETRIES):
+        try:
+            os.replace(tmp, path)
+            return
+        except PermissionError:
+            # target briefly locked by a reader (Windows)
+            if attempt == REPLACE_RETRIES - 1:
+                raise
+            time.sleep(REPLACE_DELAY)
+
+
+@contextmanager
+def atomic_open(path, mode="w", **kwargs):
+    """open() replacement whose file only appears at path once the block succeeds"""
+    import tempfile
+    folder = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=folder, prefix="." + os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode, **kwargs) as f:
+            yield f
+        # mkstemp files are private; keep the target's permissions (or the usual 644)
+        try:
+            os.chmod(tmp, os.stat(path).st_mode & 0o777)
+        except OSError:
+            os.chmod(tmp, 0o644)
+        _replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def dumps(obj, indent=None):
+    """JSON bytes; compact unless indent is given"""
+    orjson = _get_orjson()
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        try:
+            data = orjson.dumps(obj, option=option)
+            # keep files ASCII like the json module does, so readers that open them with
+            # the Windows locale encoding still work
+            if data.isascii():
+                return data
+        except TypeError:
+            pass  # e.g. ints beyond 64 bits; the json module copes
+    if indent:
+        return json.dumps(obj, indent=indent).encode()
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+def write_bytes(path, data):
+    with atomic_open(path, "wb") as f:
+        f.write(data)
+
+
+def write_text(path, text):
+    with atomic_open(path, "w", encoding="utf-8", newline="") as f:
+        f.write(text)
+
+
+def write_json(path, obj, indent=None):
+    write_bytes(path, dumps(obj, indent))
+
+
+def save_figure(fig, path, **kwargs):
+    """fig.savefig() into path atomically (fig may also be the pyplot module)"""
+    fmt = os.path.splitext(path)[1].lstrip(".") or "png"
+    with atomic_open(path, "wb") as f:
+        fig.savefig(f, format=fmt, **kwargs)
+
+
+def copy_file(src, dst):
+    with open(src, "rb") as f:
+        write_bytes(dst, f.read())
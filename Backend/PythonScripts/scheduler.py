@@ -1,58 +1,39 @@
 ﻿import json
 import os
 import sys
-import numpy as np
+
+import result_cache
+from result_writer import atomic_open, write_json, save_figure
+from instrumentation import span, emit
+from profiling import profiled
 
 # GET THE EXACT FOLDER WHERE input.json IS
 current_folder = os.path.dirname(os.path.abspath(__file__))
 input_file = os.path.join(current_folder, "input.json")
 
-print(f"DEBUG: Looking for input.json at: {input_file}", file=sys.stderr)
-
-# READ input.json
-try:
-    with open(input_file, "r") as f:
-        data = json.load(f)
-    print("DEBUG: Successfully read input.json", file=sys.stderr)
-except Exception as e:
-    print(f"ERROR: Could not read input.json: {e}", file=sys.stderr)
-    sys.exit(1)
-
-# Extract data with fallbacks
-doctors = int(data.get("Doctors", 3))
-patients = int(data.get("Patients", 6))
-beds = int(data.get("Beds", 4))
-urgency_list = [int(x) for x in data.get("Urgency", [5,5,5,5,5,5])]
-
-# Get doctor and patient details (optional)
-doctor_details = data.get("DoctorDetails", [])
-patient_details = data.get("PatientDetails", [])
-
-# Fill missing details
-while len(doctor_details) < doctors:
-    doctor_details.append({"Name": f"Dr. {len(doctor_details)+1}", "Specialty": "General"})
-
-while len(patient_details) < patients:
-    patient_details.append({"Name": f"Patient {len(patient_details)+1}", "Disease": "Fever", "Age": 30})
-
-print(f"DEBUG: Doctors={doctors}, Patients={patients}, Beds={beds}", file=sys.stderr)
-print(f"DEBUG: Urgency list: {urgency_list}", file=sys.stderr)
-
 # GO TO PROJECT ROOT TO SAVE RESULTS
 project_root = os.path.dirname(os.path.dirname(current_folder))
 results_folder = os.path.join(project_root, "Results")
-os.makedirs(results_folder, exist_ok=True)
 
-print(f"DEBUG: Results folder: {results_folder}", file=sys.stderr)
+# SPECIALTY MATCHING DATABASE
+SPECIALTY_CONDITIONS = {
+    "Cardiology": ["Heart Attack", "Stroke", "Hypertension"],
+    "Neurology": ["Stroke", "Migraine", "Epilepsy"],
+    "Orthopedics": ["Fracture", "Broken Arm", "Arthritis"],
+    "Pediatrics": ["Fever", "Infection", "Asthma"],
+    "General": ["Fever", "Cold", "Infection", "Diabetes"],
+    "Emergency": ["Heart Attack", "Stroke", "Fracture"]
+}
+
+
+# SIMPLE FUZZY LOGIC
+def calculate_fuzzy_score(urgency):
+    # Simple linear conversion: 1→0.1, 10→1.0
+    return min(max((urgency - 1) / 9.0, 0.0), 1.0)
 
-# Check input flag to decide whether to run GA
-use_ga = False
-try:
-    use_ga = bool(data.get("UseGA", False))
-except Exception:
-    use_ga = False
 
-if use_ga:
+def run_ga_engine(data, roster=None):
+    """Run the GA (or NSGA-II) scheduler; returns its schedule or None if it failed"""
     try:
         import scheduler_ga
         # read GA hyperparameters if available
@@ -60,286 +41,360 @@ if use_ga:
         gens = int(data.get('GAGenerations', 120))
         mut = float(data.get('GAMutation', 0.06))
         seed = data.get('GASeed', None)
-
+        # optional local-search refinement of the GA result ("hill" or "anneal")
+        local_search = data.get('GALocalSearch', None)
+        ls_time = float(data.get('GALocalSearchTime', 1.0))
+        # island model: independent RNG stream per island, islands spread over worker processes
+        islands = int(data.get('GAIslands', 1))
+        workers = int(data.get('GAWorkers', 1))
+        # LRU fitness memo entries per process (0 = off)
+        memo_size = int(data.get('GAFitnessMemo', scheduler_ga.DEFAULT_MEMO_SIZE))
+
+        # "pareto" runs the multi-objective NSGA-II mode and also writes pareto_front.json
+        if str(data.get('GAMode', 'single')).lower() == 'pareto':
+            import scheduler_nsga
+            return scheduler_nsga.run_nsga(data, results_folder, population_size=pop, generations=gens, mutation_rate=mut, seed=seed,
+                                           roster=roster)
         # pass mutation rate through to GA so UI value takes effect
-        ga_schedule = scheduler_ga.run_ga(data, results_folder, population_size=pop, generations=gens, mutation_rate=mut, seed=seed)
-        if ga_schedule:
-            # scheduler_ga handles saving outputs and metrics
-            print("SUCCESS — ALL FILES SAVED!")
-            sys.exit(0)
+        return scheduler_ga.run_ga(data, results_folder, population_size=pop, generations=gens, mutation_rate=mut, seed=seed,
+                                   local_search=local_search, local_search_time=ls_time,
+                                   islands=islands, workers=workers, memo_size=memo_size, roster=roster)
     except Exception as ge:
         print(f"DEBUG: GA run failed, falling back to heuristic scheduler: {ge}", file=sys.stderr)
+        return None
 
-# SIMPLE FUZZY LOGIC
-def calculate_fuzzy_score(urgency):
-    # Simple linear conversion: 1→0.1, 10→1.0
-    return min(max((urgency - 1) / 9.0, 0.0), 1.0)
-
-fuzzy_scores = [round(calculate_fuzzy_score(u), 3) for u in urgency_list]
 
-# SPECIALTY MATCHING DATABASE
-SPECIALTY_CONDITIONS = {
-    "Cardiology": ["Heart Attack", "Stroke", "Hypertension"],
-    "Neurology": ["Stroke", "Migraine", "Epilepsy"],
-    "Orthopedics": ["Fracture", "Broken Arm", "Arthritis"],
-    "Pediatrics": ["Fever", "Infection", "Asthma"],
-    "General": ["Fever", "Cold", "Infection", "Diabetes"],
-    "Emergency": ["Heart Attack", "Stroke", "Fracture"]
-}
-
-# SIMPLE SCHEDULING ALGORITHM
-schedule = []
-doctor_patient_count = [0] * doctors
-
-for i in range(patients):
-    patient = patient_details[i] if i < len(patient_details) else {"Name": f"Patient {i+1}", "Disease": "Fever"}
-    patient_disease = patient.get("Disease", "Fever")
-    
-    # Find best doctor based on:
-    # 1. Perfect specialty match only (no partial matches for assignment)
-    # 2. Current load
-    # 3. Urgency level
-    
-    best_doctor_idx = -1  # Initialize to -1 (no doctor)
-    best_score = -1
-    has_perfect_specialty_match = False
-    required_specialty = None
-    
-    # First, check if the disease is in our specialty database
-    disease_exists_in_system = False
-    for specialty, conditions in SPECIALTY_CONDITIONS.items():
-        if patient_disease in conditions:
-            disease_exists_in_system = True
-            required_specialty = specialty
-            break
-    
-    # If disease is not in our system at all, no doctor can handle it
-    if not disease_exists_in_system:
-        schedule.append({
-            "Patient": i + 1,
-            "PatientName": patient.get("Name", f"Patient {i+1}"),
-            "Disease": patient_disease,
-            "Doctor": "-",
-            "DoctorName": "No specialist available",
-            "Specialty": "N/A",
-            "SpecialtyMatch": "Disease not in system",
-            "Urgency": urgency_list[i],
-            "FuzzyScore": fuzzy_scores[i],
-            "Bed": (i % beds) + 1 if beds > 0 else 1
-        })
-        continue
-    
-    # Look for a doctor with PERFECT specialty match
-    for doc_idx in range(doctors):
-        score = 0
-        
-        # Doctor info
-        doctor = doctor_details[doc_idx] if doc_idx < len(doctor_details) else {"Name": f"Dr. {doc_idx+1}", "Specialty": "General"}
-        doctor_specialty = doctor.get("Specialty", "General")
-        
-        # Check for PERFECT specialty match (doctor's specialty matches disease exactly)
-        if doctor_specialty in SPECIALTY_CONDITIONS:
-            if patient_disease in SPECIALTY_CONDITIONS[doctor_specialty]:
-                # PERFECT MATCH - this doctor can treat this patient
-                has_perfect_specialty_match = True
-                
-                # Start with perfect match bonus
-                score += 40
-                
-                # 2. Load balancing (30 points max)
-                current_load = doctor_patient_count[doc_idx]
-                avg_load = patients / max(doctors, 1)
-                if current_load < avg_load:
-                    score += 30 * (1 - current_load/avg_load)
-                
-                # 3. Urgency matching (30 points max) - use fuzzy score (0..1) for smoother scaling
-                f = fuzzy_scores[i] if i < len(fuzzy_scores) else min(max((urgency_list[i]-1)/9.0,0.0),1.0)
-                if doc_idx == 0:  # Doctor 1 (most senior)
-                    score += 30 * f
-                elif doc_idx == 1:  # Doctor 2
-                    score += 25 * f
-                else:
-                    score += 20 * f
-                
-                if score > best_score:
-                    best_score = score
-                    best_doctor_idx = doc_idx
-    
-    # Check if we found a perfect match doctor
-    if has_perfect_specialty_match and best_doctor_idx != -1:
-        # Assign patient to the best matching doctor
-        doctor_patient_count[best_doctor_idx] += 1
-
-        # Get doctor details
-        doctor = doctor_details[best_doctor_idx] if best_doctor_idx < len(doctor_details) else {"Name": f"Dr. {best_doctor_idx+1}", "Specialty": "General"}
-
-        schedule.append({
-            "Patient": i + 1,
-            "PatientName": patient.get("Name", f"Patient {i+1}"),
-            "Disease": patient_disease,
-            "Doctor": best_doctor_idx + 1,
-            "DoctorName": doctor.get("Name", f"Dr. {best_doctor_idx+1}"),
-            "Specialty": doctor.get("Specialty", "General"),
-            "SpecialtyMatch": "Perfect Match",
-            "Urgency": urgency_list[i],
-            "FuzzyScore": fuzzy_scores[i],
-            "Bed": (i % beds) + 1 if beds > 0 else 1
-        })
-        # record assignment (0-based index)
-        assign_val = best_doctor_idx
-    else:
-        # No perfect match doctor found
-        # Check if disease exists in system but no matching doctor
-        if required_specialty:
-            # Disease exists but no doctor with that specialty
+def run_decomposed_engine(data, use_ga, roster=None):
+    """Solve by connected components (decompose.py); returns the schedule or None if it failed"""
+    try:
+        import decompose
+        engine = str(data.get('DecomposeEngine', 'ga' if use_ga else 'greedy')).lower()
+        workers = int(data.get('DecomposeWorkers', os.cpu_count() or 1))
+        return decompose.run_decomposed(data, results_folder, engine=engine, workers=workers, roster=roster)
+    except Exception as de:
+        print(f"DEBUG: Decomposed run failed, falling back to the whole-problem scheduler: {de}", file=sys.stderr)
+        return None
+
+
+def greedy_schedule(doctors, patients, beds, urgency_list, doctor_details, patient_details, roster=None):
+    """SIMPLE SCHEDULING ALGORITHM - returns (schedule, assignments, doctor_patient_count)"""
+    # Parse the details once: names plus interned disease / specialty codes (small ints)
+    from scheduling_problem import Roster
+    if roster is None:
+        roster = Roster.from_details(doctors, patients, doctor_details, patient_details, urgency_list)
+    urgency = roster.urgency.tolist()
+    fuzzy_scores = [round(calculate_fuzzy_score(u), 3) for u in urgency]
+
+    schedule = []
+    assignments = []
+    doctor_patient_count = [0] * doctors
+
+    # Compatible doctors per disease code (CSR lists), so each patient only scans its k candidates
+    indptr, indices = roster.candidate_lists(SPECIALTY_CONDITIONS)
+    candidate_lists = [indices[indptr[c]:indptr[c + 1]].tolist() for c in range(len(indptr) - 1)]
+    # First specialty that treats each disease code (None -> disease not in our system)
+    required_specialties = roster.required_specialties(SPECIALTY_CONDITIONS)
+    disease_names, specialty_names = roster.disease_names, roster.specialty_names
+    specialty_code = roster.specialty_code.tolist()
+    avg_load = patients / max(doctors, 1)
+
+    for i, code in enumerate(roster.disease_code.tolist()):
+        patient_name = roster.patient_names[i]
+        patient_disease = disease_names[code]
+        f = fuzzy_scores[i]
+        bed = (i % beds) + 1 if beds > 0 else 1
+
+        # Find best doctor based on:
+        # 1. Perfect specialty match only (no partial matches for assignment)
+        # 2. Current load
+        # 3. Urgency level
+
+        best_doctor_idx = -1  # Initialize to -1 (no doctor)
+        best_score = -1
+        required_specialty = required_specialties[code]
+
+        # If disease is not in our system at all, no doctor can handle it
+        if required_specialty is None:
             schedule.append({
                 "Patient": i + 1,
-                "PatientName": patient.get("Name", f"Patient {i+1}"),
+                "PatientName": patient_name,
                 "Disease": patient_disease,
                 "Doctor": "-",
-                "DoctorName": "Referral needed",
+                "DoctorName": "No specialist available",
                 "Specialty": "N/A",
-                "SpecialtyMatch": f"Refer to {required_specialty}",
-                "Urgency": urgency_list[i],
-                "FuzzyScore": fuzzy_scores[i],
-                "Bed": (i % beds) + 1 if beds > 0 else 1
+                "SpecialtyMatch": "Disease not in system",
+                "Urgency": urgency[i],
+                "FuzzyScore": f,
+                "Bed": bed
             })
+            continue
+
+        # Look for a doctor with PERFECT specialty match (only the specialty-compatible candidates)
+        for doc_idx in candidate_lists[code]:
+            # PERFECT MATCH - this doctor can treat this patient
+            # Start with perfect match bonus
+            score = 40
+
+            # 2. Load balancing (30 points max)
+            current_load = doctor_patient_count[doc_idx]
+            if current_load < avg_load:
+                score += 30 * (1 - current_load/avg_load)
+
+            # 3. Urgency matching (30 points max) - use fuzzy score (0..1) for smoother scaling
+            if doc_idx == 0:  # Doctor 1 (most senior)
+                score += 30 * f
+            elif doc_idx == 1:  # Doctor 2
+                score += 25 * f
+            else:
+                score += 20 * f
+
+            if score > best_score:
+                best_score = score
+                best_doctor_idx = doc_idx
+
+        # Check if we found a perfect match doctor
+        if best_doctor_idx != -1:
+            # Assign patient to the best matching doctor
+            doctor_patient_count[best_doctor_idx] += 1
+
+            schedule.append({
+                "Patient": i + 1,
+                "PatientName": patient_name,
+                "Disease": patient_disease,
+                "Doctor": best_doctor_idx + 1,
+                "DoctorName": roster.doctor_names[best_doctor_idx],
+                "Specialty": specialty_names[specialty_code[best_doctor_idx]],
+                "SpecialtyMatch": "Perfect Match",
+                "Urgency": urgency[i],
+                "FuzzyScore": f,
+                "Bed": bed
+            })
+            # record assignment (0-based index)
+            assign_val = best_doctor_idx
         else:
-            # Should not reach here due to earlier check, but just in case
+            # Disease exists in the system but no doctor with that specialty
             schedule.append({
                 "Patient": i + 1,
-                "PatientName": patient.get("Name", f"Patient {i+1}"),
+                "PatientName": patient_name,
                 "Disease": patient_disease,
                 "Doctor": "-",
-                "DoctorName": "No specialist available",
+                "DoctorName": "Referral needed",
                 "Specialty": "N/A",
-                "SpecialtyMatch": "No Match",
-                "Urgency": urgency_list[i],
-                "FuzzyScore": fuzzy_scores[i],
-                "Bed": (i % beds) + 1 if beds > 0 else 1
+                "SpecialtyMatch": f"Refer to {required_specialty}",
+                "Urgency": urgency[i],
+                "FuzzyScore": f,
+                "Bed": bed
             })
-        assign_val = -1
+            assign_val = -1
 
-    # append assignment to assignments list
-    try:
+        # append assignment to assignments list
         assignments.append(assign_val)
-    except NameError:
-        assignments = [assign_val]
-
-# SAVE OUTPUT JSON
-output_json = os.path.join(results_folder, "output.json")
-with open(output_json, "w") as f:
-    json.dump(schedule, f, indent=2)
-print(f"DEBUG: Saved schedule to {output_json}", file=sys.stderr)
-
-# CREATE REAL CONVERGENCE-LIKE GRAPH BASED ON ASSIGNMENT EVALUATION
-
-# --- START OF GRAPH FIX ---
-try:
-    import matplotlib.pyplot as plt
-    from datetime import datetime
-
-    # 1. CALCULATE THE ACTUAL DATA FOR THE GRAPH
-    per_patient_score = []
-    # 'assignments' was created during the loop above
-    assigns = assignments if 'assignments' in globals() else [-1] * len(schedule)
-    
-    for item in schedule:
-        score = 0.0
-        match_type = item.get('SpecialtyMatch', '')
-        
-        if match_type == 'Perfect Match':
-            score = 1.0  # 100% quality for this patient
-        elif 'Refer' in match_type:
-            score = 0.3  # 30% quality (referral is okay but not ideal)
-        else:
-            score = 0.0  # 0% quality (no match)
-            
-        # Multiply by urgency so high urgency matches count for more
-        urgency_weight = float(item.get('FuzzyScore', 0.5))
-        per_patient_score.append(score * urgency_weight)
-
-    # 2. CREATE THE RUNNING AVERAGE (The "Convergence" line)
-    running_avg = []
-    cumulative_sum = 0.0
-    for idx, val in enumerate(per_patient_score, start=1):
-        cumulative_sum += val
-        # Calculate percentage: (actual / max possible) * 100
-        running_avg.append((cumulative_sum / idx) * 100.0)
-
-    # 3. PREPARE X and Y
-    y = running_avg
-    x = list(range(1, len(y) + 1))
-
-    # 4. PLOT THE GRAPH
-    plt.figure(figsize=(10, 6))
-    
-    # Add a timestamp to the title so you can prove it's new
-    timestamp = datetime.now().strftime("%H:%M:%S")
-    
-    plt.plot(x, y, color='#008080', linewidth=3, marker='o', markersize=8, label="Schedule Quality")
-    plt.fill_between(x, y, color='#008080', alpha=0.1) # Makes it look professional
-
-    plt.title(f'AI Optimization Quality over Time\n(Last Updated: {timestamp})', fontsize=14)
-    plt.xlabel('Number of Patients Assigned')
-    plt.ylabel('Match Success Rate (%)')
-    plt.ylim(0, 105)
-    plt.grid(True, linestyle='--', alpha=0.5)
-    plt.legend()
-    plt.tight_layout()
-
-    # 5. SAVE THE FILE
-    convergence_img = os.path.join(results_folder, 'convergence.png')
-    
-    # Ensure any old file is overwritten
-    if os.path.exists(convergence_img):
-        try:
-            os.remove(convergence_img)
-        except:
-            pass
-
-    plt.savefig(convergence_img, dpi=150)
-    plt.close()
-
-    print(f"DEBUG: Graph updated successfully at {timestamp}", file=sys.stderr)
-
-except Exception as e:
-    print(f"ERROR generating graph: {e}", file=sys.stderr)
-# --- END OF GRAPH FIX ---
-
-# CALCULATE STATISTICS
-perfect_matches = sum(1 for item in schedule if item["SpecialtyMatch"] == "Perfect Match")
-referral_needed = sum(1 for item in schedule if "Refer to" in item["SpecialtyMatch"])
-no_matches = sum(1 for item in schedule if item["SpecialtyMatch"] in ["No Match", "Disease not in system"])
-no_doctor_assigned = sum(1 for item in schedule if item["Doctor"] == "-")
-
-# SAVE METRICS
-metrics_file = os.path.join(results_folder, "metrics.csv")
-with open(metrics_file, "w") as f:
-    f.write("Metric,Value\n")
-    f.write("AI Technique,Fuzzy Logic + Rule-Based Matching\n")
-    f.write("Status,Success\n")
-    f.write(f"Total Doctors,{doctors}\n")
-    f.write(f"Total Patients,{patients}\n")
-    f.write(f"Total Beds,{beds}\n")
-    f.write(f"Perfect Specialty Matches,{perfect_matches}\n")
-    f.write(f"Referrals Needed,{referral_needed}\n")
-    f.write(f"No Matches,{no_matches}\n")
-    f.write(f"Patients without Doctor Assignment,{no_doctor_assigned}\n")
-    f.write(f"Match Success Rate,{round((perfect_matches/patients)*100, 1)}%\n")
-    f.write(f"Average Urgency,{round(sum(urgency_list)/len(urgency_list), 2)}\n")
-    f.write(f"Doctor Utilization,{round(sum(doctor_patient_count)/doctors, 1)} patients/doctor\n")
-
-print(f"DEBUG: Saved metrics to {metrics_file}", file=sys.stderr)
-
-# FINAL SUCCESS MESSAGE
-print("=" * 50, file=sys.stderr)
-print("SUCCESS: Hospital scheduling completed!", file=sys.stderr)
-print(f"SUCCESS: {patients} patients processed", file=sys.stderr)
-print(f"SUCCESS: {perfect_matches} perfect specialty matches (assigned to doctors)", file=sys.stderr)
-print(f"SUCCESS: {referral_needed} patients need referral to other specialists", file=sys.stderr)
-print(f"SUCCESS: {no_doctor_assigned} patients without direct doctor assignment", file=sys.stderr)
-print("=" * 50, file=sys.stderr)
-
-# IMPORTANT: This line is what C# looks for
-print("SUCCESS — ALL FILES SAVED!")
\ No newline at end of file
+
+    return schedule, assignments, doctor_patient_count
+
+
+def save_convergence_graph(schedule, results_folder):
+    """CREATE REAL CONVERGENCE-LIKE GRAPH BASED ON ASSIGNMENT EVALUATION"""
+    try:
+        import matplotlib.pyplot as plt
+        from datetime import datetime
+
+        # 1. CALCULATE THE ACTUAL DATA FOR THE GRAPH
+        per_patient_score = []
+
+        for item in schedule:
+            score = 0.0
+            match_type = item.get('SpecialtyMatch', '')
+
+            if match_type == 'Perfect Match':
+                score = 1.0  # 100% quality for this patient
+            elif 'Refer' in match_type:
+                score = 0.3  # 30% quality (referral is okay but not ideal)
+            else:
+                score = 0.0  # 0% quality (no match)
+
+            # Multiply by urgency so high urgency matches count for more
+            urgency_weight = float(item.get('FuzzyScore', 0.5))
+            per_patient_score.append(score * urgency_weight)
+
+        # 2. CREATE THE RUNNING AVERAGE (The "Convergence" line)
+        running_avg = []
+        cumulative_sum = 0.0
+        for idx, val in enumerate(per_patient_score, start=1):
+            cumulative_sum += val
+            # Calculate percentage: (actual / max possible) * 100
+            running_avg.append((cumulative_sum / idx) * 100.0)
+
+        # 3. PREPARE X and Y
+        y = running_avg
+        x = list(range(1, len(y) + 1))
+
+        # 4. PLOT THE GRAPH
+        plt.figure(figsize=(10, 6))
+
+        # Add a timestamp to the title so you can prove it's new
+        timestamp = datetime.now().strftime("%H:%M:%S")
+
+        plt.plot(x, y, color='#008080', linewidth=3, marker='o', markersize=8, label="Schedule Quality")
+        plt.fill_between(x, y, color='#008080', alpha=0.1) # Makes it look professional
+
+        plt.title(f'AI Optimization Quality over Time\n(Last Updated: {timestamp})', fontsize=14)
+        plt.xlabel('Number of Patients Assigned')
+        plt.ylabel('Match Success Rate (%)')
+        plt.ylim(0, 105)
+        plt.grid(True, linestyle='--', alpha=0.5)
+        plt.legend()
+        plt.tight_layout()
+
+        # 5. SAVE THE FILE (written aside and renamed over the old one, so the UI never sees it missing)
+        convergence_img = os.path.join(results_folder, 'convergence.png')
+        save_figure(plt, convergence_img, dpi=150)
+        plt.close()
+
+        print(f"DEBUG: Graph updated successfully at {timestamp}", file=sys.stderr)
+
+    except Exception as e:
+        print(f"ERROR generating graph: {e}", file=sys.stderr)
+
+
+def main():
+    # an input file may be given on the command line; a .jsonl one is streamed (streaming_input.py)
+    path = sys.argv[1] if len(sys.argv) > 1 else input_file
+    print(f"DEBUG: Looking for input.json at: {path}", file=sys.stderr)
+
+    # READ input.json
+    try:
+        from streaming_input import load_input
+        data, roster = load_input(path)
+        print(f"DEBUG: Successfully read {os.path.basename(path)}", file=sys.stderr)
+    except Exception as e:
+        print(f"ERROR: Could not read input.json: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    # fingerprint the input as given (before defaults are filled in) for the result cache
+    # (streamed inputs are not cached: their records are never held as one dict to hash)
+    cache_key = result_cache.fingerprint(data) if roster is None and result_cache.is_cacheable(data) else None
+
+    # Extract data with fallbacks
+    doctors = int(data.get("Doctors", 3))
+    patients = int(data.get("Patients", 6))
+    beds = int(data.get("Beds", 4))
+    urgency_list = [int(x) for x in data.get("Urgency", [5,5,5,5,5,5])] if roster is None else roster.urgency.tolist()
+
+    # Get doctor and patient details (optional)
+    doctor_details = data.get("DoctorDetails", [])
+    patient_details = data.get("PatientDetails", [])
+
+    # Fill missing details (a streamed roster already has its defaults)
+    while roster is None and len(doctor_details) < doctors:
+        doctor_details.append({"Name": f"Dr. {len(doctor_details)+1}", "Specialty": "General"})
+
+    while roster is None and len(patient_details) < patients:
+        patient_details.append({"Name": f"Patient {len(patient_details)+1}", "Disease": "Fever", "Age": 30})
+
+    print(f"DEBUG: Doctors={doctors}, Patients={patients}, Beds={beds}", file=sys.stderr)
+    print(f"DEBUG: Urgency list: {urgency_list}", file=sys.stderr)
+
+    os.makedirs(results_folder, exist_ok=True)
+    print(f"DEBUG: Results folder: {results_folder}", file=sys.stderr)
+
+    # SAME INPUT AS A PREVIOUS RUN -> REUSE ITS RESULT FILES
+    if cache_key and result_cache.restore(cache_key, results_folder):
+        emit("scheduler.cache_hit", patients=patients, doctors=doctors)
+        print(f"DEBUG: Restored cached results {cache_key}", file=sys.stderr)
+        if result_cache.timestamped_plot(data):
+            # not cached: its "Last Updated" stamp has to show this run
+            with open(os.path.join(results_folder, "output.json")) as f:
+                save_convergence_graph(json.load(f), results_folder)
+        print("SUCCESS — ALL FILES SAVED!")
+        sys.exit(0)
+
+    # Check input flag to decide whether to run GA
+    use_ga = False
+    try:
+        use_ga = bool(data.get("UseGA", False))
+    except Exception:
+        use_ga = False
+
+    # "Decompose": schedule each connected component of the patient-doctor graph on its own
+    if data.get("Decompose", False):
+        with span("scheduler.decompose", patients=patients, doctors=doctors):
+            decomposed = run_decomposed_engine(data, use_ga, roster)
+        # an empty roster gives an empty (but valid) schedule, so test for None
+        if decomposed is not None:
+            if cache_key:
+                result_cache.store(cache_key, results_folder, result_cache.result_files(data))
+            print("SUCCESS — ALL FILES SAVED!")
+            sys.exit(0)
+
+    if use_ga:
+        with span("scheduler.ga", patients=patients, doctors=doctors) as ga_span:
+            ga_schedule = run_ga_engine(data, roster)
+            ga_span.set(fallback=ga_schedule is None)
+        if ga_schedule is not None:
+            # scheduler_ga handles saving outputs and metrics
+            if cache_key:
+                result_cache.store(cache_key, results_folder, result_cache.result_files(data))
+            print("SUCCESS — ALL FILES SAVED!")
+            sys.exit(0)
+
+    with span("scheduler.greedy", patients=patients, doctors=doctors):
+        schedule, assignments, doctor_patient_count = greedy_schedule(
+            doctors, patients, beds, urgency_list, doctor_details, patient_details, roster)
+
+    # SAVE OUTPUT JSON
+    output_json = os.path.join(results_folder, "output.json")
+    write_json(output_json, schedule)
+    print(f"DEBUG: Saved schedule to {output_json}", file=sys.stderr)
+
+    with span("scheduler.convergence_graph", patients=patients):
+        save_convergence_graph(schedule, results_folder)
+
+    # CALCULATE STATISTICS
+    perfect_matches = sum(1 for item in schedule if item["SpecialtyMatch"] == "Perfect Match")
+    referral_needed = sum(1 for item in schedule if "Refer to" in item["SpecialtyMatch"])
+    no_matches = sum(1 for item in schedule if item["SpecialtyMatch"] in ["No Match", "Disease not in system"])
+    no_doctor_assigned = sum(1 for item in schedule if item["Doctor"] == "-")
+
+    # SAVE METRICS
+    metrics_file = os.path.join(results_folder, "metrics.csv")
+    with atomic_open(metrics_file) as f:
+        f.write("Metric,Value\n")
+        f.write("AI Technique,Fuzzy Logic + Rule-Based Matching\n")
+        f.write("Status,Success\n")
+        f.write(f"Total Doctors,{doctors}\n")
+        f.write(f"Total Patients,{patients}\n")
+        f.write(f"Total Beds,{beds}\n")
+        f.write(f"Perfect Specialty Matches,{perfect_matches}\n")
+        f.write(f"Referrals Needed,{referral_needed}\n")
+        f.write(f"No Matches,{no_matches}\n")
+        f.write(f"Patients without Doctor Assignment,{no_doctor_assigned}\n")
+        f.write(f"Match Success Rate,{round((perfect_matches/patients)*100 if patients>0 else 0, 1)}%\n")
+        f.write(f"Average Urgency,{round(sum(urgency_list)/len(urgency_list), 2) if len(urgency_list)>0 else 0}\n")
+        f.write(f"Doctor Utilization,{round(sum(doctor_patient_count)/doctors, 1)} patients/doctor\n")
+
+    print(f"DEBUG: Saved metrics to {metrics_file}", file=sys.stderr)
+
+    # after a GA / decomposition failure these are fallback files: not stored, so the
+    # requested engine is tried again on the next run
+    if cache_key and not use_ga and not data.get("Decompose", False):
+        result_cache.store(cache_key, results_folder, result_cache.result_files(data))
+
+    # FINAL SUCCESS MESSAGE
+    print("=" * 50, file=sys.stderr)
+    print("SUCCESS: Hospital scheduling completed!", file=sys.stderr)
+    print(f"SUCCESS: {patients} patients processed", file=sys.stderr)
+    print(f"SUCCESS: {perfect_matches} perfect specialty matches (assigned to doctors)", file=sys.stderr)
+    print(f"SUCCESS: {referral_needed} patients need referral to other specialists", file=sys.stderr)
+    print(f"SUCCESS: {no_doctor_assigned} patients without direct doctor assignment", file=sys.stderr)
+    print("=" * 50, file=sys.stderr)
+
+    # IMPORTANT: This line is what C# looks for
+    print("SUCCESS — ALL FILES SAVED!")
+
+
+# Guarded so GA worker processes (spawned on Windows) can import this file safely
+if __name__ == "__main__":
+    # --profile / MEDIMATCH_PROFILE=cprofile|sample writes a profile to Results/profiles/
+    with profiled("scheduler"):
+        main()
@@ -1,11 +1,3 @@
-import json
-import os
-import random
-import math
-import numpy as np
-import matplotlib.pyplot as plt
-import sys
-
 """
 Simple GA-based scheduler for hospital patient -> doctor assignment.
 This module exposes run_ga(input_data, results_folder) which returns the schedule list
@@ -13,8 +5,32 @@ and writes output.json, convergence.png, metrics.csv similar to scheduler.py exp
 
 Representation: individual is a list of length N_patients, each gene is doctor index (0..doctors-1) or -1 for referral.
 Fitness: maximize specialty match and urgency handling, minimize load imbalance and referrals when avoidable.
+
+Randomness: every draw comes from an explicit numpy.random.Generator. run_ga() builds one
+SeedSequence from the seed and spawns one child stream per island, so the same seed gives the
+same schedule whether the islands run in one process or across a pool of workers. Populations
+are int arrays and each generation draws its tournament, crossover and mutation numbers in bulk.
+
+Elites keep their fitness from the previous generation, and the children's fitness goes
+through a per-genome memo (scheduling_problem.FitnessMemo, LRU of memo_size entries,
+0 = off) that catches offspring identical to genomes already seen; its hit rate is
+reported in metrics.csv.
 """
 
+import json
+import os
+import math
+import hashlib
+import numpy as np
+import sys
+
+from scheduling_problem import SPECIALTY_CONDITIONS
+from result_writer import atomic_open, write_json, save_figure
+from instrumentation import span, emit
+from profiling import profiled
+
+DEFAULT_MEMO_SIZE = 4096
+
 
 def fitness_fn(individual, patient_details, doctor_details, urgency_list, specialties_db, doctors):
     # compute fitness where higher is better
@@ -67,177 +83,379 @@ def fitness_fn(individual, patient_details, doctor_details, urgency_list, specia
     return score
 
 
-def random_individual(patients, doctors):
-    # random assignment with some referrals allowed
-    ind = []
-    for i in range(patients):
-        if random.random() < 0.08:
-            ind.append(-1)
-        else:
-            ind.append(random.randrange(0, doctors))
+def seed_sequence(seed):
+    # GASeed may arrive as an int or a string from input.json
+    if seed is None:
+        return np.random.SeedSequence()
+    try:
+        return np.random.SeedSequence(abs(int(seed)))
+    except (TypeError, ValueError):
+        return np.random.SeedSequence(int.from_bytes(hashlib.sha256(str(seed).encode()).digest()[:16], "little"))
+
+
+def random_individual(patients, doctors, rng, problem=None):
+    # random assignment with some referrals allowed; with a problem, doctors come from
+    # each patient's specialty-compatible candidate list
+    if problem is not None:
+        ind = problem.sample_doctors(np.arange(patients), rng)
+    else:
+        ind = rng.integers(0, max(doctors, 1), size=patients)
+    ind[rng.random(patients) < 0.08] = -1
     return ind
 
 
-def mutate(ind, doctors, mutation_rate=0.05):
-    for i in range(len(ind)):
-        if random.random() < mutation_rate:
-            if random.random() < 0.08:
-                ind[i] = -1
-            else:
-                ind[i] = random.randrange(0, doctors)
+def mutate(ind, doctors, rng, mutation_rate=0.05, problem=None):
+    # in place, for a numpy individual or a plain list
+    genes = np.asarray(ind)
+    mutate_batch(genes.reshape(1, -1), doctors, mutation_rate, rng, problem)
+    if genes is not ind:
+        ind[:] = genes.tolist()
 
 
-def crossover(a, b):
+def crossover(a, b, rng):
     # two-point crossover
-    n = len(a)
-    if n < 2:
-        return a[:], b[:]
-    i = random.randrange(0, n)
-    j = random.randrange(i, n)
-    child1 = a[:i] + b[i:j] + a[j:]
-    child2 = b[:i] + a[i:j] + b[j:]
-    return child1, child2
+    child1, child2 = two_point_crossover_batch(np.asarray(a).reshape(1, -1), np.asarray(b).reshape(1, -1), rng)
+    return child1[0], child2[0]
 
 
-def run_ga(input_data, results_folder, population_size=80, generations=120, mutation_rate=0.06, seed=None):
-    # seed RNGs when requested for reproducible runs
-    if seed is not None:
-        random.seed(seed)
-        np.random.seed(seed)
-
-    doctors = int(input_data.get("Doctors", 3))
-    patients = int(input_data.get("Patients", 6))
-    beds = int(input_data.get("Beds", 4))
-    urgency_list = [int(x) for x in input_data.get("Urgency", [5]*patients)]
-    doctor_details = input_data.get("DoctorDetails", [])
-    patient_details = input_data.get("PatientDetails", [])
-
-    # speciality db (same as scheduler.py)
-    SPECIALTY_CONDITIONS = {
-        "Cardiology": ["Heart Attack", "Stroke", "Hypertension"],
-        "Neurology": ["Stroke", "Migraine", "Epilepsy"],
-        "Orthopedics": ["Fracture", "Broken Arm", "Arthritis"],
-        "Pediatrics": ["Fever", "Infection", "Asthma"],
-        "General": ["Fever", "Cold", "Infection", "Diabetes"],
-        "Emergency": ["Heart Attack", "Stroke", "Fracture"]
-    }
+def two_point_crossover_batch(parents_a, parents_b, rng):
+    # two-point crossover for whole arrays of parent pairs (one row per pair)
+    n_pairs, n = parents_a.shape
+    if n < 2:
+        return parents_a.copy(), parents_b.copy()
+    i = rng.integers(0, n, size=n_pairs)
+    j = rng.integers(i, n)
+    cols = np.arange(n)
+    swap = (cols >= i[:, None]) & (cols < j[:, None])
+    child1 = np.where(swap, parents_b, parents_a)
+    child2 = np.where(swap, parents_a, parents_b)
+    return child1, child2
 
-    # initialize population
-    population = [random_individual(patients, doctors) for _ in range(population_size)]
-
-    # seed with some heuristic-based individuals (greedy assignment)
-    def heuristic_seed():
-        ind = [-1] * patients
-        doctor_load = [0] * doctors
-        for i in range(patients):
-            disease = patient_details[i].get("Disease", "Fever") if i < len(patient_details) else "Fever"
-            best_doc = -1
-            for d in range(doctors):
-                doc_spec = doctor_details[d].get("Specialty", "General") if d < len(doctor_details) else "General"
-                if doc_spec in SPECIALTY_CONDITIONS and disease in SPECIALTY_CONDITIONS[doc_spec]:
-                    best_doc = d
-                    break
-            if best_doc >= 0:
-                ind[i] = best_doc
-                doctor_load[best_doc] += 1
-            else:
-                ind[i] = -1
-        return ind
-
-    for _ in range(min(6, population_size)):
-        population.append(heuristic_seed())
-
-    # evaluate
-    fitnesses = [fitness_fn(ind, patient_details, doctor_details, urgency_list, SPECIALTY_CONDITIONS, doctors) for ind in population]
-
-    best_fitness_history = []
-    best_individual = None
-    best_fit = -1e9
-
-    for gen in range(generations):
-        # selection (tournament)
-        new_pop = []
-        elites = sorted(zip(fitnesses, population), key=lambda x: x[0], reverse=True)[:max(1, int(0.05 * population_size))]
-        # keep elites
-        for f, ind in elites:
-            new_pop.append(ind[:])
-            if f > best_fit:
-                best_fit = f
-                best_individual = ind[:]
-
-        while len(new_pop) < population_size:
-            # tournament
-            contenders = random.sample(list(zip(fitnesses, population)), k=min(4, len(population)))
-            parent_a = max(contenders, key=lambda x: x[0])[1]
-            contenders = random.sample(list(zip(fitnesses, population)), k=min(4, len(population)))
-            parent_b = max(contenders, key=lambda x: x[0])[1]
-
-            # crossover
-            child1, child2 = crossover(parent_a, parent_b)
-
-            # mutate using provided mutation_rate
-            mutate(child1, doctors, mutation_rate=mutation_rate)
-            mutate(child2, doctors, mutation_rate=mutation_rate)
-
-            new_pop.append(child1)
-            if len(new_pop) < population_size:
-                new_pop.append(child2)
-
-        population = new_pop
-        fitnesses = [fitness_fn(ind, patient_details, doctor_details, urgency_list, SPECIALTY_CONDITIONS, doctors) for ind in population]
-
-        gen_best = max(fitnesses)
-        best_fitness_history.append(gen_best)
 
-        # simple early stopping
-        if gen > 10 and abs(best_fitness_history[-1] - best_fitness_history[-2]) < 1e-6:
-            break
+def mutate_batch(pop, doctors, mutation_rate, rng, problem=None):
+    # each gene mutates with mutation_rate; a mutated gene becomes a referral 8% of the time,
+    # otherwise a random doctor (from the patient's candidate list when a problem is given).
+    # All random numbers are drawn for the population at once.
+    hit = rng.random(pop.shape) < mutation_rate
+    rows, cols = np.nonzero(hit)
+    if problem is not None:
+        new_genes = problem.sample_doctors(cols, rng)
+    else:
+        new_genes = rng.integers(0, max(doctors, 1), size=len(cols))
+    new_genes[rng.random(len(cols)) < 0.08] = -1
+    pop[rows, cols] = new_genes
+    return pop
+
+
+def heuristic_seed(patients, doctors, patient_details, doctor_details, problem=None):
+    # greedy assignment: first doctor with a perfect specialty match, else referral
+    if problem is None:
+        from scheduling_problem import Roster
+        roster = Roster.from_details(doctors, patients, doctor_details, patient_details)
+        codes = roster.disease_code
+        indptr, indices = roster.candidate_lists(SPECIALTY_CONDITIONS)
+    else:
+        codes, indptr, indices = problem.disease_code, problem.cand_indptr, problem.cand_indices
+    has = indptr[codes + 1] > indptr[codes]
+    ind = np.full(patients, -1, dtype=np.int64)
+    if indices.size:
+        ind[has] = indices[indptr[codes[has]]]
+    return ind.tolist()
+
+
+def build_schedule(individual, patient_details, doctor_details, urgency_list, beds, roster=None):
+    # turn an assignment vector into the output.json rows the UI reads
+    from scheduling_problem import Roster
+    genes = [-1 if assign is None else int(assign) for assign in individual]
+    if roster is None or roster.doctors <= max(genes, default=-1):
+        # genes past the roster get the usual "Dr. n" / General stand-in
+        roster = Roster.from_details(max(len(doctor_details), max(genes, default=-1) + 1), len(genes),
+                                     doctor_details, patient_details, urgency_list)
+    disease_names, specialty_names = roster.disease_names, roster.specialty_names
+    # match label per (specialty code, disease code), instead of list scans per patient
+    labels = [["Perfect Match" if spec in SPECIALTY_CONDITIONS and disease in SPECIALTY_CONDITIONS[spec]
+               else ("Generalist" if spec == "General" else "Partial/No Match") for disease in disease_names]
+              for spec in specialty_names]
+    specialty_code = roster.specialty_code.tolist()
+    # patients past the end of urgency_list show urgency 5 with a neutral fuzzy score
+    urgency = roster.urgency.tolist()
+    fuzzy = [round(min(max((u - 1) / 9.0, 0.0), 1.0), 3) if i < len(urgency_list) else 0.5
+             for i, u in enumerate(urgency)]
 
-    # build schedule from best_individual
     schedule = []
-    if best_individual is None:
-        best_individual = population[0]
-
-    for i, assign in enumerate(best_individual):
-        patient = patient_details[i] if i < len(patient_details) else {"Name": f"Patient {i+1}", "Disease": "Fever"}
-        disease = patient.get("Disease", "Fever")
-        if assign is None or assign < 0:
+    for i, (assign, code) in enumerate(zip(genes, roster.disease_code.tolist())):
+        if assign < 0:
             schedule.append({
                 "Patient": i+1,
-                "PatientName": patient.get("Name", f"Patient {i+1}"),
-                "Disease": disease,
+                "PatientName": roster.patient_names[i],
+                "Disease": disease_names[code],
                 "Doctor": "-",
                 "DoctorName": "Referral needed",
                 "Specialty": "N/A",
                 "SpecialtyMatch": "Referral",
-                "Urgency": urgency_list[i] if i < len(urgency_list) else 5,
-                "FuzzyScore": round(min(max((urgency_list[i]-1)/9.0, 0.0),1.0), 3) if i < len(urgency_list) else 0.5,
+                "Urgency": urgency[i],
+                "FuzzyScore": fuzzy[i],
                 "Bed": (i % beds) + 1 if beds > 0 else 1
             })
         else:
-            doc = doctor_details[assign] if assign < len(doctor_details) else {"Name": f"Dr. {assign+1}", "Specialty": "General"}
-            doc_spec = doc.get("Specialty", "General")
-            match = "Perfect Match" if doc_spec in SPECIALTY_CONDITIONS and disease in SPECIALTY_CONDITIONS[doc_spec] else ("Generalist" if doc_spec=="General" else "Partial/No Match")
+            spec = specialty_code[assign]
             schedule.append({
                 "Patient": i+1,
-                "PatientName": patient.get("Name", f"Patient {i+1}"),
-                "Disease": disease,
+                "PatientName": roster.patient_names[i],
+                "Disease": disease_names[code],
                 "Doctor": assign+1,
-                "DoctorName": doc.get("Name", f"Dr. {assign+1}"),
-                "Specialty": doc_spec,
-                "SpecialtyMatch": match,
-                "Urgency": urgency_list[i] if i < len(urgency_list) else 5,
-                "FuzzyScore": round(min(max((urgency_list[i]-1)/9.0, 0.0),1.0), 3) if i < len(urgency_list) else 0.5,
+                "DoctorName": roster.doctor_names[assign],
+                "Specialty": specialty_names[spec],
+                "SpecialtyMatch": labels[spec][code],
+                "Urgency": urgency[i],
+                "FuzzyScore": fuzzy[i],
                 "Bed": (i % beds) + 1 if beds > 0 else 1
             })
+    return schedule
+
+
+def write_metrics(metrics_file, schedule, technique, doctors, patients, beds, urgency_list, extra_rows=()):
+    # metrics.csv in the Metric,Value layout the UI parses
+    # GA schedules say "Referral" / "Partial/No Match", greedy ones "Refer to <Specialty>" /
+    # "Disease not in system" (counted as in scheduler.py)
+    perfect_matches = sum(1 for item in schedule if item["SpecialtyMatch"] == "Perfect Match")
+    referral_needed = sum(1 for item in schedule
+                          if item["SpecialtyMatch"] == "Referral" or "Refer to" in item["SpecialtyMatch"])
+    no_matches = sum(1 for item in schedule
+                     if item["SpecialtyMatch"] in ["Partial/No Match", "Referral", "No Match", "Disease not in system"])
+    no_doctor_assigned = sum(1 for item in schedule if item["Doctor"] == "-")
+
+    with atomic_open(metrics_file) as f:
+        f.write('Metric,Value\n')
+        f.write(f'AI Technique,{technique}\n')
+        f.write('Status,Success\n')
+        f.write(f'Total Doctors,{doctors}\n')
+        f.write(f'Total Patients,{patients}\n')
+        f.write(f'Total Beds,{beds}\n')
+        f.write(f'Perfect Specialty Matches,{perfect_matches}\n')
+        f.write(f'Referrals Needed,{referral_needed}\n')
+        f.write(f'No Matches,{no_matches}\n')
+        f.write(f'Patients without Doctor Assignment,{no_doctor_assigned}\n')
+        f.write(f'Match Success Rate,{round((perfect_matches/patients)*100 if patients>0 else 0, 1)}%\n')
+        f.write(f'Average Urgency,{round(sum(urgency_list)/len(urgency_list), 2) if len(urgency_list)>0 else 0}\n')
+        for name, value in extra_rows:
+            f.write(f'{name},{value}\n')
+
+
+def _new_island(problem, population_size, rng, memo=None):
+    # random population plus a few greedy seeds, drawn from this island's own stream
+    patients, doctors = problem.patients, problem.doctors
+    population = [random_individual(patients, doctors, rng, problem) for _ in range(population_size)]
+    seed_ind = heuristic_seed(patients, doctors, problem.patient_details, problem.doctor_details, problem)
+    population += [np.array(seed_ind, dtype=np.int64)] * min(6, population_size)
+    # explicit row count: with no patients -1 could not be inferred from the 0 columns
+    population = np.array(population, dtype=np.int64).reshape(len(population), patients)
+    return {
+        "rng": rng,
+        "population": population,
+        "fitnesses": (memo or problem).fitness(population),
+        "history": [],
+        "best_fit": -1e9,
+        "best_individual": None,
+        "stopped": False,
+        # fitness memo lookups / hits while evolving this island (metrics.csv)
+        "memo_lookups": 0,
+        "memo_hits": 0,
+        "memo_bypassed": 0,
+    }
+
+
+def _evolve_island(island, problem, n_gens, population_size, mutation_rate, memo=None):
+    rng = island["rng"]
+    evaluate = memo or problem
+    lookups, hits, bypassed = (memo.lookups, memo.hits, memo.bypassed) if memo else (0, 0, 0)
+    population, fitnesses = island["population"], island["fitnesses"]
+    history = island["history"]
+    n_elite = max(1, int(0.05 * population_size))
+    n_children = population_size - n_elite
+
+    for _ in range(n_gens):
+        if island["stopped"]:
+            break
+        with span("ga.generation", island=island.get("index", 0), gen=len(history) + 1) as gen_span:
+            # keep elites
+            elite_idx = np.argsort(-fitnesses, kind="stable")[:n_elite]
+            if fitnesses[elite_idx[0]] > island["best_fit"]:
+                island["best_fit"] = float(fitnesses[elite_idx[0]])
+                island["best_individual"] = population[elite_idx[0]].copy()
+
+            children = np.empty((0, population.shape[1]), dtype=np.int64)
+            if n_children > 0:
+                # selection (tournament of 4), all contenders drawn at once
+                n_pairs = (n_children + 1) // 2
+                contenders = rng.integers(0, len(population), size=(2 * n_pairs, min(4, len(population))))
+                winners = contenders[np.arange(2 * n_pairs), np.argmax(fitnesses[contenders], axis=1)]
+
+                # crossover, children interleaved as (child1, child2) pairs
+                child1, child2 = two_point_crossover_batch(population[winners[:n_pairs]], population[winners[n_pairs:]], rng)
+                children = np.empty((2 * n_pairs, population.shape[1]), dtype=np.int64)
+                children[0::2], children[1::2] = child1, child2
+
+                # mutate using provided mutation_rate
+                children = mutate_batch(children[:n_children], problem.doctors, mutation_rate, rng, problem)
+
+            # elites are unchanged copies: keep their fitness, score only the children
+            population = np.vstack([population[elite_idx], children])
+            fitnesses = np.concatenate([fitnesses[elite_idx], evaluate.fitness(children)])
+            history.append(float(fitnesses.max()))
+            gen_span.set(population=len(population), best_fitness=history[-1])
+
+        # simple early stopping
+        if len(history) > 11 and abs(history[-1] - history[-2]) < 1e-6:
+            island["stopped"] = True
+
+    island["population"], island["fitnesses"] = population, fitnesses
+    if memo:
+        island["memo_lookups"] += memo.lookups - lookups
+        island["memo_hits"] += memo.hits - hits
+        island["memo_bypassed"] += memo.bypassed - bypassed
+    return island
+
+
+# per-process problem and fitness memo for GA worker pools (built once by the pool initializer)
+_WORKER_PROBLEM = None
+_WORKER_MEMO = None
+
+
+def _init_worker(input_data, memo_size, roster=None):
+    global _WORKER_PROBLEM, _WORKER_MEMO
+    from scheduling_problem import SchedulingProblem, FitnessMemo
+    _WORKER_PROBLEM = SchedulingProblem(input_data, roster=roster)
+    _WORKER_MEMO = FitnessMemo(_WORKER_PROBLEM, memo_size) if memo_size > 0 else None
+
+
+def _evolve_island_worker(args):
+    island, n_gens, population_size, mutation_rate = args
+    return _evolve_island(island, _WORKER_PROBLEM, n_gens, population_size, mutation_rate, _WORKER_MEMO)
+
+
+def search(problem, input_data, population_size=80, generations=120, mutation_rate=0.06, seed=None,
+           local_search=None, local_search_time=1.0, islands=1, workers=1, migration_interval=10,
+           memo_size=DEFAULT_MEMO_SIZE):
+    """Evolve the islands and return the best assignment found, without writing any files.
+
+    Returns a dict with best_individual, best_fit, history (global best fitness per
+    generation), ls_stats (local search, or None) and the fitness memo counters.
+    """
+    from scheduling_problem import FitnessMemo
+
+    # one independent stream per island; results depend on the seed and island count only
+    islands = max(1, int(islands))
+    seq = seed_sequence(seed)
+    # fitness memo (shared by the islands of this process; worker processes keep their own)
+    memo_size = max(0, int(memo_size or 0))
+    memo = FitnessMemo(problem, memo_size) if memo_size > 0 else None
+    island_states = [_new_island(problem, population_size, np.random.default_rng(s), memo) for s in seq.spawn(islands)]
+    for k, isl in enumerate(island_states):
+        isl["index"] = k
+
+    pool = None
+    if workers > 1 and islands > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        pool = ProcessPoolExecutor(max_workers=min(workers, islands), initializer=_init_worker,
+                                   initargs=(input_data, memo_size, problem.roster))
+
+    try:
+        done = 0
+        epoch = generations if islands == 1 else max(1, migration_interval)
+        while done < generations and not all(isl["stopped"] for isl in island_states):
+            n_gens = min(epoch, generations - done)
+            if pool is not None:
+                island_states = list(pool.map(_evolve_island_worker,
+                                              [(isl, n_gens, population_size, mutation_rate) for isl in island_states]))
+            else:
+                island_states = [_evolve_island(isl, problem, n_gens, population_size, mutation_rate, memo)
+                                 for isl in island_states]
+            done += n_gens
+
+            # ring migration: each island's best replaces the worst of the next island
+            if islands > 1:
+                migrants = [(isl["population"][int(np.argmax(isl["fitnesses"]))].copy(), isl["fitnesses"].max())
+                            for isl in island_states]
+                for k, isl in enumerate(island_states):
+                    if isl["stopped"]:
+                        continue
+                    worst = int(np.argmin(isl["fitnesses"]))
+                    isl["population"][worst], isl["fitnesses"][worst] = migrants[k - 1]
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    # best over all islands (the final populations included)
+    best_individual, best_fit = None, -1e9
+    for isl in island_states:
+        if isl["best_individual"] is not None and isl["best_fit"] > best_fit:
+            best_fit, best_individual = isl["best_fit"], isl["best_individual"]
+        top = int(np.argmax(isl["fitnesses"]))
+        if isl["fitnesses"][top] > best_fit:
+            best_fit, best_individual = float(isl["fitnesses"][top]), isl["population"][top].copy()
+
+    # global best fitness per generation (islands that stopped early keep their last value)
+    longest = max(len(isl["history"]) for isl in island_states)
+    best_fitness_history = [
+        max(isl["history"][min(g, len(isl["history"]) - 1)] for isl in island_states if isl["history"])
+        for g in range(longest)
+    ]
+
+    # optional local-search polish of the GA winner ("hill" or "anneal")
+    ls_stats = None
+    if local_search:
+        from local_search import refine
+        with span("ga.local_search", method=local_search, time_limit=local_search_time):
+            best_individual, _, ls_stats = refine(best_individual, problem, time_limit=local_search_time,
+                                                  method=local_search, seed=seq.spawn(1)[0])
+        print(f"DEBUG: GA local search {ls_stats}", file=sys.stderr)
+
+    return {
+        "best_individual": best_individual,
+        "best_fit": best_fit,
+        "history": best_fitness_history,
+        "ls_stats": ls_stats,
+        "memo_lookups": sum(isl["memo_lookups"] for isl in island_states),
+        "memo_hits": sum(isl["memo_hits"] for isl in island_states),
+        "memo_bypassed": sum(isl["memo_bypassed"] for isl in island_states),
+    }
+
+
+def run_ga(input_data, results_folder, population_size=80, generations=120, mutation_rate=0.06, seed=None,
+           local_search=None, local_search_time=1.0, islands=1, workers=1, migration_interval=10,
+           memo_size=DEFAULT_MEMO_SIZE, roster=None):
+    from scheduling_problem import SchedulingProblem
+
+    # roster: patients / doctors already parsed from a streamed input (streaming_input.py)
+    problem = SchedulingProblem(input_data, roster=roster)
+    doctors, patients, beds = problem.doctors, problem.patients, problem.beds
+    urgency_list = [int(x) for x in input_data["Urgency"]] if "Urgency" in input_data else problem.urgency_list
+    doctor_details, patient_details = problem.doctor_details, problem.patient_details
+
+    result = search(problem, input_data, population_size, generations, mutation_rate, seed,
+                    local_search, local_search_time, islands, workers, migration_interval, memo_size)
+    best_individual, best_fit = result["best_individual"], result["best_fit"]
+    best_fitness_history, ls_stats = result["history"], result["ls_stats"]
+    islands = max(1, int(islands))
+    memo_size = max(0, int(memo_size or 0))
+    memo_lookups, memo_hits, memo_bypassed = result["memo_lookups"], result["memo_hits"], result["memo_bypassed"]
+    memo_hit_rate = 100.0 * memo_hits / memo_lookups if memo_lookups else 0.0
+
+    emit("ga.summary", patients=patients, doctors=doctors, islands=islands, workers=workers,
+         generations=len(best_fitness_history), best_fitness=float(best_fit),
+         memo_lookups=memo_lookups, memo_hits=memo_hits, memo_bypassed=memo_bypassed)
+
+    # build schedule from best_individual
+    schedule = build_schedule(best_individual, patient_details, doctor_details, urgency_list, beds, problem.roster)
 
     # save output
     output_json = os.path.join(results_folder, "output.json")
-    with open(output_json, "w") as f:
-        json.dump(schedule, f, indent=2)
+    write_json(output_json, schedule)
 
-    # plot convergence
+    # plot convergence (pyplot imported here, not at module level: it is most of the import time)
     try:
+        import matplotlib.pyplot as plt
         plt.figure(figsize=(8,4))
         plt.plot(range(1, len(best_fitness_history)+1), best_fitness_history, '-o')
         plt.title('GA Convergence')
@@ -245,34 +463,21 @@ def run_ga(input_data, results_folder, population_size=80, generations=120, muta
         plt.ylabel('Best Fitness')
         plt.grid(True, alpha=0.3)
         conv_path = os.path.join(results_folder, 'convergence.png')
-        plt.savefig(conv_path, dpi=150, bbox_inches='tight')
+        save_figure(plt, conv_path, dpi=150, bbox_inches='tight')
         plt.close()
     except Exception as e:
         print(f"DEBUG: Could not save GA convergence plot: {e}", file=sys.stderr)
 
     # save metrics
     metrics_file = os.path.join(results_folder, "metrics.csv")
-    perfect_matches = sum(1 for item in schedule if item["SpecialtyMatch"] == "Perfect Match")
-    referral_needed = sum(1 for item in schedule if item["SpecialtyMatch"] == "Referral")
-    no_matches = sum(1 for item in schedule if item["SpecialtyMatch"] in ["Partial/No Match", "Referral"])
-    no_doctor_assigned = sum(1 for item in schedule if item["Doctor"] == "-")
-
     try:
-        with open(metrics_file, 'w') as f:
-            f.write('Metric,Value\n')
-            f.write('AI Technique,Genetic Algorithm (GA)\n')
-            f.write('Status,Success\n')
-            f.write(f'Total Doctors,{doctors}\n')
-            f.write(f'Total Patients,{patients}\n')
-            f.write(f'Total Beds,{beds}\n')
-            f.write(f'Perfect Specialty Matches,{perfect_matches}\n')
-            f.write(f'Referrals Needed,{referral_needed}\n')
-            f.write(f'No Matches,{no_matches}\n')
-            f.write(f'Patients without Doctor Assignment,{no_doctor_assigned}\n')
-            f.write(f'Match Success Rate,{round((perfect_matches/patients)*100 if patients>0 else 0, 1)}%\n')
-            f.write(f'Average Urgency,{round(sum(urgency_list)/len(urgency_list), 2) if len(urgency_list)>0 else 0}\n')
-            f.write(f'Best Fitness,{round(max(best_fitness_history) if best_fitness_history else 0, 3)}\n')
-            f.write(f'Generations Ran,{len(best_fitness_history)}\n')
+        write_metrics(metrics_file, schedule, 'Genetic Algorithm (GA)', doctors, patients, beds, urgency_list, [
+            ('Best Fitness', round(max(best_fitness_history) if best_fitness_history else 0, 3)),
+            ('Generations Ran', len(best_fitness_history)),
+            ('GA Islands', islands),
+            ('Fitness Memo Hit Rate (%)', round(memo_hit_rate, 1) if memo_size > 0 else 'off'),
+            ('Fitness Evaluations', memo_lookups - memo_hits + memo_bypassed if memo_size > 0 else 'n/a'),
+        ] + ([('Local Search Fitness', ls_stats['final_fitness'])] if ls_stats else []))
     except Exception as e:
         print(f"DEBUG: Could not write GA metrics: {e}", file=sys.stderr)
 
@@ -288,4 +493,6 @@ if __name__ == '__main__':
         sys.exit(0)
     with open(input_file) as f:
         data = json.load(f)
-    run_ga(data, os.path.join(os.path.dirname(cur), 'Results'))
+    # --profile / MEDIMATCH_PROFILE=cprofile|sample writes a profile to Results/profiles/
+    with profiled("scheduler_ga"):
+        run_ga(data, os.path.join(os.path.dirname(cur), 'Results'))
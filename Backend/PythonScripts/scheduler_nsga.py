@@ -0,0 +1,187 @@
+"""
+Multi-objective (NSGA-II) mode for the GA scheduler.
+
+Instead of collapsing match quality, urgency handling and load balance into one
+number like fitness_fn does, run_nsga() keeps a population ranked by Pareto
+dominance and writes the final non-dominated front to Results/pareto_front.json
+(plus a flat pareto_front.csv) so a supervisor can pick a trade-off.
+
+output.json / metrics.csv / convergence.png are still written using the front
+member with the best scalar fitness, so the UI contract does not change.
+"""
+
+import json
+import os
+import sys
+import numpy as np
+
+from scheduling_problem import SchedulingProblem, OBJECTIVE_NAMES
+from result_writer import atomic_open, write_json, save_figure
+from scheduler_ga import heuristic_seed, random_individual, seed_sequence, two_point_crossover_batch, mutate_batch, build_schedule, write_metrics
+
+
+def fast_non_dominated_sort(objs):
+    """Return the Pareto rank (0 = best front) of every row of objs (maximized).
+
+    The dominance matrix is built in one O(M*N^2) broadcast; fronts are then
+    peeled off with vectorized counter updates.
+    """
+    n = objs.shape[0]
+    ge = (objs[:, None, :] >= objs[None, :, :]).all(axis=2)
+    gt = (objs[:, None, :] > objs[None, :, :]).any(axis=2)
+    dominates = ge & gt  # dominates[i, j] -> i dominates j
+
+    remaining = dominates.sum(axis=0)
+    ranks = np.full(n, -1, dtype=np.int64)
+    current = np.flatnonzero(remaining == 0)
+    front = 0
+    while current.size:
+        ranks[current] = front
+        remaining = remaining - dominates[current].sum(axis=0)
+        current = np.flatnonzero((remaining == 0) & (ranks < 0))
+        front += 1
+    return ranks
+
+
+def crowding_distance(objs):
+    """Crowding distance of each row of objs within a single front"""
+    n, m = objs.shape
+    if n <= 2:
+        return np.full(n, np.inf)
+    order = np.argsort(objs, axis=0, kind="stable")
+    sorted_objs = np.take_along_axis(objs, order, axis=0)
+    span = sorted_objs[-1] - sorted_objs[0]
+    span[span == 0] = 1.0
+
+    contrib = np.zeros((n, m))
+    np.put_along_axis(contrib, order[1:-1], (sorted_objs[2:] - sorted_objs[:-2]) / span, axis=0)
+    np.put_along_axis(contrib, order[[0, -1]], np.inf, axis=0)
+    return contrib.sum(axis=1)
+
+
+def rank_and_crowding(objs):
+    ranks = fast_non_dominated_sort(objs)
+    crowd = np.zeros(len(objs))
+    for r in range(ranks.max() + 1):
+        members = np.flatnonzero(ranks == r)
+        crowd[members] = crowding_distance(objs[members])
+    return ranks, crowd
+
+
+def select_survivors(objs, size):
+    # fill by front, break the last front by crowding distance (larger is better)
+    ranks, crowd = rank_and_crowding(objs)
+    order = np.lexsort((-crowd, ranks))
+    return order[:size], ranks[order[:size]], crowd[order[:size]]
+
+
+def binary_tournament(ranks, crowd, n_picks, rng):
+    a = rng.integers(0, len(ranks), size=n_picks)
+    b = rng.integers(0, len(ranks), size=n_picks)
+    a_wins = (ranks[a] < ranks[b]) | ((ranks[a] == ranks[b]) & (crowd[a] >= crowd[b]))
+    return np.where(a_wins, a, b)
+
+
+def run_nsga(input_data, results_folder, population_size=80, generations=120, mutation_rate=0.06, seed=None,
+             roster=None):
+    rng = np.random.default_rng(seed_sequence(seed))
+    problem = SchedulingProblem(input_data, roster=roster)
+    patients, doctors = problem.patients, problem.doctors
+
+    # initial population: random genes plus a few greedy seeds (same mix as run_ga)
+    population = np.array([random_individual(patients, doctors, rng, problem) for _ in range(population_size)],
+                          dtype=np.int64).reshape(population_size, patients)
+    seed_ind = heuristic_seed(patients, doctors, problem.patient_details, problem.doctor_details, problem)
+    population[:min(6, population_size)] = seed_ind
+
+    objs = problem.objectives(population)
+    ranks, crowd = rank_and_crowding(objs)
+
+    history = []
+    for gen in range(generations):
+        # offspring via binary tournament on (rank, crowding), crossover and mutation
+        n_pairs = (population_size + 1) // 2
+        parents = binary_tournament(ranks, crowd, 2 * n_pairs, rng)
+        child1, child2 = two_point_crossover_batch(population[parents[:n_pairs]], population[parents[n_pairs:]], rng)
+        offspring = mutate_batch(np.vstack([child1, child2])[:population_size], doctors, mutation_rate, rng, problem)
+
+        # environmental selection over parents + offspring
+        combined = np.vstack([population, offspring])
+        combined_objs = np.vstack([objs, problem.objectives(offspring)])
+        keep, ranks, crowd = select_survivors(combined_objs, population_size)
+        population, objs = combined[keep], combined_objs[keep]
+
+        history.append(objs.max(axis=0))
+
+    # final front, without duplicate genomes
+    front_mask = ranks == 0
+    front, front_idx = np.unique(population[front_mask], axis=0, return_index=True)
+    front_objs = objs[front_mask][front_idx]
+    order = np.argsort(-front_objs.sum(axis=1), kind="stable")
+    front, front_objs = front[order], front_objs[order]
+
+    best = front[0].tolist()
+    schedule = build_schedule(best, problem.patient_details, problem.doctor_details, problem.urgency_list, problem.beds,
+                              problem.roster)
+
+    # save output
+    output_json = os.path.join(results_folder, "output.json")
+    write_json(output_json, schedule)
+
+    # save the Pareto front for trade-off review
+    front_rows = []
+    for k, (ind, vals) in enumerate(zip(front, front_objs), start=1):
+        row = {"Solution": k}
+        for name, v in zip(OBJECTIVE_NAMES, vals):
+            row[name] = round(float(v), 3)
+        row["Fitness"] = round(float(vals.sum()), 3)
+        row["Assignments"] = [int(a) + 1 if a >= 0 else "-" for a in ind]
+        front_rows.append(row)
+    write_json(os.path.join(results_folder, "pareto_front.json"), front_rows)
+    with atomic_open(os.path.join(results_folder, "pareto_front.csv")) as f:
+        f.write("Solution," + ",".join(OBJECTIVE_NAMES) + ",Fitness\n")
+        for row in front_rows:
+            f.write(f'{row["Solution"]},' + ",".join(str(row[name]) for name in OBJECTIVE_NAMES) + f',{row["Fitness"]}\n')
+
+    # plot per-objective best over generations
+    try:
+        import matplotlib.pyplot as plt
+        hist = np.array(history).reshape(-1, len(OBJECTIVE_NAMES))
+        fig, axes = plt.subplots(1, len(OBJECTIVE_NAMES), figsize=(12, 4))
+        for ax, name, col in zip(axes, OBJECTIVE_NAMES, hist.T):
+            ax.plot(range(1, len(col) + 1), col, '-o', markersize=3)
+            ax.set_title(name)
+            ax.set_xlabel('Generation')
+            ax.grid(True, alpha=0.3)
+        fig.suptitle('NSGA-II Convergence (best per objective)')
+        conv_path = os.path.join(results_folder, 'convergence.png')
+        save_figure(fig, conv_path, dpi=150, bbox_inches='tight')
+        plt.close(fig)
+    except Exception as e:
+        print(f"DEBUG: Could not save NSGA-II convergence plot: {e}", file=sys.stderr)
+
+    # save metrics
+    metrics_file = os.path.join(results_folder, "metrics.csv")
+    try:
+        write_metrics(metrics_file, schedule, 'Multi-objective GA (NSGA-II)', doctors, patients, problem.beds,
+                      problem.urgency_list, [
+                          ('Best Fitness', round(float(front_objs[0].sum()), 3)),
+                          ('Pareto Front Size', len(front)),
+                          ('Generations Ran', len(history)),
+                      ])
+    except Exception as e:
+        print(f"DEBUG: Could not write NSGA-II metrics: {e}", file=sys.stderr)
+
+    return schedule
+
+
+if __name__ == '__main__':
+    # allow standalone testing
+    cur = os.path.dirname(os.path.abspath(__file__))
+    input_file = os.path.join(cur, 'input.json')
+    if not os.path.exists(input_file):
+        print('No input.json found for NSGA-II test')
+        sys.exit(0)
+    with open(input_file) as f:
+        data = json.load(f)
+    run_nsga(data, os.path.join(os.path.dirname(os.path.dirname(cur)), 'Results'))
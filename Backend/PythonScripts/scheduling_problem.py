@@ -0,0 +1,361 @@
+"""
+Array view of a scheduling input shared by the GA-based schedulers.
+
+SchedulingProblem turns the DoctorDetails / PatientDetails dicts from input.json into
+NumPy arrays once, so whole populations can be scored with vectorized operations
+instead of calling fitness_fn individual by individual.
+
+The objectives are the three parts of scheduler_ga.fitness_fn kept apart (all maximized):
+  match    - specialty match rewards, mismatch and referral penalties
+  urgency  - seniority bonus for urgent patients
+  balance  - load balance penalty (-2 * variance of doctor load)
+Their sum is the scalar GA fitness.
+
+Specialty compatibility is stored per disease, not per patient: build_candidate_lists()
+gives every distinct disease a CSR-style slice of compatible doctor indices
+(cand_indices[cand_indptr[c]:cand_indptr[c+1]]). Greedy scans and GA sampling only touch
+those k doctors instead of the whole roster.
+
+Roster is the parsing stage in front of all of it: DoctorDetails / PatientDetails are read
+once, missing entries get the usual defaults, and diseases and specialties are interned
+as small integer codes (int16 arrays). Schedulers then loop over codes and look names up
+in the short disease / specialty tables instead of calling .get() on a dict per patient.
+
+FitnessMemo remembers the fitness of recently seen genomes (LRU, keyed by a hash of the
+int64 gene array), so elite copies, the repeated greedy seeds and the identical
+individuals of a converged population are not scored again.
+"""
+
+import array
+import collections
+import numpy as np
+
+# speciality db (same as scheduler.py)
+SPECIALTY_CONDITIONS = {
+    "Cardiology": ["Heart Attack", "Stroke", "Hypertension"],
+    "Neurology": ["Stroke", "Migraine", "Epilepsy"],
+    "Orthopedics": ["Fracture", "Broken Arm", "Arthritis"],
+    "Pediatrics": ["Fever", "Infection", "Asthma"],
+    "General": ["Fever", "Cold", "Infection", "Diabetes"],
+    "Emergency": ["Heart Attack", "Stroke", "Fracture"]
+}
+
+OBJECTIVE_NAMES = ["MatchQuality", "UrgencyHandling", "LoadBalance"]
+
+
+def _code_dtype(n):
+    # smallest signed int type that holds the codes 0..n-1
+    return np.int16 if n < 2 ** 15 else np.int32
+
+
+def intern(values):
+    """(distinct values in first-seen order, code array) for a list of names"""
+    code_of = {}
+    codes = [code_of.setdefault(v, len(code_of)) for v in values]
+    return list(code_of), np.array(codes, dtype=_code_dtype(len(code_of)))
+
+
+def coded_candidate_lists(disease_names, specialty_names, specialty_code, specialties_db=SPECIALTY_CONDITIONS):
+    """(indptr, indices): compatible doctors per disease code in CSR form, ascending doctor order"""
+    treats = np.array([[name in specialties_db.get(spec, ()) for name in disease_names] for spec in specialty_names],
+                      dtype=bool).reshape(len(specialty_names), len(disease_names))
+    # disease x doctor compatibility; nonzero() walks it row by row, doctors ascending
+    by_doctor = treats[np.asarray(specialty_code, dtype=np.intp)].T
+    rows, indices = np.nonzero(by_doctor)
+    indptr = np.zeros(len(disease_names) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=len(disease_names)), out=indptr[1:])
+    return indptr, indices.astype(np.int64)
+
+
+def build_candidate_lists(diseases, specialties, specialties_db=SPECIALTY_CONDITIONS):
+    """Compatible doctors per distinct disease in CSR form.
+
+    Returns (disease_names, disease_code per patient, indptr, indices); the candidates of
+    disease code c are indices[indptr[c]:indptr[c+1]], in ascending doctor order.
+    """
+    disease_names, disease_code = intern(diseases)
+    specialty_names, specialty_code = intern(specialties)
+    indptr, indices = coded_candidate_lists(disease_names, specialty_names, specialty_code, specialties_db)
+    return disease_names, disease_code.astype(np.int64), indptr, indices
+
+
+# stand-ins for absent detail dicts / keys while parsing
+_NO_DETAILS = {}
+_MISSING = object()
+
+
+class Roster:
+    """Patients and doctors of one input, parsed once.
+
+    Per patient only a name, a disease code and an urgency are kept; per doctor a name
+    and a specialty code. Missing DoctorDetails / PatientDetails entries get the
+    defaults the schedulers always used (Dr. n / General, Patient n / Fever), and
+    missing urgencies are 5.
+    """
+
+    __slots__ = ("patient_names", "disease_names", "disease_code", "urgency",
+                 "doctor_names", "specialty_names", "specialty_code")
+
+    def __init__(self, patient_names, disease_names, disease_code, urgency, doctor_names, specialty_names,
+                 specialty_code):
+        self.patient_names = patient_names
+        self.disease_names = disease_names
+        self.disease_code = disease_code
+        self.urgency = urgency
+        self.doctor_names = doctor_names
+        self.specialty_names = specialty_names
+        self.specialty_code = specialty_code
+
+    @classmethod
+    def from_details(cls, doctors, patients, doctor_details, patient_details, urgency_list=()):
+        builder = RosterBuilder()
+        urgency = [int(x) for x in urgency_list]
+        for i in range(patients):
+            builder.add_patient(patient_details[i] if i < len(patient_details) else _NO_DETAILS,
+                                urgency[i] if i < len(urgency) else 5)
+        for d in range(doctors):
+            builder.add_doctor(doctor_details[d] if d < len(doctor_details) else _NO_DETAILS)
+        return builder.build()
+
+    @classmethod
+    def parse(cls, input_data):
+        """From an input.json dict (Doctors, Patients, DoctorDetails, PatientDetails, Urgency)"""
+        patients = int(input_data.get("Patients", 6))
+        return cls.from_details(int(input_data.get("Doctors", 3)), patients, input_data.get("DoctorDetails", []),
+                                input_data.get("PatientDetails", []), input_data.get("Urgency", [5] * patients))
+
+    @property
+    def patients(self):
+        return len(self.patient_names)
+
+    @property
+    def doctors(self):
+        return len(self.doctor_names)
+
+    def disease(self, i):
+        return self.disease_names[self.disease_code[i]]
+
+    def specialty(self, d):
+        return self.specialty_names[self.specialty_code[d]]
+
+    def candidate_lists(self, specialties_db=SPECIALTY_CONDITIONS):
+        """(indptr, indices) of compatible doctors per disease code"""
+        return coded_candidate_lists(self.disease_names, self.specialty_names, self.specialty_code, specialties_db)
+
+    def required_specialties(self, specialties_db=SPECIALTY_CONDITIONS):
+        """Per disease code, the first specialty that treats it (None if none does)"""
+        return [next((spec for spec, conds in specialties_db.items() if name in conds), None)
+                for name in self.disease_names]
+
+
+class RosterBuilder:
+    """Builds a Roster one patient / doctor record at a time.
+
+    Records are reduced to a name and a code as they arrive (codes go into compact
+    array.array buffers), so a streamed input never exists as a list of dicts.
+    """
+
+    def __init__(self):
+        self.patient_names, self.doctor_names = [], []
+        self._disease_of, self._specialty_of = {}, {}
+        self._disease_code, self._specialty_code = array.array("i"), array.array("i")
+        self._urgency = array.array("h")
+
+    def add_patient(self, patient, urgency=5):
+        name = patient.get("Name", _MISSING)
+        self.patient_names.append(f"Patient {len(self.patient_names) + 1}" if name is _MISSING else name)
+        self._disease_code.append(self._disease_of.setdefault(patient.get("Disease", "Fever"), len(self._disease_of)))
+        self._urgency.append(urgency)
+
+    def add_doctor(self, doc):
+        name = doc.get("Name", _MISSING)
+        self.doctor_names.append(f"Dr. {len(self.doctor_names) + 1}" if name is _MISSING else name)
+        self._specialty_code.append(self._specialty_of.setdefault(doc.get("Specialty", "General"), len(self._specialty_of)))
+
+    def build(self, doctors=None, patients=None):
+        """Roster of the records added so far, cut or padded with defaults to the given counts"""
+        if patients is not None:
+            while len(self.patient_names) < patients:
+                self.add_patient(_NO_DETAILS)
+            del self.patient_names[patients:], self._disease_code[patients:], self._urgency[patients:]
+        if doctors is not None:
+            while len(self.doctor_names) < doctors:
+                self.add_doctor(_NO_DETAILS)
+            del self.doctor_names[doctors:], self._specialty_code[doctors:]
+        disease_code = np.frombuffer(self._disease_code, dtype=np.intc) if self._disease_code else np.zeros(0, np.intc)
+        specialty_code = np.frombuffer(self._specialty_code, dtype=np.intc) if self._specialty_code else np.zeros(0, np.intc)
+        urgency = np.frombuffer(self._urgency, dtype=np.int16) if self._urgency else np.zeros(0, np.int16)
+        # a disease seen only in records that were cut off keeps its table entry; no patient has its code
+        return Roster(self.patient_names, list(self._disease_of), disease_code.astype(_code_dtype(len(self._disease_of))),
+                      urgency.copy(), self.doctor_names, list(self._specialty_of),
+                      specialty_code.astype(_code_dtype(len(self._specialty_of))))
+
+
+class SchedulingProblem:
+    def __init__(self, input_data, specialties_db=SPECIALTY_CONDITIONS, roster=None):
+        # a streamed input (streaming_input.py) comes as settings plus an already built roster
+        self.roster = roster = roster if roster is not None else Roster.parse(input_data)
+        self.doctors = roster.doctors
+        self.patients = roster.patients
+        self.beds = int(input_data.get("Beds", 4))
+        self.doctor_details = input_data.get("DoctorDetails", [])
+        self.patient_details = input_data.get("PatientDetails", [])
+        self.specialties_db = specialties_db
+
+        # names and interned disease / specialty codes (urgency defaults to 5, as in the schedule builder)
+        self.urgency_list = roster.urgency.tolist()
+        self.urgency = roster.urgency.astype(np.float64)
+
+        self.disease_names, self.disease_code = roster.disease_names, roster.disease_code
+        self.cand_indptr, self.cand_indices = roster.candidate_lists(specialties_db)
+        # per-patient view of the CSR lists, used to sample genes
+        self.cand_start = self.cand_indptr[self.disease_code]
+        self.cand_count = self.cand_indptr[self.disease_code + 1] - self.cand_start
+
+        # disease_compat[c, d] -> doctor d is a perfect specialty match for disease code c
+        # (at least one column so that index 0 is always valid, even with no doctors)
+        self.disease_compat = np.zeros((len(self.disease_names), max(self.doctors, 1)), dtype=bool)
+        for c in range(len(self.disease_names)):
+            self.disease_compat[c, self.cand_indices[self.cand_indptr[c]:self.cand_indptr[c + 1]]] = True
+        self.generalist = np.zeros(max(self.doctors, 1), dtype=bool)
+        general = np.array([spec == "General" for spec in roster.specialty_names], dtype=bool)
+        self.generalist[:self.doctors] = general[roster.specialty_code]
+        known = [any(name in conds for conds in specialties_db.values()) for name in self.disease_names]
+        self.disease_exists = np.array(known, dtype=bool)[self.disease_code]
+
+    def patient_disease(self, i):
+        return self.roster.disease(i)
+
+    def doctor_specialty(self, d):
+        return self.roster.specialty(d)
+
+    def candidates(self, i):
+        """Doctor indices that are a perfect specialty match for patient i"""
+        start = self.cand_start[i]
+        return self.cand_indices[start:start + self.cand_count[i]]
+
+    def sample_doctors(self, patient_idx, rng):
+        """One random doctor per entry of patient_idx, drawn from that patient's candidate list.
+
+        Patients whose disease no doctor matches fall back to a uniform pick over all doctors.
+        """
+        patient_idx = np.asarray(patient_idx)
+        u = rng.random(patient_idx.shape)
+        count = self.cand_count[patient_idx]
+        picks = np.floor(u * np.maximum(self.doctors, 1)).astype(np.int64)
+        has = count > 0
+        if self.cand_indices.size:
+            picks[has] = self.cand_indices[self.cand_start[patient_idx[has]] + (u[has] * count[has]).astype(np.int64)]
+        return picks
+
+    def objectives(self, population):
+        """Return an (N, 3) array of [match, urgency, balance] for N individuals"""
+        pop = np.asarray(population, dtype=np.int64)
+        if pop.ndim == 1:
+            pop = pop[None, :]
+        n = pop.shape[0]
+        u = self.urgency / 10.0
+
+        assigned = (pop >= 0) & (pop < self.doctors)
+        safe = np.where(assigned, pop, 0)
+
+        # specialty match / generalist / mismatch / referral terms
+        perfect = self.disease_compat[self.disease_code[None, :], safe]
+        assigned_score = np.where(perfect, 50.0, np.where(self.generalist[safe], 5.0, -15.0 * u))
+        referral_score = np.where(self.disease_exists, -20.0 * u, -5.0)
+        match = np.where(assigned, assigned_score, referral_score).sum(axis=1)
+
+        # seniority approximated by doctor index (lower index -> more senior)
+        seniority = np.where(assigned, np.maximum(0, 3 - safe) * u * 5, 0.0).sum(axis=1)
+
+        # per-individual doctor loads via one bincount over offset indices
+        if self.doctors > 0:
+            offsets = safe + (np.arange(n) * self.doctors)[:, None]
+            loads = np.bincount(offsets[assigned], minlength=n * self.doctors).reshape(n, self.doctors)
+            balance = -2.0 * loads.var(axis=1)
+        else:
+            balance = np.zeros(n)
+
+        return np.column_stack([match, seniority, balance])
+
+    def fitness(self, population):
+        """Scalar GA fitness (same value as scheduler_ga.fitness_fn) for each individual"""
+        return self.objectives(population).sum(axis=1)
+
+
+class FitnessMemo:
+    """Bounded LRU cache in front of SchedulingProblem.fitness.
+
+    Genomes are keyed by two 64-bit multiply-add hashes of the gene array with fixed random
+    weights, computed for the whole population at once (two different genomes share a key
+    with probability around 2**-120). Looking a batch up costs a fraction of scoring it, but
+    not nothing: while the population is still diverse almost every child is new, so when a
+    batch's hit rate falls below min_hit_rate the memo is bypassed for the next few batches
+    (doubling up to MAX_BACKOFF) and then probed again. Converged populations keep it on.
+    """
+
+    MAX_BACKOFF = 32
+
+    def __init__(self, problem, capacity=4096, min_hit_rate=0.2):
+        self.problem = problem
+        self.capacity = max(0, int(capacity))
+        self.min_hit_rate = min_hit_rate
+        self._cache = collections.OrderedDict()
+        self._weights = np.random.default_rng(0x5EED).integers(
+            0, np.iinfo(np.uint64).max, size=(2, problem.patients), dtype=np.uint64, endpoint=True) | np.uint64(1)
+        self._skip = 0
+        self._backoff = 1
+        self.lookups = 0
+        self.hits = 0
+        self.bypassed = 0
+
+    def keys(self, population):
+        genes = np.ascontiguousarray(population, dtype=np.int64).view(np.uint64)
+        # uint64 arithmetic wraps, which is what the hash wants
+        first = (genes * self._weights[0]).sum(axis=1, dtype=np.uint64)
+        second = (genes * self._weights[1]).sum(axis=1, dtype=np.uint64)
+        return list(zip(first.tolist(), second.tolist()))
+
+    def fitness(self, population):
+        population = np.asarray(population, dtype=np.int64)
+        if self.capacity == 0 or len(population) == 0:
+            return self.problem.fitness(population)
+        if self._skip > 0:
+            self._skip -= 1
+            self.bypassed += len(population)
+            return self.problem.fitness(population)
+
+        values = np.empty(len(population))
+        missing = {}
+        cache = self._cache
+        for i, key in enumerate(self.keys(population)):
+            value = cache.get(key)
+            if value is None:
+                # duplicates within the batch are scored once
+                missing.setdefault(key, []).append(i)
+            else:
+                cache.move_to_end(key)
+                values[i] = value
+        hits = len(population) - len(missing)
+        self.lookups += len(population)
+        self.hits += hits
+
+        if missing:
+            firsts = [rows[0] for rows in missing.values()]
+            scored = self.problem.fitness(population[firsts])
+            for (key, rows), value in zip(missing.items(), scored.tolist()):
+                values[rows] = value
+                cache[key] = value
+            while len(cache) > self.capacity:
+                cache.popitem(last=False)
+
+        if hits < self.min_hit_rate * len(population):
+            self._skip = self._backoff
+            self._backoff = min(2 * self._backoff, self.MAX_BACKOFF)
+        else:
+            self._backoff = 1
+        return values
+
+    @property
+    def hit_rate(self):
+        return self.hits / self.lookups if self.lookups else 0.0
@@ -0,0 +1,182 @@
+"""
+Streaming scheduler input for very large rosters.
+
+json.load() of input.json materializes every patient as a dict (plus the key and value
+strings) before any scheduling starts; for 100k patients that is most of the
+scheduler's peak memory. The JSONL form below is read line by line and each record goes
+straight into a scheduling_problem.RosterBuilder, which keeps only the name and small
+integer codes, so at most one record dict is alive at a time.
+
+    {"Beds": 40, "UseGA": true, "GASeed": 1}                          settings (first line)
+    {"Type": "Doctor", "Name": "Dr. Khan", "Specialty": "Cardiology"}
+    {"Type": "Patient", "Name": "Ali", "Disease": "Stroke", "Urgency": 8}
+    ...
+
+The settings line is input.json without DoctorDetails / PatientDetails / Urgency.
+Doctors and patients may be interleaved; each keeps its own order. Doctors / Patients
+in the settings work as in input.json (the roster is cut or padded with the default
+records), otherwise the record counts are used. Missing fields get the input.json
+defaults.
+
+    python scheduler.py big_input.jsonl                  schedule a streamed input
+    python streaming_input.py convert input.json out.jsonl
+    python streaming_input.py measure [--patients 100000] [--doctors 200]
+        peak RSS of loading (and of a full greedy run) from input.json vs JSONL
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from scheduling_problem import RosterBuilder
+
+DETAIL_KEYS = ("DoctorDetails", "PatientDetails", "Urgency")
+
+
+def read_jsonl(path):
+    """(settings dict, Roster) from a JSONL scheduler input"""
+    builder = RosterBuilder()
+    settings = None
+    with open(path, encoding="utf-8-sig") as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if settings is None:
+                settings = record
+                continue
+            kind = record.get("Type")
+            if kind == "Patient":
+                builder.add_patient(record, int(record.get("Urgency", 5)))
+            elif kind == "Doctor":
+                builder.add_doctor(record)
+            else:
+                raise ValueError(f"line {line_no}: record type must be Doctor or Patient, not {kind!r}")
+    settings = {k: v for k, v in (settings or {}).items() if k not in DETAIL_KEYS}
+    doctors, patients = settings.get("Doctors"), settings.get("Patients")
+    roster = builder.build(None if doctors is None else int(doctors), None if patients is None else int(patients))
+    settings.update(Doctors=roster.doctors, Patients=roster.patients)
+    return settings, roster
+
+
+def write_jsonl(input_data, path):
+    """input.json dict -> JSONL input (the roster with the usual defaults filled in)"""
+    patients = int(input_data.get("Patients", 6))
+    doctors = int(input_data.get("Doctors", 3))
+    patient_details = input_data.get("PatientDetails", [])
+    doctor_details = input_data.get("DoctorDetails", [])
+    urgency = [int(x) for x in input_data.get("Urgency", [5] * patients)]
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps({k: v for k, v in input_data.items() if k not in DETAIL_KEYS}) + "\n")
+        for d in range(doctors):
+            doc = doctor_details[d] if d < len(doctor_details) else {}
+            f.write(json.dumps({"Type": "Doctor", "Name": doc.get("Name", f"Dr. {d + 1}"),
+                                "Specialty": doc.get("Specialty", "General")}) + "\n")
+        for i in range(patients):
+            patient = patient_details[i] if i < len(patient_details) else {}
+            f.write(json.dumps({"Type": "Patient", "Name": patient.get("Name", f"Patient {i + 1}"),
+                                "Disease": patient.get("Disease", "Fever"),
+                                "Urgency": urgency[i] if i < len(urgency) else 5}) + "\n")
+
+
+def load_input(path):
+    """(input dict, roster or None): JSONL is streamed into a roster, anything else is json.load()ed"""
+    if path.lower().endswith(".jsonl"):
+        return read_jsonl(path)
+    with open(path) as f:
+        return json.load(f), None
+
+
+def _synthetic(patients, doctors, seed=0):
+    # input.json dict with random specialties, diseases and urgencies
+    import random
+    rng = random.Random(seed)
+    specialties = ["Cardiology", "Neurology", "Orthopedics", "Pediatrics", "General", "Emergency"]
+    diseases = ["Heart Attack", "Stroke", "Hypertension", "Migraine", "Epilepsy", "Fracture", "Broken Arm",
+                "Arthritis", "Fever", "Infection", "Asthma", "Cold", "Diabetes", "Rash"]
+    return {
+        "Doctors": doctors, "Patients": patients, "Beds": 40,
+        "Urgency": [rng.randint(1, 10) for _ in range(patients)],
+        "DoctorDetails": [{"Name": f"Dr. {d + 1}", "Specialty": rng.choice(specialties)} for d in range(doctors)],
+        "PatientDetails": [{"Name": f"Patient {i + 1}", "Disease": rng.choice(diseases), "Age": rng.randint(1, 90)}
+                           for i in range(patients)],
+    }
+
+
+def _measure_child(path, stage):
+    # run in a fresh interpreter by measure(): load (and schedule) one input, print the peak RSS
+    from instrumentation import peak_rss_kb
+    from scheduling_problem import SchedulingProblem
+    data, roster = load_input(path)
+    problem = SchedulingProblem(data, roster=roster)
+    result = {"patients": problem.patients}
+    if stage == "greedy":
+        import hashlib
+        from scheduler import greedy_schedule
+        schedule, _, _ = greedy_schedule(problem.doctors, problem.patients, problem.beds, problem.urgency_list,
+                                         problem.doctor_details, problem.patient_details, problem.roster)
+        result["schedule_sha256"] = hashlib.sha256(json.dumps(schedule).encode()).hexdigest()
+    result["peak_rss_kb"] = peak_rss_kb()
+    print(json.dumps(result))
+
+
+def measure(patients=100000, doctors=200):
+    """Peak RSS of loading a synthetic input as input.json and as JSONL, each in a fresh process"""
+    script = os.path.abspath(__file__)
+    report = {"patients": patients, "doctors": doctors}
+    with tempfile.TemporaryDirectory() as folder:
+        data = _synthetic(patients, doctors)
+        json_path, jsonl_path = os.path.join(folder, "input.json"), os.path.join(folder, "input.jsonl")
+        with open(json_path, "w") as f:
+            json.dump(data, f)
+        write_jsonl(data, jsonl_path)
+        del data
+        for stage in ("load", "greedy"):
+            for label, path in (("json", json_path), ("jsonl", jsonl_path)):
+                out = subprocess.run([sys.executable, script, "_child", path, stage], capture_output=True,
+                                     text=True, check=True).stdout
+                report[f"{stage}_{label}"] = json.loads(out.strip().splitlines()[-1])
+    return report
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Streaming (JSONL) scheduler input")
+    commands = parser.add_subparsers(dest="command", required=True)
+    convert_cmd = commands.add_parser("convert", help="write an input.json as JSONL")
+    convert_cmd.add_argument("input")
+    convert_cmd.add_argument("output")
+    measure_cmd = commands.add_parser("measure", help="compare peak RSS of input.json and JSONL loading")
+    measure_cmd.add_argument("--patients", type=int, default=100000)
+    measure_cmd.add_argument("--doctors", type=int, default=200)
+    child_cmd = commands.add_parser("_child")
+    child_cmd.add_argument("path")
+    child_cmd.add_argument("stage", choices=["load", "greedy"])
+    args = parser.parse_args()
+
+    if args.command == "convert":
+        with open(args.input) as f:
+            write_jsonl(json.load(f), args.output)
+        print(f"Wrote {args.output}")
+    elif args.command == "_child":
+        _measure_child(args.path, args.stage)
+    else:
+        report = measure(args.patients, args.doctors)
+        print(f"{report['patients']} patients, {report['doctors']} doctors (peak RSS, MB):")
+        for stage in ("load", "greedy"):
+            json_kb, jsonl_kb = report[f"{stage}_json"]["peak_rss_kb"], report[f"{stage}_jsonl"]["peak_rss_kb"]
+            if not json_kb or not jsonl_kb:
+                print(f"  {stage:<7} peak RSS not available on this platform")
+                continue
+            print(f"  {stage:<7} input.json {json_kb / 1024:7.1f}   JSONL {jsonl_kb / 1024:7.1f}   "
+                  f"({100.0 * (json_kb - jsonl_kb) / json_kb:.0f}% less)")
+        same = report["greedy_json"]["schedule_sha256"] == report["greedy_jsonl"]["schedule_sha256"]
+        print(f"  greedy schedules identical: {same}")
+        if not same:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Disease x symptom index for "which symptom should we ask about next".
+
+The index holds, per disease, how many training cases it has and how often each
+symptom occurred with it, plus the same matrix as a packed bitset (which symptoms were
+ever seen with the disease). It is saved as symptom_index.npz next to the model by
+train_disease_model.py and online_model.py; everything a query needs is precomputed
+at load time, so suggest() is a handful of small array operations (tens of
+microseconds), not a model call per candidate symptom.
+
+A query scores the diseases with a Bernoulli Naive Bayes posterior over the answers
+given so far (reported symptoms present, denied symptoms absent), keeps the
+top_diseases candidates (only those whose bitset contains every reported symptom, when
+any disease does) and ranks every unasked symptom by the expected information gain of
+asking it:
+
+    IG(s) = h(P(s)) - sum_d p(d) * h(P(s | d)),   P(s) = sum_d p(d) * P(s | d)
+
+where h is the binary entropy and p the posterior restricted to the candidates.
+"""
+
+import os
+import sys
+import numpy as np
+
+from result_writer import atomic_open
+
+INDEX_FILE = "symptom_index.npz"
+
+
+def _binary_entropy(p):
+    p = np.clip(p, 1e-12, 1.0 - 1e-12)
+    return -(p * np.log2(p) + (1.0 - p) * np.log2(1.0 - p))
+
+
+class SymptomIndex:
+    def __init__(self, counts, class_count, diseases, symptoms, alpha=1.0):
+        self.counts = np.asarray(counts, dtype=np.uint32)
+        self.class_count = np.asarray(class_count, dtype=np.uint32)
+        self.diseases = list(diseases)
+        self.symptoms = list(symptoms)
+        self.alpha = float(alpha)
+        self.bits = np.packbits(self.counts > 0, axis=1)
+
+        theta = (self.counts + alpha) / (self.class_count[:, None] + 2.0 * alpha)
+        self.theta = theta
+        self.log_present = np.log(theta)
+        self.log_absent = np.log1p(-theta)
+        self.entropy = _binary_entropy(theta)
+        with np.errstate(divide="ignore"):
+            self.log_prior = np.log(self.class_count / max(self.class_count.sum(), 1))
+
+    @classmethod
+    def from_features(cls, features, labels, diseases, symptoms):
+        """Count symptom occurrences per disease from a binary case matrix"""
+        labels = np.asarray(labels, dtype=np.intp)
+        class_count = np.bincount(labels, minlength=len(diseases))
+        counts = np.zeros((len(diseases), len(symptoms)), dtype=np.uint32)
+        np.add.at(counts, labels, np.asarray(features, dtype=np.uint32))
+        return cls(counts, class_count, diseases, symptoms)
+
+    @classmethod
+    def from_dataset(cls):
+        import dataset_cache
+        data = dataset_cache.load()
+        return cls.from_features(data.features, data.labels, data.diseases, data.symptoms)
+
+    @classmethod
+    def load(cls, file):
+        """From a path or file object holding symptom_index.npz"""
+        with np.load(file, allow_pickle=False) as npz:
+            return cls(npz["counts"], npz["class_count"], npz["diseases"].tolist(),
+                       npz["symptoms"].tolist(), float(npz["alpha"]))
+
+    def save(self, file):
+        np.savez(file, counts=self.counts, class_count=self.class_count,
+                 diseases=np.array(self.diseases, dtype=str), symptoms=np.array(self.symptoms, dtype=str),
+                 alpha=np.float64(self.alpha))
+
+    def candidates(self, present, absent=(), top_diseases=5):
+        """(disease rows, posterior restricted to them), most likely first"""
+        present = np.asarray(present, dtype=np.intp)
+        absent = np.asarray(absent, dtype=np.intp)
+        scores = self.log_prior + self.log_present[:, present].sum(axis=1) + self.log_absent[:, absent].sum(axis=1)
+
+        if len(present):
+            query = np.zeros(len(self.symptoms), dtype=bool)
+            query[present] = True
+            query = np.packbits(query)
+            consistent = ((self.bits & query) == query).all(axis=1)
+            if consistent.any():
+                scores = np.where(consistent, scores, -np.inf)
+
+        # at least the most likely disease, whatever top_diseases asks for
+        top = max(1, min(top_diseases, int(np.isfinite(scores).sum())))
+        rows = np.argpartition(-scores, top - 1)[:top] if top < len(scores) else np.arange(len(scores))
+        rows = rows[np.argsort(-scores[rows], kind="stable")]
+        weights = np.exp(scores[rows] - scores[rows[0]])
+        return rows, weights / weights.sum()
+
+    def suggest(self, present, absent=(), k=3, top_diseases=5):
+        """[(symptom column, information gain in bits, P(yes))] for the k best questions,
+        plus the candidate (disease row, probability) list they were computed for"""
+        rows, posterior = self.candidates(present, absent, top_diseases)
+        p_yes = posterior @ self.theta[rows]
+        gain = _binary_entropy(p_yes) - posterior @ self.entropy[rows]
+
+        gain[np.asarray(present, dtype=np.intp)] = -np.inf
+        gain[np.asarray(absent, dtype=np.intp)] = -np.inf
+        k = min(k, int(np.isfinite(gain).sum()))
+        if k <= 0:
+            return [], list(zip(rows.tolist(), posterior.tolist()))
+        best = np.argpartition(-gain, k - 1)[:k]
+        best = best[np.argsort(-gain[best], kind="stable")]
+        questions = [(int(c), float(gain[c]), float(p_yes[c])) for c in best]
+        return questions, list(zip(rows.tolist(), posterior.tolist()))
+
+
+def main():
+    import time
+    index = SymptomIndex.from_dataset()
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), INDEX_FILE)
+    with atomic_open(path, "wb") as f:
+        index.save(f)
+    print(f"Saved {path}: {len(index.diseases)} diseases x {len(index.symptoms)} symptoms")
+
+    # rough per-query cost
+    present = [index.symptoms.index(s) for s in ("itching", "skin_rash") if s in index.symptoms]
+    runs = 1000
+    start = time.perf_counter()
+    for _ in range(runs):
+        index.suggest(present)
+    print(f"suggest(): {(time.perf_counter() - start) * 1000 / runs:.3f} ms per query", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
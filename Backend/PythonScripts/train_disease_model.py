@@ -6,103 +6,62 @@ from sklearn.preprocessing import LabelEncoder
 from sklearn.metrics import accuracy_score
 import joblib
 import os
-import json
 import matplotlib.pyplot as plt
+import argparse
+
+import dataset_cache
+import model_store
+from symptom_index import INDEX_FILE, SymptomIndex
+from forest_quant import QuantizedForest, verify, print_report
+from result_writer import atomic_open, write_json, save_figure, copy_file
+from profiling import profiled
 
 class DiseasePredictor:
-    def __init__(self, dataset_path='dataset.csv'):
-        self.dataset_path = dataset_path
+    def __init__(self):
         self.model = None
         self.label_encoder = None
         self.symptom_columns = None
         self.disease_info = {}
         
     def load_data(self):
-        """Load and preprocess the dataset"""
+        """Load the preprocessed dataset (parsed from the CSVs only when they change)"""
         print("Loading dataset...")
         
-        # Load main dataset
-        df = pd.read_csv(self.dataset_path)
-        
-        print(f" Dataset loaded: {df.shape[0]} rows, {df.shape[1]} columns")
-        print(f" Columns: {list(df.columns)}")
-        
-        # The Kaggle dataset has Disease column and Symptom_1 to Symptom_17 columns
-        # We need to convert this to binary format
-        
-        # Get all unique symptoms
-        all_symptoms = set()
-        symptom_cols = [col for col in df.columns if col.startswith('Symptom_')]
-        
-        for col in symptom_cols:
-            symptoms = df[col].dropna().unique()
-            all_symptoms.update([s.strip() for s in symptoms if pd.notna(s)])
-        
-        # Remove empty string if present
-        all_symptoms.discard('')
-        all_symptoms = sorted(list(all_symptoms))
-        
-        print(f" Found {len(all_symptoms)} unique symptoms")
-        print(f" Found {df['Disease'].nunique()} unique diseases")
-        
-        # Create binary feature matrix
-        binary_df = pd.DataFrame(0, index=df.index, columns=all_symptoms)
-        
-        for idx, row in df.iterrows():
-            for col in symptom_cols:
-                symptom = row[col]
-                if pd.notna(symptom) and symptom.strip() in all_symptoms:
-                    binary_df.at[idx, symptom.strip()] = 1
+        # Binary symptom matrix, disease codes and info tables from dataset_cache/
+        # (memory-mapped; rebuilt automatically when a source CSV's checksum changes)
+        data = dataset_cache.load()
         
-        # Add disease column
-        binary_df['Disease'] = df['Disease'].values
+        print(f" Dataset loaded: {data.features.shape[0]} rows")
+        print(f" Found {len(data.symptoms)} unique symptoms")
+        print(f" Found {len(data.diseases)} unique diseases")
         
-        self.symptom_columns = all_symptoms
+        self.symptom_columns = data.symptoms
         
-        return binary_df
+        return data
     
-    def load_additional_info(self):
-        """Load symptom severity, descriptions, and precautions"""
-        try:
-            severity_df = pd.read_csv('Symptom-severity.csv')
-            self.symptom_severity = dict(zip(severity_df['Symptom'], severity_df['weight']))
-            print(f" Loaded symptom severity data")
-        except:
+    def load_additional_info(self, data):
+        """Symptom severity, descriptions, and precautions (parsed along with the dataset)"""
+        self.symptom_severity = data.severity
+        self.disease_descriptions = data.descriptions
+        self.disease_precautions = data.precautions
+        if not self.symptom_severity:
             print(" Symptom severity file not found, using default weights")
-            self.symptom_severity = {}
-        
-        try:
-            desc_df = pd.read_csv('symptom_Description.csv')
-            self.disease_descriptions = dict(zip(desc_df['Disease'], desc_df['Description']))
-            print(f" Loaded disease descriptions")
-        except:
+        if not self.disease_descriptions:
             print(" Disease description file not found")
-            self.disease_descriptions = {}
-        
-        try:
-            precaution_df = pd.read_csv('symptom_precaution.csv')
-            self.disease_precautions = {}
-            for _, row in precaution_df.iterrows():
-                disease = row['Disease']
-                precautions = [row[f'Precaution_{i}'] for i in range(1, 5) 
-                              if pd.notna(row.get(f'Precaution_{i}'))]
-                self.disease_precautions[disease] = precautions
-            print(f" Loaded disease precautions")
-        except:
+        if not self.disease_precautions:
             print(" Precaution file not found")
-            self.disease_precautions = {}
     
-    def train_model(self, df):
+    def train_model(self, data):
         """Train the ML model"""
         print("\n Training AI Model...")
         
-        # Prepare features and target
-        X = df[self.symptom_columns]
-        y = df['Disease']
+        # Prepare features and target (labels are already encoded in sorted disease order)
+        X = data.features
+        y_encoded = np.asarray(data.labels)
         
         # Encode disease labels
         self.label_encoder = LabelEncoder()
-        y_encoded = self.label_encoder.fit_transform(y)
+        self.label_encoder.fit(data.diseases)
         
         # Split data
         X_train, X_test, y_train, y_test = train_test_split(
@@ -145,19 +104,31 @@ class DiseasePredictor:
         
         return accuracy, feature_importance
     
-    def save_model(self):
+    def save_model(self, data, quantize=False):
         """Save trained model and metadata"""
         print("\n Saving model...")
         
+        # Optionally store the forest quantized (uint8 leaf distributions, no per-node
+        # value arrays): about a tenth of the size, probabilities within 1/510
+        model = self.model
+        if quantize:
+            model = QuantizedForest(self.model)
+            report = verify(self.model, model, data.features)
+            print_report(report)
+            if not report['within_bound']:
+                raise RuntimeError("quantized forest exceeds its probability error bound")
+        
         # Save model
-        joblib.dump(self.model, 'disease_model.pkl')
+        # (atomic writes: a predictor starting mid-save never loads a partial file)
+        with atomic_open('disease_model.pkl', 'wb') as f:
+            joblib.dump(model, f)
         
         # Save label encoder
-        joblib.dump(self.label_encoder, 'label_encoder.pkl')
+        with atomic_open('label_encoder.pkl', 'wb') as f:
+            joblib.dump(self.label_encoder, f)
         
         # Save symptom columns
-        with open('symptom_columns.json', 'w') as f:
-            json.dump(self.symptom_columns, f)
+        write_json('symptom_columns.json', self.symptom_columns)
         
         # Save disease info
         disease_info = {
@@ -168,14 +139,25 @@ class DiseasePredictor:
             'severity': self.symptom_severity
         }
         
-        with open('disease_info.json', 'w') as f:
-            json.dump(disease_info, f, indent=2)
+        write_json('disease_info.json', disease_info, indent=2)
+        
+        # Save the disease x symptom index for "next symptom to ask" suggestions
+        with atomic_open(INDEX_FILE, 'wb') as f:
+            SymptomIndex.from_features(data.features, data.labels, data.diseases, data.symptoms).save(f)
+        
+        # Publish the same files as a versioned bundle (with manifest) for hot-reload
+        def copy_artifacts(folder):
+            for name in model_store.ARTIFACTS + model_store.OPTIONAL_ARTIFACTS:
+                copy_file(name, os.path.join(folder, name))
+        version = model_store.publish(copy_artifacts)
         
         print(" Model saved successfully!")
-        print("   - disease_model.pkl")
+        print("   - disease_model.pkl" + (" (quantized)" if quantize else ""))
         print("   - label_encoder.pkl")
         print("   - symptom_columns.json")
         print("   - disease_info.json")
+        print(f"   - {INDEX_FILE}")
+        print(f"   - models/{version}/ (live version)")
     
     def create_visualizations(self, feature_importance):
         """Create visualization charts"""
@@ -190,7 +172,7 @@ class DiseasePredictor:
             plt.ylabel('Symptoms', fontsize=12)
             plt.title('Top 15 Most Important Symptoms for Disease Prediction', fontsize=14, fontweight='bold')
             plt.tight_layout()
-            plt.savefig('feature_importance.png', dpi=150, bbox_inches='tight')
+            save_figure(plt, 'feature_importance.png', dpi=150, bbox_inches='tight')
             print(" Saved: feature_importance.png")
             plt.close()
         except Exception as e:
@@ -198,6 +180,11 @@ class DiseasePredictor:
 
 def main():
     """Main training pipeline"""
+    parser = argparse.ArgumentParser(description="Train the disease prediction model")
+    parser.add_argument('--quantize', action='store_true',
+                        help="save a compact quantized forest (forest_quant.py) as disease_model.pkl")
+    args = parser.parse_args()
+    
     print("=" * 60)
     print(" DISEASE PREDICTION MODEL TRAINING")
     print("=" * 60)
@@ -206,16 +193,16 @@ def main():
     predictor = DiseasePredictor()
     
     # Load data
-    df = predictor.load_data()
+    data = predictor.load_data()
     
     # Load additional information
-    predictor.load_additional_info()
+    predictor.load_additional_info(data)
     
     # Train model
-    accuracy, feature_importance = predictor.train_model(df)
+    accuracy, feature_importance = predictor.train_model(data)
     
     # Save model
-    predictor.save_model()
+    predictor.save_model(data, quantize=args.quantize)
     
     # Create visualizations
     predictor.create_visualizations(feature_importance)
@@ -226,4 +213,6 @@ def main():
     print("=" * 60)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # --profile / MEDIMATCH_PROFILE=cprofile|sample writes a profile to Results/profiles/
+    with profiled("train_disease_model"):
+        main()
\ No newline at end of file
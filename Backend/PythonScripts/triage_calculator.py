@@ -3,30 +3,36 @@ import sys
 import os
 import datetime
 
+from result_writer import write_json
+from instrumentation import span
+from profiling import profiled
+
+# Symptom weights (higher = more urgent); unlisted symptoms count DEFAULT_SYMPTOM_WEIGHT
+SYMPTOM_WEIGHTS = {
+    "chest_pain": 9,
+    "difficulty_breathing": 8,
+    "severe_bleeding": 9,
+    "high_fever": 4,
+    "head_injury": 7,
+    "broken_bone": 6,
+    "abdominal_pain": 5,
+    "dizziness": 3,
+    "unconscious": 10,
+    "severe_burn": 8
+}
+DEFAULT_SYMPTOM_WEIGHT = 2
+
 def calculate_urgency(symptoms, age, pain_level):
     """
     AI Rule-Based Urgency Calculator
     Returns urgency score 1-10
     """
     score = 0
-    
-    # Symptom weights (higher = more urgent)
-    weights = {
-        "chest_pain": 9,
-        "difficulty_breathing": 8,
-        "severe_bleeding": 9,
-        "high_fever": 4,
-        "head_injury": 7,
-        "broken_bone": 6,
-        "abdominal_pain": 5,
-        "dizziness": 3,
-        "unconscious": 10,
-        "severe_burn": 8
-    }
-    
+    weights = SYMPTOM_WEIGHTS
+
     # Add symptom scores
     for symptom in symptoms:
-        score += weights.get(symptom, 2)
+        score += weights.get(symptom, DEFAULT_SYMPTOM_WEIGHT)
     
     # Age factor (extremes get higher score)
     if age < 5 or age > 65:
@@ -69,7 +75,6 @@ def get_department(symptoms):
         return "General Medicine"
     else:
         return "Emergency Department"
-# Add this function above main()
 def get_specialist(symptoms):
     """Recommend a specific specialist based on symptoms"""
     if "chest_pain" in symptoms:
@@ -91,81 +96,157 @@ def get_specialist(symptoms):
     else:
         return "General Practitioner"
 
-# Inside main(), update the 'result' dictionary:
-# Change the result block to include:
-# "recommended_specialist": get_specialist(symptoms),
+def triage_record(data, timestamp=None):
+    """Score one patient record (dict with name/age/symptoms/pain_level) into a result dict"""
+    name = data.get('name', 'Unknown')
+    age = data.get('age', 30)
+    symptoms = data.get('symptoms', [])
+    pain_level = data.get('pain_level', 5)
+
+    # Calculate urgency
+    urgency_score = calculate_urgency(symptoms, age, pain_level)
+
+    # Get priority and action
+    priority, action, dept_type, wait_time = get_priority(urgency_score)
+
+    # Get department
+    department = get_department(symptoms)
+
+    # Main symptom for display
+    main_symptom = symptoms[0].replace('_', ' ').title() if symptoms else "General"
+
+    return {
+        "patient_name": name,
+        "age": age,
+        "symptoms": symptoms,
+        "symptoms_count": len(symptoms),
+        "main_symptom": main_symptom,
+        "pain_level": pain_level,
+        "urgency": urgency_score,
+        "ai_score": round(urgency_score * 10, 1),
+        "priority": priority,
+        "action": action,
+        "department": department,
+        "recommended_specialist": get_specialist(symptoms),
+        "dept_type": dept_type,
+        "wait_time": wait_time,
+        "timestamp": timestamp or datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "status": "calculated"
+    }
+
+def error_record(message):
+    """Fallback result used when a record cannot be scored"""
+    return {
+        "error": message,
+        "urgency": 5,
+        "priority": "MEDIUM",
+        "action": "See a doctor as soon as possible",
+        "department": "General",
+        "wait_time": "4-6 hours"
+    }
+
+def stream_triage(lines, out, chunk_size=4096):
+    """Bulk mode: score JSONL records from lines and write JSONL results to out.
+
+    Records are scored a chunk at a time by the columnar engine in triage_engine and
+    each chunk is written with a single write call. Returns (records, errors).
+    """
+    from triage_engine import triage_batch
+
+    dumps = json.dumps
+    records = errors = 0
+    chunk = []
+
+    def flush():
+        nonlocal errors
+        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        parsed = []
+        for line in chunk:
+            try:
+                parsed.append(json.loads(line))
+            except ValueError as e:
+                parsed.append(e)
+        valid = [r for r in parsed if not isinstance(r, Exception)]
+        scored = iter(triage_batch(valid, timestamp, errors="record"))
+        results = [error_record(str(r)) if isinstance(r, Exception) else next(scored) for r in parsed]
+        errors += sum(1 for r in results if "error" in r)
+        out.write("\n".join(dumps(r) for r in results) + "\n")
+        chunk.clear()
+
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        chunk.append(line)
+        records += 1
+        if len(chunk) >= chunk_size:
+            flush()
+
+    if chunk:
+        flush()
+    out.flush()
+    return records, errors
+
+def stream_main(argv):
+    """triage_calculator.py --stream [input.jsonl|-] [--output results.jsonl]"""
+    import argparse
+    parser = argparse.ArgumentParser(prog="triage_calculator.py --stream",
+                                     description="Score a stream of JSONL patient records")
+    parser.add_argument("input", nargs="?", default="-", help="JSONL file, or - for stdin")
+    parser.add_argument("--output", default="-", help="JSONL output file, or - for stdout")
+    args = parser.parse_args(argv)
+
+    src = sys.stdin if args.input == "-" else open(args.input, "r", buffering=1 << 20)
+    dst = sys.stdout if args.output == "-" else open(args.output, "w", buffering=1 << 20)
+    try:
+        with span("triage.stream") as stream_span:
+            records, errors = stream_triage(src, dst)
+            stream_span.set(records=records, errors=errors)
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if dst is not sys.stdout:
+            dst.close()
+    print(f"Triaged {records} records ({errors} errors)", file=sys.stderr)
+
 def main():
     if len(sys.argv) < 2:
         print('{"error": "No input file provided"}')
         return
-    
+
+    # Bulk JSONL mode for drills / queue re-scoring
+    if sys.argv[1] == "--stream":
+        stream_main(sys.argv[2:])
+        return
+
     input_file = sys.argv[1]
-    
+
     try:
         # Read patient data
         with open(input_file, 'r') as f:
             data = json.load(f)
-        
-        name = data.get('name', 'Unknown')
-        age = data.get('age', 30)
-        symptoms = data.get('symptoms', [])
-        pain_level = data.get('pain_level', 5)
-        
-        # Calculate urgency
-        urgency_score = calculate_urgency(symptoms, age, pain_level)
-        
-        # Get priority and action
-        priority, action, dept_type, wait_time = get_priority(urgency_score)
-        
-        # Get department
-        department = get_department(symptoms)
-        
-        # Main symptom for display
-        main_symptom = symptoms[0].replace('_', ' ').title() if symptoms else "General"
-        
-       # Prepare result
-        result = {
-            "patient_name": name,
-            "age": age,
-            "symptoms": symptoms,
-            "symptoms_count": len(symptoms),
-            "main_symptom": main_symptom,
-            "pain_level": pain_level,
-            "urgency": urgency_score,
-            "ai_score": round(urgency_score * 10, 1),
-            "priority": priority,
-            "action": action,
-            "department": department,
-            "recommended_specialist": get_specialist(symptoms), # ADD THIS LINE (No #)
-            "dept_type": dept_type,
-            "wait_time": wait_time,
-            "timestamp": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "status": "calculated"
-        }
+
+        # Prepare result
+        with span("triage.single", symptoms=len(data.get('symptoms', []))):
+            result = triage_record(data)
+
         # Print result for C#
         print(json.dumps(result))
-        
-        # Save to file
+
+        # Save to file (atomically, so a reader never sees a partial result)
         project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         output_file = os.path.join(project_root, "triage_results.json")
-        with open(output_file, 'w') as f:
-            json.dump(result, f, indent=2)
-            
-        # Also save to PythonScripts folder for backup
-        backup_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "triage_backup.json")
-        with open(backup_file, 'w') as f:
-            json.dump(result, f, indent=2)
-            
+        write_json(output_file, result)
+
+        # Backup copy in the PythonScripts folder, only when asked for (MEDIMATCH_TRIAGE_BACKUP=1)
+        if os.environ.get("MEDIMATCH_TRIAGE_BACKUP", "0") == "1":
+            backup_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "triage_backup.json")
+            write_json(backup_file, result)
+
     except Exception as e:
-        error_result = {
-            "error": str(e),
-            "urgency": 5,
-            "priority": "MEDIUM",
-            "action": "See a doctor as soon as possible",
-            "department": "General",
-            "wait_time": "4-6 hours"
-        }
-        print(json.dumps(error_result))
+        print(json.dumps(error_record(str(e))))
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # --profile / MEDIMATCH_PROFILE=cprofile|sample writes a profile to Results/profiles/
+    with profiled("triage_calculator"):
+        main()
\ No newline at end of file
@@ -0,0 +1,213 @@
+"""
+Columnar triage engine: scores many patients at once with NumPy.
+
+Symptoms are encoded against the fixed vocabulary of SYMPTOM_WEIGHTS as a count matrix
+(one column per known symptom plus one "other" column, so duplicated and unknown symptoms
+weigh exactly as in calculate_urgency). Urgency is then one matrix-vector product plus
+vectorized age and pain terms, and priority / department / specialist come from np.select
+over the same rule order as get_priority / get_department / get_specialist.
+
+triage_batch() returns the same dicts as triage_calculator.triage_record(); records the
+columnar path cannot represent exactly (non-numeric or non-finite age or pain, symptoms
+not given as a list of strings) go through the scalar functions instead.
+
+Run `python triage_engine.py --check [N]` to compare both paths on N random records.
+"""
+
+import datetime
+import math
+import sys
+import numpy as np
+
+from triage_calculator import SYMPTOM_WEIGHTS, DEFAULT_SYMPTOM_WEIGHT, get_priority, triage_record, error_record
+from instrumentation import span
+
+VOCABULARY = list(SYMPTOM_WEIGHTS)
+VOCAB_INDEX = {s: k for k, s in enumerate(VOCABULARY)}
+OTHER = len(VOCABULARY)
+WEIGHT_VECTOR = np.array([SYMPTOM_WEIGHTS[s] for s in VOCABULARY] + [DEFAULT_SYMPTOM_WEIGHT], dtype=np.float64)
+
+# lookup tables in the order of the if-chains in triage_calculator
+PRIORITY_TABLE = [get_priority(score) for score in (8, 6, 4, 0)]
+DEPARTMENT_RULES = [
+    (("chest_pain", "difficulty_breathing"), "Cardiology"),
+    (("head_injury", "unconscious"), "Neurology"),
+    (("broken_bone",), "Orthopedics"),
+    (("abdominal_pain",), "Gastroenterology"),
+    (("severe_burn",), "Burn Unit"),
+    (("high_fever",), "General Medicine"),
+]
+DEPARTMENT_DEFAULT = "Emergency Department"
+SPECIALIST_RULES = [
+    (("chest_pain",), "Cardiologist (Heart Specialist)"),
+    (("difficulty_breathing",), "Pulmonologist (Lung Specialist)"),
+    (("head_injury", "unconscious", "dizziness"), "Neurologist (Brain & Nerve Specialist)"),
+    (("broken_bone",), "Orthopedic Surgeon (Bone Specialist)"),
+    (("abdominal_pain",), "Gastroenterologist (Digestive Specialist)"),
+    (("severe_burn",), "Burn Specialist / Plastic Surgeon"),
+    (("severe_bleeding",), "Trauma Surgeon"),
+    (("high_fever",), "Infectious Disease Specialist"),
+]
+SPECIALIST_DEFAULT = "General Practitioner"
+DEPARTMENT_TABLE = [name for _, name in DEPARTMENT_RULES] + [DEPARTMENT_DEFAULT]
+SPECIALIST_TABLE = [name for _, name in SPECIALIST_RULES] + [SPECIALIST_DEFAULT]
+
+
+def encode_symptoms(symptom_lists):
+    """(n, len(VOCABULARY) + 1) count matrix; the last column counts unknown symptoms"""
+    n = len(symptom_lists)
+    lengths = np.fromiter((len(s) for s in symptom_lists), dtype=np.int64, count=n)
+    cols = np.fromiter((VOCAB_INDEX.get(s, OTHER) for lst in symptom_lists for s in lst),
+                       dtype=np.int64, count=int(lengths.sum()))
+    rows = np.repeat(np.arange(n), lengths)
+    width = OTHER + 1
+    return np.bincount(rows * width + cols, minlength=n * width).reshape(n, width)
+
+
+def _rule_select(present, rules, n):
+    conditions = [present[:, [VOCAB_INDEX[s] for s in symptoms]].any(axis=1) for symptoms, _ in rules]
+    return np.select(conditions, np.arange(len(rules)), default=len(rules)) if rules else np.zeros(n, dtype=np.int64)
+
+
+def score_columns(counts, ages, pain_levels):
+    """Vectorized calculate_urgency / get_priority / get_department / get_specialist.
+
+    Returns (urgency, clamped, priority_idx, department_idx, specialist_idx); the index
+    arrays point into PRIORITY_TABLE, DEPARTMENT_TABLE and SPECIALIST_TABLE, and clamped
+    marks scores that hit the 1 / 10 bounds (calculate_urgency returns an int for those).
+    """
+    ages = np.asarray(ages, dtype=np.float64)
+    pain_levels = np.asarray(pain_levels, dtype=np.float64)
+    n = len(ages)
+
+    score = counts @ WEIGHT_VECTOR
+    score = score + np.select([(ages < 5) | (ages > 65), (ages < 12) | (ages > 50)], [3, 1], 0)
+    score = score + pain_levels / 2
+    clamped = (score <= 1) | (score >= 10)
+    score = np.minimum(10, np.maximum(1, score))
+
+    # half-steps (integer pain) are already exact at one decimal; anything else is
+    # rounded with Python's round() so results match the scalar path bit for bit
+    urgency = score.copy()
+    odd = (score * 2) != np.floor(score * 2)
+    if odd.any():
+        urgency[odd] = [round(x, 1) for x in score[odd].tolist()]
+
+    priority_idx = np.select([urgency >= 8, urgency >= 6, urgency >= 4], [0, 1, 2], default=3)
+    present = counts[:, :OTHER] > 0
+    department_idx = _rule_select(present, DEPARTMENT_RULES, n)
+    specialist_idx = _rule_select(present, SPECIALIST_RULES, n)
+    return urgency, clamped, priority_idx, department_idx, specialist_idx
+
+
+def _is_number(x):
+    # NaN / inf pass through calculate_urgency's min / max differently than np.minimum /
+    # np.maximum (max(1, nan) is 1), so they are left to the scalar path
+    return isinstance(x, (int, float)) and math.isfinite(x)
+
+
+def _columnar_ok(data):
+    symptoms = data.get('symptoms', [])
+    return (isinstance(symptoms, list) and all(isinstance(s, str) for s in symptoms)
+            and _is_number(data.get('age', 30)) and _is_number(data.get('pain_level', 5)))
+
+
+def triage_batch(records, timestamp=None, errors="raise"):
+    """Score a list of record dicts; same output as [triage_record(r) for r in records].
+
+    With errors="record", a record the scalar path rejects becomes an error_record()
+    instead of raising.
+    """
+    timestamp = timestamp or datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    results = [None] * len(records)
+
+    fast = [k for k, r in enumerate(records) if isinstance(r, dict) and _columnar_ok(r)]
+    for k in sorted(set(range(len(records))) - set(fast)):
+        try:
+            results[k] = triage_record(records[k], timestamp)
+        except Exception as e:
+            if errors != "record":
+                raise
+            results[k] = error_record(str(e))
+    if not fast:
+        return results
+
+    batch = [records[k] for k in fast]
+    symptom_lists = [r.get('symptoms', []) for r in batch]
+    ages = [r.get('age', 30) for r in batch]
+    pains = [r.get('pain_level', 5) for r in batch]
+    with span("triage.score_columns", records=len(batch)):
+        urgency, clamped, priority_idx, department_idx, specialist_idx = score_columns(
+            encode_symptoms(symptom_lists), ages, pains)
+
+    for k, r, symptoms, age, pain, u, c, p, d, sp in zip(fast, batch, symptom_lists, ages, pains, urgency.tolist(),
+                                                         clamped.tolist(), priority_idx.tolist(),
+                                                         department_idx.tolist(), specialist_idx.tolist()):
+        # calculate_urgency returns the int bound when the score is clamped
+        u = int(u) if c else u
+        priority, action, dept_type, wait_time = PRIORITY_TABLE[p]
+        results[k] = {
+            "patient_name": r.get('name', 'Unknown'),
+            "age": age,
+            "symptoms": symptoms,
+            "symptoms_count": len(symptoms),
+            "main_symptom": symptoms[0].replace('_', ' ').title() if symptoms else "General",
+            "pain_level": pain,
+            "urgency": u,
+            "ai_score": round(u * 10, 1),
+            "priority": priority,
+            "action": action,
+            "department": DEPARTMENT_TABLE[d],
+            "recommended_specialist": SPECIALIST_TABLE[sp],
+            "dept_type": dept_type,
+            "wait_time": wait_time,
+            "timestamp": timestamp,
+            "status": "calculated"
+        }
+    return results
+
+
+def check_against_scalar(n=10000, seed=0):
+    """Property check: random records scored by both paths must give identical results"""
+    import json
+    import random
+    rng = random.Random(seed)
+    pool = VOCABULARY + ["cough", "rash", "nausea", ""]
+    records = []
+    for i in range(n):
+        symptoms = [rng.choice(pool) for _ in range(rng.randint(0, 6))]
+        age = rng.choice([rng.randint(0, 100), rng.uniform(0, 100), 4.999, 5, 12, 50, 65, 65.5])
+        pain = rng.choice([rng.randint(0, 10), round(rng.uniform(0, 10), 2), rng.uniform(-5, 25)])
+        records.append({"name": f"p{i}", "age": age, "symptoms": symptoms, "pain_level": pain})
+    # a few records that must take the scalar fallback
+    records += [{"symptoms": "chest_pain"}, {"age": "40"}, {"pain_level": None}, {}]
+    # non-finite numbers (json.loads accepts NaN / Infinity)
+    for value in (float("nan"), float("inf"), float("-inf")):
+        records += [{"symptoms": ["chest_pain"], "pain_level": value}, {"age": value, "pain_level": 4},
+                    {"age": value, "pain_level": value}]
+
+    ts = "2000-01-01 00:00:00"
+    expected = []
+    for r in records:
+        try:
+            expected.append(json.dumps(triage_record(r, ts)))
+        except Exception as e:
+            expected.append(type(e).__name__)
+    got = []
+    for r in records:
+        try:
+            got.append(json.dumps(triage_batch([r], ts)[0]))
+        except Exception as e:
+            got.append(type(e).__name__)
+    batch_ok = [json.dumps(x) for x in triage_batch([r for r, e in zip(records, expected) if not e.endswith("Error")], ts)]
+    mismatches = sum(a != b for a, b in zip(expected, got))
+    mismatches += sum(a != b for a, b in zip([e for e in expected if not e.endswith("Error")], batch_ok))
+    return len(records), mismatches
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--check":
+        n = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+        total, mismatches = check_against_scalar(n)
+        print(f"Checked {total} records: {mismatches} mismatches")
+        sys.exit(1 if mismatches else 0)
@@ -0,0 +1,329 @@
+"""
+Live emergency department queue built on triage_calculator.
+
+Waiting patients sit in a binary heap ordered by effective urgency:
+
+    effective = urgency + aging_rate * minutes_waited
+
+so a low-priority patient slowly escalates instead of waiting forever. Because every
+waiting patient ages at the same rate, the order between two patients never changes
+over time; the heap key is therefore the time-invariant -(urgency - aging_rate * arrival)
+and nothing has to be re-heaped as the clock moves. Ties go to the earlier arrival.
+
+Re-scoring or removing a patient does not search the heap: the old heap entry is left
+in place and skipped when it surfaces (lazy deletion), so add / rescore / remove / pop
+are all O(log n). The heap is compacted when stale entries outnumber live ones.
+
+Run `python triage_queue.py [--port 8765]` for a local JSON API:
+    GET    /queue?limit=N        next-to-see list (highest effective urgency first)
+    GET    /patients/<id>        one waiting patient
+    POST   /patients             add a patient (triage_calculator input record)
+    POST   /patients/<id>/rescore   re-triage with updated fields
+    DELETE /patients/<id>        remove (left, transferred, ...)
+    POST   /next                 pop the next patient to be seen
+    POST   /snapshot             write the queue to the snapshot file now
+    GET    /health
+The queue is restored from the snapshot file on start and saved on shutdown.
+"""
+
+import heapq
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from triage_calculator import triage_record, get_priority
+from result_writer import write_json
+
+DEFAULT_AGING_RATE = 0.05  # urgency points per minute waited
+DEFAULT_PORT = 8765
+
+
+class TriageQueue:
+    def __init__(self, aging_rate=DEFAULT_AGING_RATE, clock=time.time):
+        self.aging_rate = aging_rate
+        self.clock = clock
+        self._heap = []       # [key, seq, patient_id]
+        self._entries = {}    # patient_id -> live entry dict
+        self._seq = itertools.count()
+        self._ids = itertools.count(1)
+        self._version = 0     # bumped on every change; keys the board cache
+        self._board = None    # (version, limit, [entries]) of the last next-to-see list
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, patient_id):
+        return patient_id in self._entries
+
+    def _key(self, urgency, arrival):
+        return -(urgency - self.aging_rate * arrival / 60.0)
+
+    def _push(self, entry):
+        entry["seq"] = next(self._seq)
+        heapq.heappush(self._heap, [self._key(entry["triage"]["urgency"], entry["arrival"]), entry["seq"],
+                                    entry["patient_id"]])
+        self._entries[entry["patient_id"]] = entry
+        self._version += 1
+
+    def _is_live(self, item):
+        entry = self._entries.get(item[2])
+        return entry is not None and entry["seq"] == item[1]
+
+    def _maybe_compact(self):
+        if len(self._heap) > 64 and len(self._heap) > 2 * len(self._entries):
+            self._heap = [item for item in self._heap if self._is_live(item)]
+            heapq.heapify(self._heap)
+
+    def add(self, record, patient_id=None, arrival=None):
+        """Triage record and queue it; returns the queue entry"""
+        if patient_id is None:
+            patient_id = record.get("patient_id") or f"P{next(self._ids):05d}"
+        patient_id = str(patient_id)
+        if patient_id in self._entries:
+            raise KeyError(f"patient {patient_id} is already waiting")
+        entry = {
+            "patient_id": patient_id,
+            "record": dict(record),
+            "arrival": self.clock() if arrival is None else float(arrival),
+            "triage": triage_record(record),
+        }
+        self._push(entry)
+        return entry
+
+    def rescore(self, patient_id, updates=None):
+        """Re-triage a waiting patient (e.g. new symptoms); arrival time is kept"""
+        old = self._entries[patient_id]
+        record = dict(old["record"])
+        record.update(updates or {})
+        entry = {"patient_id": patient_id, "record": record, "arrival": old["arrival"],
+                 "triage": triage_record(record)}
+        self._push(entry)
+        self._maybe_compact()
+        return entry
+
+    def remove(self, patient_id):
+        entry = self._entries.pop(patient_id)
+        self._version += 1
+        self._maybe_compact()
+        return entry
+
+    def pop_next(self):
+        """Remove and return the patient with the highest effective urgency, or None"""
+        while self._heap:
+            item = heapq.heappop(self._heap)
+            if self._is_live(item):
+                self._version += 1
+                return self._entries.pop(item[2])
+        return None
+
+    def effective_urgency(self, entry, now=None):
+        now = self.clock() if now is None else now
+        return entry["triage"]["urgency"] + self.aging_rate * max(0.0, now - entry["arrival"]) / 60.0
+
+    def next_to_see(self, limit=20):
+        """The first `limit` waiting patients in order, without removing them.
+
+        The order only changes when the queue does, so the list is cached per version and
+        repeated board queries cost O(limit) instead of a heap scan.
+        """
+        if self._board is None or self._board[0] != self._version or self._board[1] < limit:
+            ordered = []
+            for item in heapq.nsmallest(limit + len(self._heap) - len(self._entries), self._heap):
+                if self._is_live(item):
+                    ordered.append(self._entries[item[2]])
+                    if len(ordered) == limit:
+                        break
+            self._board = (self._version, limit, ordered)
+        return self._board[2][:limit]
+
+    def view(self, entry, now=None):
+        """JSON-friendly view of a queue entry for the board"""
+        now = self.clock() if now is None else now
+        effective = self.effective_urgency(entry, now)
+        priority, action, _, wait_time = get_priority(effective)
+        return {
+            "patient_id": entry["patient_id"],
+            "patient_name": entry["triage"]["patient_name"],
+            "urgency": entry["triage"]["urgency"],
+            "effective_urgency": round(effective, 2),
+            "priority": priority,
+            "action": action,
+            "wait_time": wait_time,
+            "waited_minutes": round(max(0.0, now - entry["arrival"]) / 60.0, 1),
+            "department": entry["triage"]["department"],
+            "recommended_specialist": entry["triage"]["recommended_specialist"],
+        }
+
+    def snapshot(self):
+        return {
+            "version": 1,
+            "aging_rate": self.aging_rate,
+            "saved_at": self.clock(),
+            "patients": [{"patient_id": e["patient_id"], "record": e["record"], "arrival": e["arrival"]}
+                         for e in self._entries.values()],
+        }
+
+    def save(self, path):
+        # written aside and renamed, so a crash never leaves a half-written snapshot
+        write_json(path, self.snapshot())
+
+    @classmethod
+    def restore(cls, snapshot, clock=time.time, aging_rate=None):
+        queue = cls(snapshot.get("aging_rate", DEFAULT_AGING_RATE) if aging_rate is None else aging_rate, clock)
+        for p in snapshot.get("patients", []):
+            queue.add(p["record"], p["patient_id"], p["arrival"])
+        # keep generated ids unique after a restart
+        numbers = [int(pid[1:]) for pid in queue._entries if pid[:1] == "P" and pid[1:].isdigit()]
+        queue._ids = itertools.count(max(numbers, default=0) + 1)
+        return queue
+
+    @classmethod
+    def load(cls, path, clock=time.time, aging_rate=None):
+        with open(path) as f:
+            return cls.restore(json.load(f), clock, aging_rate)
+
+
+class QueueHandler(BaseHTTPRequestHandler):
+    # set by serve(): the shared queue, its lock and the snapshot path
+    queue = None
+    lock = None
+    snapshot_path = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length", 0) or 0)
+        return json.loads(self.rfile.read(length) or b"{}") if length else {}
+
+    def _parts(self):
+        url = urlparse(self.path)
+        return [p for p in url.path.split("/") if p], parse_qs(url.query)
+
+    def do_GET(self):
+        parts, query = self._parts()
+        with self.lock:
+            if parts == ["queue"]:
+                limit = int(query.get("limit", ["20"])[0])
+                now = self.queue.clock()
+                board = [self.queue.view(e, now) for e in self.queue.next_to_see(limit)]
+                return self._send(200, {"waiting": len(self.queue), "queue": board})
+            if len(parts) == 2 and parts[0] == "patients":
+                entry = self.queue._entries.get(parts[1])
+                if entry is None:
+                    return self._send(404, {"error": f"patient {parts[1]} is not waiting"})
+                return self._send(200, self.queue.view(entry))
+            if parts == ["health"]:
+                return self._send(200, {"status": "ok", "waiting": len(self.queue)})
+        self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        parts, _ = self._parts()
+        try:
+            body = self._body()
+        except ValueError as e:
+            return self._send(400, {"error": f"invalid JSON: {e}"})
+        try:
+            with self.lock:
+                if parts == ["patients"]:
+                    entry = self.queue.add(body, body.get("patient_id"))
+                    return self._send(201, self.queue.view(entry))
+                if len(parts) == 3 and parts[0] == "patients" and parts[2] == "rescore":
+                    return self._send(200, self.queue.view(self.queue.rescore(parts[1], body)))
+                if parts == ["next"]:
+                    entry = self.queue.pop_next()
+                    if entry is None:
+                        return self._send(404, {"error": "queue is empty"})
+                    return self._send(200, self.queue.view(entry))
+                if parts == ["snapshot"] and self.snapshot_path:
+                    self.queue.save(self.snapshot_path)
+                    return self._send(200, {"saved": self.snapshot_path, "waiting": len(self.queue)})
+        except KeyError as e:
+            return self._send(409 if parts == ["patients"] else 404, {"error": str(e.args[0])})
+        except Exception as e:
+            return self._send(400, {"error": str(e)})
+        self._send(404, {"error": "not found"})
+
+    def do_DELETE(self):
+        parts, _ = self._parts()
+        if len(parts) == 2 and parts[0] == "patients":
+            with self.lock:
+                if parts[1] in self.queue:
+                    return self._send(200, self.queue.view(self.queue.remove(parts[1])))
+            return self._send(404, {"error": f"patient {parts[1]} is not waiting"})
+        self._send(404, {"error": "not found"})
+
+
+def serve(queue, host="127.0.0.1", port=DEFAULT_PORT, snapshot_path=None, snapshot_interval=30.0):
+    lock = threading.Lock()
+    handler = type("BoundQueueHandler", (QueueHandler,), {"queue": queue, "lock": lock,
+                                                          "snapshot_path": snapshot_path})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+
+    stop = threading.Event()
+
+    def autosave():
+        while not stop.wait(snapshot_interval):
+            with lock:
+                try:
+                    queue.save(snapshot_path)
+                except OSError as e:
+                    print(f"DEBUG: Could not save queue snapshot: {e}", file=sys.stderr)
+
+    if snapshot_path and snapshot_interval > 0:
+        threading.Thread(target=autosave, daemon=True).start()
+
+    print(f"Triage queue listening on http://{host}:{server.server_address[1]} ({len(queue)} waiting)",
+          file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+        if snapshot_path:
+            with lock:
+                queue.save(snapshot_path)
+
+
+def main():
+    import argparse
+    project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    parser = argparse.ArgumentParser(description="Live triage priority queue")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--aging-rate", type=float, default=None,
+                        help=f"urgency points gained per minute waited (default {DEFAULT_AGING_RATE})")
+    parser.add_argument("--snapshot", default=os.path.join(project_root, "Results", "triage_queue.json"))
+    parser.add_argument("--snapshot-interval", type=float, default=30.0, help="seconds between autosaves, 0 = off")
+    args = parser.parse_args()
+
+    if os.path.exists(args.snapshot):
+        try:
+            queue = TriageQueue.load(args.snapshot, aging_rate=args.aging_rate)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"DEBUG: Ignoring unreadable queue snapshot: {e}", file=sys.stderr)
+            queue = TriageQueue(args.aging_rate if args.aging_rate is not None else DEFAULT_AGING_RATE)
+    else:
+        queue = TriageQueue(args.aging_rate if args.aging_rate is not None else DEFAULT_AGING_RATE)
+
+    serve(queue, args.host, args.port, args.snapshot, args.snapshot_interval)
+
+
+if __name__ == "__main__":
+    main()